@@ -2,15 +2,30 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from debug_excel import AnalisadorExcel
+from cache_ranking import cache_ranking_padrao
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 
 class Analise360:
-    def __init__(self):
+    # Métricas usadas no score e nas colunas do ranking
+    METRICAS_RANKING = ['distribuicao_status', 'taxa_eficiencia', 'tempo_medio_resolucao', 'tendencias']
+
+    # Pesos de cada fator do score
+    PESOS_SCORE = {'eficiencia': 40, 'volume': 20, 'tempo': 20, 'tendencia': 20}
+
+    def __init__(self, pesos=None, cache=None):
+        """
+        Args:
+            pesos (dict, optional): Pesos dos fatores do score. Por padrão, PESOS_SCORE
+            cache (CacheRanking, optional): Cache de rankings. Por padrão, o cache compartilhado;
+                False desativa o cache
+        """
         self.analisador_julio = None
         self.analisador_leandro = None
         self.data_atual = datetime.now().date()
+        self.pesos = dict(self.PESOS_SCORE, **(pesos or {}))
+        self.cache = cache_ranking_padrao if cache is None else cache
         
     def configurar_arquivos(self, arquivos):
         """Configura os arquivos para análise"""
@@ -24,33 +39,61 @@ class Analise360:
         """Calcula score baseado em múltiplos fatores"""
         score = 0
         
-        # Fator 1: Taxa de eficiência (peso 40%)
-        score += metricas['taxa_eficiencia'] * 40
+        # Fator 1: Taxa de eficiência (peso padrão 40%)
+        score += metricas['taxa_eficiencia'] * self.pesos['eficiencia']
         
-        # Fator 2: Volume processado (peso 20%)
+        # Fator 2: Volume processado (peso padrão 20%)
         total_processado = sum(v for k, v in metricas['distribuicao_status'].items() if k != 'PENDENTE')
-        score += (total_processado / sum(metricas['distribuicao_status'].values())) * 20
+        score += (total_processado / sum(metricas['distribuicao_status'].values())) * self.pesos['volume']
         
-        # Fator 3: Tempo médio de resolução (peso 20%)
+        # Fator 3: Tempo médio de resolução (peso padrão 20%)
         if metricas.get('tempo_medio_resolucao'):
             # Quanto menor o tempo, melhor o score
             tempo_score = max(0, (10 - metricas['tempo_medio_resolucao'])) / 10
-            score += tempo_score * 20
+            score += tempo_score * self.pesos['tempo']
             
-        # Fator 4: Tendência de melhoria (peso 20%)
+        # Fator 4: Tendência de melhoria (peso padrão 20%)
         if metricas.get('tendencias', {}).get('slope', 0) > 0:
-            score += 20
+            score += self.pesos['tendencia']
         
         return score
         
+    def configuracao_score(self):
+        """Configuração que determina o ranking, usada na chave do cache"""
+        return {'pesos': self.pesos, 'metricas': self.METRICAS_RANKING}
+
+    def invalidar_ranking(self, caminho=None):
+        """
+        Descarta os rankings em cache gerados a partir de um arquivo alterado.
+        
+        Args:
+            caminho (str, optional): Arquivo alterado. Se None, descarta todos os rankings
+        """
+        if self.cache:
+            self.cache.invalidar(caminho)
+
     def gerar_ranking(self):
-        """Gera ranking geral dos colaboradores"""
+        """Gera ranking geral dos colaboradores, reaproveitando o cache enquanto os arquivos não mudam"""
+        arquivos = [a.file_path for a in (self.analisador_julio, self.analisador_leandro) if a]
+        chave = None
+        if self.cache and arquivos:
+            try:
+                impressoes = self.cache.impressoes(arquivos)
+                chave = self.cache.chave(impressoes, self.configuracao_score())
+                ranking_cache = self.cache.obter(chave)
+                if ranking_cache is not None:
+                    return ranking_cache
+            except OSError:
+                # Arquivo ausente: seguir pela análise, que reporta o erro
+                chave = None
+        
         ranking = []
+        falhas = False
         
         # Processar grupo JULIO se disponível
         if self.analisador_julio:
             try:
-                dados_julio = self.analisador_julio.analisar_arquivo()
+                dados_julio = self.analisador_julio.analisar_arquivo(self.METRICAS_RANKING)
                 for colab, metricas in self.analisador_julio.colaboradores.items():
                     score = self.calcular_score(metricas)
                     ranking.append({
@@ -63,12 +106,13 @@ class Analise360:
                         'Tempo Médio': metricas.get('tempo_medio_resolucao', 0)
                     })
             except Exception as e:
+                falhas = True
                 st.error(f"Erro ao processar dados do grupo JULIO: {str(e)}")
             
         # Processar grupo LEANDRO se disponível
         if self.analisador_leandro:
             try:
-                dados_leandro = self.analisador_leandro.analisar_arquivo()
+                dados_leandro = self.analisador_leandro.analisar_arquivo(self.METRICAS_RANKING)
                 for colab, metricas in self.analisador_leandro.colaboradores.items():
                     score = self.calcular_score(metricas)
                     ranking.append({
@@ -81,13 +125,17 @@ class Analise360:
                         'Tempo Médio': metricas.get('tempo_medio_resolucao', 0)
                     })
             except Exception as e:
+                falhas = True
                 st.error(f"Erro ao processar dados do grupo LEANDRO: {str(e)}")
         
         if not ranking:
             st.warning("⚠️ Nenhum arquivo de análise foi carregado ou os arquivos não contêm dados válidos")
             return pd.DataFrame()
             
-        return pd.DataFrame(ranking).sort_values('Score', ascending=False)
+        df_ranking = pd.DataFrame(ranking).sort_values('Score', ascending=False)
+        if chave and not falhas:
+            self.cache.guardar(chave, df_ranking, impressoes)
+        return df_ranking
     
     def overview_colaborador(self, colaborador, grupo):
         """Gera overview detalhado de um colaborador"""
@@ -101,6 +149,9 @@ class Analise360:
             st.error(f"Analisador para o grupo {grupo} não está configurado")
             return None
             
+        # Com o ranking vindo do cache, as métricas ainda não foram calculadas neste processo
+        if not analisador.colaboradores:
+            analisador.analisar_arquivo(self.METRICAS_RANKING)
         metricas = analisador.colaboradores.get(colaborador)
         if not metricas:
             st.error(f"Colaborador {colaborador} não encontrado no grupo {grupo}")
@@ -1,9 +1,14 @@
 import pandas as pd
 import numpy as np
 from debug_excel import AnalisadorExcel
-from scipy import stats
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import r2_score
+from cache_planilhas import listar_abas
+from esquema_colunas import normalizar_coluna, carregar_aba, projetar
+from datas import converter_datas
+from categorias import contar
+from motor_metricas import MotorMetricas
+from tendencias import ajustar, formato_tendencia, R2_CONSTANTE_SKLEARN
+from leitura_streaming import iterar_blocos, AgregadorIncremental, status_avancado
+from grupos import registro_padrao, tabela_colaboradores, correlacoes_por_grupo, resumo_grupos
 from datetime import datetime, timedelta
 import warnings
 import os
@@ -11,12 +16,21 @@ import json
 warnings.filterwarnings('ignore')
 
 class AnalisadorAvancado:
-    def __init__(self):
-        """Inicializa o analisador avançado"""
+    # Colunas lógicas usadas nas métricas avançadas
+    COLUNAS_ANALISE = ['DATA', 'RESOLUCAO', 'ÚLTIMO PAGAMENTO']
+
+    def __init__(self, registro_grupos=None):
+        """
+        Inicializa o analisador avançado
+        
+        Args:
+            registro_grupos (RegistroGrupos, optional): Grupos e colaboradores processados.
+                Por padrão, grupos.registro_padrao
+        """
         try:
             # Inicializar estruturas de dados
-            self.metricas_julio = {}
-            self.metricas_leandro = {}
+            self.grupos = registro_grupos or registro_padrao
+            self.metricas_por_grupo = {grupo: {} for grupo in self.grupos.nomes}
             self.gargalos = {}
             self.ultima_analise = None
             self.historico_analises = []
@@ -25,8 +39,33 @@ class AnalisadorAvancado:
         except Exception as e:
             raise RuntimeError(f"Erro ao inicializar analisador: {str(e)}")
 
-    def analisar_arquivo(self, caminho_arquivo=None):
-        """Realiza a análise detalhada do arquivo Excel"""
+    @property
+    def metricas_julio(self):
+        """Métricas do grupo JULIO (compatibilidade com o formato de dois grupos)"""
+        return self.metricas_por_grupo.get('JULIO', {})
+
+    @property
+    def metricas_leandro(self):
+        """Métricas do grupo LEANDRO (compatibilidade com o formato de dois grupos)"""
+        return self.metricas_por_grupo.get('LEANDRO', {})
+
+    def _grupos_com_metricas(self):
+        """Pares (grupo, métricas) dos grupos com ao menos um colaborador analisado"""
+        return [(grupo, metricas) for grupo, metricas in self.metricas_por_grupo.items() if metricas]
+
+    def tabela_grupos(self):
+        """Métricas de todos os grupos em uma tabela longa (ver grupos.tabela_colaboradores)"""
+        return tabela_colaboradores(self.metricas_por_grupo)
+
+    def analisar_arquivo(self, caminho_arquivo=None, streaming=False):
+        """
+        Realiza a análise detalhada do arquivo Excel
+        
+        Args:
+            caminho_arquivo (str, optional): Caminho do arquivo Excel
+            streaming (bool): Lê cada aba em blocos com openpyxl somente-leitura,
+                sem carregar a aba inteira em memória
+        """
         if not caminho_arquivo:
             caminho_arquivo = 'dados_analise.xlsx'
 
@@ -36,53 +75,55 @@ class AnalisadorAvancado:
             # Registrar data e hora da análise
             self.ultima_analise = datetime.now()
             
-            # Ler todas as abas do arquivo Excel
-            excel_file = pd.ExcelFile(caminho_arquivo)
+            # Listar as abas do arquivo Excel (via cache compartilhado)
+            abas = listar_abas(caminho_arquivo)
             
-            # Lista de colaboradores para processar
-            colaboradores = [
-                'ANA LIDIA', 'FELIPE', 'JULIANE', 'MATHEUS', 'ANA GESSICA', 
-                'POLIANA', 'IGOR', 'ELISANGELA', 'NUNO', 'THALISSON', 
-                'VICTOR ADRIANO', 'VITORIA', 'LEANDRO'
-            ]
+            # Sem streaming, as abas são empilhadas e as métricas de todos saem de uma vez
+            motor = MotorMetricas(colunas_data=('DATA',), formato_data='%d/%m/%Y')
             
             # Processar cada aba
-            for nome_aba in excel_file.sheet_names:
-                if nome_aba not in colaboradores:
+            for nome_aba in abas:
+                if not self.grupos.possui(nome_aba):
                     print(f"Pulando aba {nome_aba} - não é um colaborador")
                     continue
                     
                 print(f"\nAnalisando dados de: {nome_aba}")
                 
                 try:
-                    # Ler a aba atual
-                    df = pd.read_excel(excel_file, sheet_name=nome_aba)
-                    
-                    # Verificar se temos pelo menos a coluna DATA
-                    if 'DATA' not in df.columns:
-                        print(f"Erro: Coluna DATA não encontrada na aba {nome_aba}")
-                        continue
-                    
-                    # Processar os dados do colaborador
-                    metricas = self.processar_dados_colaborador(nome_aba, df)
-                    
-                    if metricas:
-                        # Adicionar às métricas do grupo apropriado
-                        if nome_aba in ['ANA LIDIA', 'FELIPE', 'JULIANE', 'MATHEUS', 'ANA GESSICA', 'POLIANA', 'IGOR', 'ELISANGELA', 'NUNO', 'THALISSON', 'VICTOR ADRIANO']:
-                            self.metricas_julio[nome_aba] = metricas
-                        else:
-                            self.metricas_leandro[nome_aba] = metricas
+                    if streaming:
+                        metricas = self.processar_colaborador_streaming(caminho_arquivo, nome_aba)
+                        if metricas:
+                            self.registrar_metricas(nome_aba, metricas)
+                    else:
+                        # Ler apenas as colunas usadas nas métricas, com nomes lógicos
+                        df = carregar_aba(caminho_arquivo, nome_aba, colunas=self.COLUNAS_ANALISE,
+                                          converter_tipos=False)
+                        
+                        # Verificar se temos pelo menos a coluna DATA
+                        if 'DATA' not in df.columns:
+                            print(f"Erro: Coluna DATA não encontrada na aba {nome_aba}")
+                            continue
+                        
+                        motor.adicionar(nome_aba, df, grupo=self.grupo_colaborador(nome_aba), arquivo=caminho_arquivo)
                 
                 except Exception as e:
                     print(f"Erro ao processar aba {nome_aba}: {str(e)}")
                     continue
 
+            if motor.partes:
+                # Processar os dados de todos os colaboradores
+                for nome_aba, metricas in motor.metricas_avancadas().items():
+                    if metricas:
+                        self.registrar_metricas(nome_aba, metricas)
+                    else:
+                        print(f"Nenhum registro com data válida encontrado para {nome_aba}")
+
             # Salvar histórico da análise se temos dados
-            if self.metricas_julio or self.metricas_leandro:
+            if self._grupos_com_metricas():
                 self.historico_analises.append({
                     'data': self.ultima_analise,
-                    'metricas_julio': self.metricas_julio.copy(),
-                    'metricas_leandro': self.metricas_leandro.copy()
+                    'metricas_por_grupo': {grupo: metricas.copy()
+                                           for grupo, metricas in self.metricas_por_grupo.items()}
                 })
 
                 # Manter apenas as últimas 10 análises
@@ -104,47 +145,78 @@ class AnalisadorAvancado:
             print(f"Erro ao analisar arquivo: {str(e)}")
             raise
 
+    def grupo_colaborador(self, nome_aba):
+        """Retorna o grupo ao qual o colaborador pertence"""
+        return self.grupos.grupo_de(nome_aba)
+
+    def registrar_metricas(self, nome_aba, metricas):
+        """Adiciona as métricas de um colaborador ao grupo apropriado"""
+        self.metricas_por_grupo.setdefault(self.grupo_colaborador(nome_aba), {})[nome_aba] = metricas
+
+    def analisar_arquivo_incremental(self, caminho_arquivo, ingestao):
+        """
+        Atualiza as métricas processando apenas as linhas acrescentadas desde a última execução
+        
+        Args:
+            caminho_arquivo (str): Caminho do arquivo Excel
+            ingestao (IngestaoIncremental): Controle das marcas d'água por aba
+            
+        Returns:
+            dict: Modo de atualização usado em cada aba
+        """
+        self.ultima_analise = datetime.now()
+        modos = {}
+        
+        for nome_aba in listar_abas(caminho_arquivo):
+            if not self.grupos.possui(nome_aba):
+                continue
+            
+            try:
+                resultado = ingestao.atualizar_aba(caminho_arquivo, nome_aba, self._novo_agregador,
+                                                 perfil='avancado', normalizar=normalizar_coluna)
+                modos[nome_aba] = resultado['modo']
+                
+                agregador = resultado['agregador']
+                if not agregador.possui_data:
+                    print(f"Erro: Coluna DATA não encontrada na aba {nome_aba}")
+                    continue
+                
+                metricas = agregador.metricas_avancadas()
+                if metricas:
+                    self.registrar_metricas(nome_aba, metricas)
+            except Exception as e:
+                print(f"Erro ao processar aba {nome_aba}: {str(e)}")
+        
+        return modos
+
     def calcular_correlacao_volume_eficiencia(self):
         """Calcula a correlação entre volume de casos e eficiência para cada grupo"""
         print("\n=== Análise de Correlação Volume vs Eficiência ===")
         
+        # Correlação de todos os grupos de uma vez, desconsiderando colaboradores sem volume
+        tabela = self.tabela_grupos()
+        correlacoes = correlacoes_por_grupo(tabela[tabela['volume'] > 0], 'volume', 'taxa_eficiencia')
+        
         resultados = {}
-        for grupo, metricas in [("JULIO", self.metricas_julio), ("LEANDRO", self.metricas_leandro)]:
-            volumes = []
-            eficiencias = []
-            
-            for colab, dados in metricas.items():
-                try:
-                    volume = sum(dados['distribuicao_status'].values())
-                    eficiencia = dados.get('taxa_eficiencia', 0)
-                    if volume > 0:  # Evitar dados inválidos
-                        volumes.append(volume)
-                        eficiencias.append(eficiencia)
-                except (KeyError, TypeError, ValueError) as e:
-                    print(f"Aviso: Dados inválidos para {colab}: {str(e)}")
-                    continue
-            
-            if len(volumes) >= 2:  # Precisamos de pelo menos 2 pontos para correlação
-                try:
-                    correlacao = stats.pearsonr(volumes, eficiencias)
-                    resultados[grupo] = {
-                        'coeficiente': correlacao[0],
-                        'p_valor': correlacao[1]
-                    }
-                    
-                    print(f"\nGrupo {grupo}:")
-                    print(f"Coeficiente de correlação: {correlacao[0]:.3f}")
-                    print(f"P-valor: {correlacao[1]:.3f}")
-                    
-                    if correlacao[1] < 0.05:
-                        if correlacao[0] > 0:
-                            print("=> Correlação positiva significativa: Maior volume está associado a maior eficiência")
-                        else:
-                            print("=> Correlação negativa significativa: Maior volume está associado a menor eficiência")
+        for grupo in self.metricas_por_grupo:
+            if grupo in correlacoes.index and correlacoes.loc[grupo, 'n'] >= 2:  # Precisamos de pelo menos 2 pontos para correlação
+                coeficiente, p_valor = correlacoes.loc[grupo, ['coeficiente', 'p_valor']]
+                resultados[grupo] = {
+                    'coeficiente': coeficiente,
+                    'p_valor': p_valor
+                }
+                
+                print(f"\nGrupo {grupo}:")
+                print(f"Coeficiente de correlação: {coeficiente:.3f}")
+                print(f"P-valor: {p_valor:.3f}")
+                
+                if p_valor < 0.05:
+                    if coeficiente > 0:
+                        print("=> Correlação positiva significativa: Maior volume está associado a maior eficiência")
                     else:
-                        print("=> Não há correlação significativa entre volume e eficiência")
-                except Exception as e:
-                    print(f"Erro ao calcular correlação para grupo {grupo}: {str(e)}")
+                        print("=> Correlação negativa significativa: Maior volume está associado a menor eficiência")
+                else:
+                    print("=> Não há correlação significativa entre volume e eficiência")
             else:
                 print(f"\nGrupo {grupo}: Dados insuficientes para análise de correlação")
         
@@ -155,37 +227,19 @@ class AnalisadorAvancado:
         try:
             print("\n=== Análise de Correlações ===")
             
-            # Analisar correlações para cada grupo
-            for grupo_nome, metricas in [("Julio", self.metricas_julio), ("Leandro", self.metricas_leandro)]:
-                if not metricas:
-                    continue
-                    
-                print(f"\nGrupo {grupo_nome}:")
-                
-                # Coletar dados para análise
-                dados_grupo = []
-                for colaborador, dados in metricas.items():
-                    if not dados:
-                        continue
-                        
-                    total = dados['total_registros']
-                    eficiencia = dados['taxa_eficiencia']
-                    dados_grupo.append({
-                        'colaborador': colaborador,
-                        'total': total,
-                        'eficiencia': eficiencia
-                    })
+            # Estatísticas de todos os grupos em uma única passada
+            resumo = resumo_grupos(self.tabela_grupos())
+            
+            for grupo, metricas in self._grupos_com_metricas():
+                print(f"\nGrupo {self.grupos.rotulo(grupo)}:")
                 
-                if not dados_grupo:
+                if grupo not in resumo.index:
                     print("Sem dados suficientes para análise")
                     continue
                 
-                # Converter para DataFrame
-                df_grupo = pd.DataFrame(dados_grupo)
-                
-                # Calcular correlação entre volume e eficiência
-                if len(df_grupo) > 1:
-                    corr = df_grupo['total'].corr(df_grupo['eficiencia'])
+                # Correlação entre volume e eficiência
+                if resumo.loc[grupo, 'n'] > 1:
+                    corr = resumo.loc[grupo, 'correlacao']
                     print(f"Correlação volume vs eficiência: {corr:.2f}")
                     
                     # Identificar padrões
@@ -210,43 +264,34 @@ class AnalisadorAvancado:
         try:
             print("\n=== Detecção de Gargalos ===")
             
-            self.gargalos = {
-                "Julio": [],
-                "Leandro": []
-            }
-            
-            # Analisar cada grupo
-            for grupo_nome, metricas in [("Julio", self.metricas_julio), ("Leandro", self.metricas_leandro)]:
-                if not metricas:
-                    continue
-                    
-                print(f"\nGrupo {grupo_nome}:")
-                
-                # Calcular métricas médias do grupo
-                total_registros = []
-                taxa_eficiencia = []
-                
-                for dados in metricas.values():
-                    if dados:
-                        total_registros.append(dados['total_registros'])
-                        taxa_eficiencia.append(dados['taxa_eficiencia'])
-                
-                if not total_registros:
-                    continue
-                    
-                media_registros = np.mean(total_registros)
-                media_eficiencia = np.mean(taxa_eficiencia)
+            self.gargalos = {self.grupos.rotulo(grupo): [] for grupo in self.metricas_por_grupo}
+            
+            # Comparar cada colaborador com a média do seu grupo, para todos os grupos de uma vez
+            tabela = self.tabela_grupos()
+            resumo = resumo_grupos(tabela)
+            media_registros = resumo['media_registros'].reindex(tabela['grupo']).to_numpy()
+            media_eficiencia = resumo['media_eficiencia'].reindex(tabela['grupo']).to_numpy()
+            tabela['gargalo_eficiencia'] = tabela['taxa_eficiencia'] < media_eficiencia * 0.7
+            tabela['gargalo_volume'] = tabela['total_registros'] > media_registros * 1.5
+            sinalizados = tabela[tabela['gargalo_eficiencia'] | tabela['gargalo_volume']]
+            sinalizados = {grupo: linhas.to_dict('records')
+                           for grupo, linhas in sinalizados.groupby('grupo', observed=True)}
+            
+            for grupo, estatisticas in resumo.iterrows():
+                grupo_nome = self.grupos.rotulo(grupo)
+                media_registros = estatisticas['media_registros']
+                media_eficiencia = estatisticas['media_eficiencia']
                 
+                print(f"\nGrupo {grupo_nome}:")
                 print(f"Média de registros: {media_registros:.2f}")
                 print(f"Média de eficiência: {media_eficiencia:.2f}")
                 
-                # Identificar colaboradores com métricas significativamente abaixo da média
-                for colaborador, dados in metricas.items():
-                    if not dados:
-                        continue
-                        
+                # Colaboradores com métricas significativamente fora da média
+                for dados in sinalizados.get(grupo, []):
+                    colaborador = dados['colaborador']
+                    
                     # Verificar eficiência
-                    if dados['taxa_eficiencia'] < media_eficiencia * 0.7:
+                    if dados['gargalo_eficiencia']:
                         gargalo = {
                             "colaborador": colaborador,
                             "tipo": "eficiência",
@@ -258,7 +303,7 @@ class AnalisadorAvancado:
                         print(f"⚠️ Gargalo de eficiência detectado: {colaborador} ({dados['taxa_eficiencia']:.2f} vs média {media_eficiencia:.2f})")
                     
                     # Verificar volume desproporcional
-                    if dados['total_registros'] > media_registros * 1.5:
+                    if dados['gargalo_volume']:
                         gargalo = {
                             "colaborador": colaborador,
                             "tipo": "volume",
@@ -269,17 +314,15 @@ class AnalisadorAvancado:
                         self.gargalos[grupo_nome].append(gargalo)
                         print(f"⚠️ Volume desproporcional detectado: {colaborador} ({dados['total_registros']} vs média {media_registros:.2f})")
                 
-                # Verificar distribuição de carga
-                if len(total_registros) > 1:
-                    cv = np.std(total_registros) / np.mean(total_registros)  # Coeficiente de variação
-                    if cv > 0.5:  # Alta variabilidade
-                        gargalo = {
-                            "tipo": "distribuição",
-                            "valor": cv,
-                            "descricao": "Distribuição desigual de carga entre colaboradores"
-                        }
-                        self.gargalos[grupo_nome].append(gargalo)
-                        print(f"⚠️ Distribuição desigual de carga detectada (CV={cv:.2f})")
+                # Verificar distribuição de carga pelo coeficiente de variação
+                if estatisticas['n'] > 1 and estatisticas['cv'] > 0.5:  # Alta variabilidade
+                    gargalo = {
+                        "tipo": "distribuição",
+                        "valor": estatisticas['cv'],
+                        "descricao": "Distribuição desigual de carga entre colaboradores"
+                    }
+                    self.gargalos[grupo_nome].append(gargalo)
+                    print(f"⚠️ Distribuição desigual de carga detectada (CV={estatisticas['cv']:.2f})")
             
             return self.gargalos
             
@@ -291,7 +334,7 @@ class AnalisadorAvancado:
         """Analisa tendências e faz previsões simples"""
         print("\n=== Análise de Tendências e Previsões ===")
         
-        for grupo, metricas in [("JULIO", self.metricas_julio), ("LEANDRO", self.metricas_leandro)]:
+        for grupo, metricas in self.metricas_por_grupo.items():
             print(f"\nGrupo {grupo}:")
             
             # Análise de tendências por colaborador
@@ -331,11 +374,8 @@ class AnalisadorAvancado:
             print("\n=== Análise de Tendências ===")
             
             # Analisar tendências para cada grupo
-            for grupo_nome, metricas in [("Julio", self.metricas_julio), ("Leandro", self.metricas_leandro)]:
-                if not metricas:
-                    continue
-                    
-                print(f"\nGrupo {grupo_nome}:")
+            for grupo, metricas in self._grupos_com_metricas():
+                print(f"\nGrupo {self.grupos.rotulo(grupo)}:")
                 
                 # Analisar tendências por colaborador
                 for colaborador, dados in metricas.items():
@@ -371,61 +411,57 @@ class AnalisadorAvancado:
             print("Dados históricos insuficientes para análise preditiva. Necessário pelo menos 2 análises.")
             return None
         
-        resultados_preditivos = {
-            "Julio": {},
-            "Leandro": {}
-        }
+        resultados_preditivos = {self.grupos.rotulo(grupo): {} for grupo in self.metricas_por_grupo}
         
         try:
             # Para cada grupo, realizar previsões
-            for grupo_nome, grupo_metricas in [("Julio", self.metricas_julio), ("Leandro", self.metricas_leandro)]:
-                if not grupo_metricas:
-                    continue
-                
+            for grupo, grupo_metricas in self._grupos_com_metricas():
+                grupo_nome = self.grupos.rotulo(grupo)
                 print(f"\nPrevisões para grupo {grupo_nome}:")
                 
-                # Para cada colaborador, construir modelo preditivo
+                # Coletar o histórico de eficiência de cada colaborador
+                historicos = {}
+                periodos = {}
                 for colaborador in grupo_metricas.keys():
-                    # Coletar dados históricos deste colaborador
                     dados_historicos = []
                     datas = []
                     
                     for idx, analise in enumerate(self.historico_analises):
-                        if grupo_nome == "Julio":
-                            metricas_grupo = analise.get('metricas_julio', {})
-                        else:
-                            metricas_grupo = analise.get('metricas_leandro', {})
-                        
+                        metricas_grupo = analise.get('metricas_por_grupo', {}).get(grupo, {})
                         if colaborador in metricas_grupo and metricas_grupo[colaborador]:
                             dados_historicos.append(metricas_grupo[colaborador].get('taxa_eficiencia', 0))
                             datas.append(idx)  # Usar índice como proxy para tempo
                     
+                    historicos[colaborador] = dados_historicos
+                    periodos[colaborador] = datas
+                
+                # Ajustar de uma vez as retas de todos os colaboradores com pelo menos 3 pontos
+                suficientes = [c for c, dados in historicos.items() if len(dados) >= 3]
+                ajustes = ajustar({c: historicos[c] for c in suficientes},
+                                  abscissas={c: periodos[c] for c in suficientes},
+                                  r2_constante=R2_CONSTANTE_SKLEARN)
+                
+                for colaborador in grupo_metricas.keys():
+                    dados_historicos = historicos[colaborador]
+                    datas = periodos[colaborador]
+                    
                     # Se temos pelo menos 3 pontos de dados, podemos fazer previsão
-                    if len(dados_historicos) >= 3:
-                        # Preparar dados para modelo
-                        X = np.array(datas).reshape(-1, 1)
-                        y = np.array(dados_historicos)
-                        
-                        # Criar e treinar modelo
-                        modelo = LinearRegression()
-                        modelo.fit(X, y)
+                    if colaborador in ajustes.index:
+                        ajuste = ajustes.loc[colaborador]
                         
                         # Fazer previsão para próximos 3 períodos
-                        proximos_periodos = np.array([len(datas), len(datas)+1, len(datas)+2]).reshape(-1, 1)
-                        previsoes = modelo.predict(proximos_periodos)
-                        
-                        # Calcular qualidade do modelo
-                        y_pred = modelo.predict(X)
-                        r2 = r2_score(y, y_pred)
+                        proximos_periodos = np.array([len(datas), len(datas)+1, len(datas)+2])
+                        previsoes = ajuste['intercepto'] + ajuste['inclinacao'] * proximos_periodos
+                        r2 = float(ajuste['r2'])
                         
                         # Armazenar resultados
                         resultados_preditivos[grupo_nome][colaborador] = {
                             "historico": dados_historicos,
                             "previsoes": previsoes.tolist(),
                             "r2": r2,
-                            "tendencia": "crescente" if modelo.coef_[0] > 0 else "decrescente",
-                            "coeficiente": float(modelo.coef_[0]),
-                            "intercepto": float(modelo.intercept_)
+                            "tendencia": "crescente" if ajuste['inclinacao'] > 0 else "decrescente",
+                            "coeficiente": float(ajuste['inclinacao']),
+                            "intercepto": float(ajuste['intercepto'])
                         }
                         
                         # Exibir resultados
@@ -507,12 +543,7 @@ class AnalisadorAvancado:
             <li class="nav-item" role="presentation">
                 <button class="nav-link active" id="resumo-tab" data-bs-toggle="tab" data-bs-target="#resumo" type="button" role="tab" aria-controls="resumo" aria-selected="true">Resumo</button>
             </li>
-            <li class="nav-item" role="presentation">
-                <button class="nav-link" id="julio-tab" data-bs-toggle="tab" data-bs-target="#julio" type="button" role="tab" aria-controls="julio" aria-selected="false">Grupo Julio</button>
-            </li>
-            <li class="nav-item" role="presentation">
-                <button class="nav-link" id="leandro-tab" data-bs-toggle="tab" data-bs-target="#leandro" type="button" role="tab" aria-controls="leandro" aria-selected="false">Grupo Leandro</button>
-            </li>
+            {abas_grupos_html}
             <li class="nav-item" role="presentation">
                 <button class="nav-link" id="previsoes-tab" data-bs-toggle="tab" data-bs-target="#previsoes" type="button" role="tab" aria-controls="previsoes" aria-selected="false">Previsões</button>
             </li>
@@ -584,15 +615,8 @@ class AnalisadorAvancado:
                 </div>
             </div>
             
-            <!-- Aba do Grupo Julio -->
-            <div class="tab-pane fade" id="julio" role="tabpanel" aria-labelledby="julio-tab">
-                {metricas_julio_html}
-            </div>
-            
-            <!-- Aba do Grupo Leandro -->
-            <div class="tab-pane fade" id="leandro" role="tabpanel" aria-labelledby="leandro-tab">
-                {metricas_leandro_html}
-            </div>
+            <!-- Uma aba por grupo -->
+            {metricas_grupos_html}
             
             <!-- Aba de Previsões -->
             <div class="tab-pane fade" id="previsoes" role="tabpanel" aria-labelledby="previsoes-tab">
@@ -614,27 +638,7 @@ class AnalisadorAvancado:
                         </div>
                     </div>
                     
-                    <div class="col-md-6">
-                        <div class="card">
-                            <div class="card-header">
-                                <h5>Previsões - Grupo Julio</h5>
-                            </div>
-                            <div class="card-body">
-                                {previsoes_julio_html}
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="col-md-6">
-                        <div class="card">
-                            <div class="card-header">
-                                <h5>Previsões - Grupo Leandro</h5>
-                            </div>
-                            <div class="card-body">
-                                {previsoes_leandro_html}
-                            </div>
-                        </div>
-                    </div>
+                    {previsoes_grupos_html}
                     
                     <div class="col-md-12 mt-4">
                         <div class="card">
@@ -683,21 +687,11 @@ class AnalisadorAvancado:
             data_atualizacao = self.ultima_analise.strftime("%d/%m/%Y %H:%M") if self.ultima_analise else "N/A"
             
             # Calcular métricas gerais
-            total_colaboradores = len(self.metricas_julio) + len(self.metricas_leandro)
-            
-            total_registros = 0
-            soma_eficiencia = 0
-            count_eficiencia = 0
-            
-            for metricas in [self.metricas_julio, self.metricas_leandro]:
-                for dados in metricas.values():
-                    if dados:
-                        total_registros += dados.get('total_registros', 0)
-                        if 'taxa_eficiencia' in dados:
-                            soma_eficiencia += dados['taxa_eficiencia']
-                            count_eficiencia += 1
+            total_colaboradores = sum(len(metricas) for metricas in self.metricas_por_grupo.values())
             
-            eficiencia_media = soma_eficiencia / count_eficiencia if count_eficiencia > 0 else 0
+            tabela = self.tabela_grupos()
+            total_registros = int(tabela['total_registros'].sum())
+            eficiencia_media = tabela['taxa_eficiencia'].mean() if len(tabela) else 0
             
             # Determinar tendência geral
             tendencia_geral = "Estável"
@@ -706,7 +700,7 @@ class AnalisadorAvancado:
             tendencias_crescentes = 0
             tendencias_decrescentes = 0
             
-            for metricas in [self.metricas_julio, self.metricas_leandro]:
+            for metricas in self.metricas_por_grupo.values():
                 for dados in metricas.values():
                     if dados and 'tendencia' in dados:
                         if dados['tendencia']['direcao'] == 'crescente':
@@ -753,17 +747,33 @@ class AnalisadorAvancado:
             if gargalos_encontrados:
                 alertas_html = "\n".join(gargalos_encontrados)
             
-            # Gerar HTML para métricas de cada grupo
-            metricas_julio_html = self.gerar_html_metricas(self.metricas_julio)
-            metricas_leandro_html = self.gerar_html_metricas(self.metricas_leandro)
+            # Gerar abas, métricas e previsões de cada grupo
+            abas_grupos = []
+            metricas_grupos = []
+            previsoes_grupos = []
+            for grupo, metricas in self.metricas_por_grupo.items():
+                rotulo = self.grupos.rotulo(grupo)
+                aba = grupo.lower().replace(' ', '-')
+                abas_grupos.append(f"""<li class="nav-item" role="presentation">
+                <button class="nav-link" id="{aba}-tab" data-bs-toggle="tab" data-bs-target="#{aba}" type="button" role="tab" aria-controls="{aba}" aria-selected="false">Grupo {rotulo}</button>
+            </li>""")
+                metricas_grupos.append(f"""<div class="tab-pane fade" id="{aba}" role="tabpanel" aria-labelledby="{aba}-tab">
+                {self.gerar_html_metricas(metricas)}
+            </div>""")
+                previsoes_grupos.append(f"""<div class="col-md-6">
+                        <div class="card">
+                            <div class="card-header">
+                                <h5>Previsões - Grupo {rotulo}</h5>
+                            </div>
+                            <div class="card-body">
+                                {self.gerar_html_previsoes(rotulo)}
+                            </div>
+                        </div>
+                    </div>""")
             
             # Gerar HTML para histórico
             historico_html = self.gerar_html_historico()
             
-            # Gerar HTML para previsões
-            previsoes_julio_html = self.gerar_html_previsoes("Julio")
-            previsoes_leandro_html = self.gerar_html_previsoes("Leandro")
-            
             # Gerar scripts para gráficos Plotly
             scripts_plotly = self.gerar_scripts_plotly()
             
@@ -776,11 +786,10 @@ class AnalisadorAvancado:
                 tendencia_geral=tendencia_geral,
                 tendencia_class=tendencia_class,
                 alertas_html=alertas_html,
-                metricas_julio_html=metricas_julio_html,
-                metricas_leandro_html=metricas_leandro_html,
+                abas_grupos_html="\n            ".join(abas_grupos),
+                metricas_grupos_html="\n            ".join(metricas_grupos),
                 historico_html=historico_html,
-                previsoes_julio_html=previsoes_julio_html,
-                previsoes_leandro_html=previsoes_leandro_html,
+                previsoes_grupos_html="\n                    ".join(previsoes_grupos),
                 scripts_plotly=scripts_plotly
             )
             
@@ -858,11 +867,14 @@ class AnalisadorAvancado:
         
         return "\n".join(html_partes)
 
-    def processar_dados_colaborador(self, nome, df):
+    def processar_dados_colaborador(self, nome, df, arquivo=None):
         """Processa os dados de um colaborador específico"""
         try:
+            # Nomes lógicos de esquema_colunas, restritos às colunas usadas
+            df = projetar(df, self.COLUNAS_ANALISE)
+            
             # Converter datas para datetime
-            df['Data'] = pd.to_datetime(df['DATA'], format='%d/%m/%Y', errors='coerce')
+            df['Data'] = converter_datas(df['DATA'], chave=(nome, 'DATA'), formato='%d/%m/%Y', arquivo=arquivo)
             
             # Remover registros com datas inválidas
             df = df.dropna(subset=['Data'])
@@ -871,25 +883,18 @@ class AnalisadorAvancado:
                 print(f"Nenhum registro com data válida encontrado para {nome}")
                 return None
             
-            # Definir status com base nas colunas disponíveis
-            df['Status'] = 'PENDENTE'  # Status padrão
-            
-            if 'RESOLUÇÃO' in df.columns:
-                df.loc[df['RESOLUÇÃO'].notna(), 'Status'] = 'VERIFICADO'
-            
-            if 'ÚLTIMO PAGAMENTO' in df.columns:
-                df.loc[df['ÚLTIMO PAGAMENTO'].notna(), 'Status'] = 'QUITADO'
+            # Definir status com base nas colunas disponíveis: PENDENTE por padrão,
+            # VERIFICADO com RESOLUÇÃO e QUITADO com ÚLTIMO PAGAMENTO (coluna categórica)
+            df['Status'] = status_avancado(df)
             
             # Calcular distribuição de status
-            distribuicao = df['Status'].value_counts().to_dict()
+            distribuicao = {status: int(n) for status, n in contar(df['Status']).items()}
             total_registros = len(df)
             
-            # Análise por data
+            # Análise por data, agrupando sobre os códigos das categorias
             analise_diaria = {}
-            for data, grupo in df.groupby('Data'):
-                data_str = data.strftime('%Y-%m-%d')
-                status_counts = grupo['Status'].value_counts().to_dict()
-                analise_diaria[data_str] = status_counts
+            for (data, status), n in df.groupby(['Data', 'Status'], observed=True).size().items():
+                analise_diaria.setdefault(data.strftime('%Y-%m-%d'), {})[status] = int(n)
 
             # Calcular médias diárias
             dias_unicos = df['Data'].nunique()
@@ -897,16 +902,8 @@ class AnalisadorAvancado:
                             for status, count in distribuicao.items()}
 
             # Análise de tendências
-            df_tendencia = df.groupby('Data').size().reset_index()
-            if len(df_tendencia) > 1:
-                X = np.arange(len(df_tendencia)).reshape(-1, 1)
-                y = df_tendencia[0].values
-                reg = LinearRegression().fit(X, y)
-                r2 = reg.score(X, y)
-                tendencia = 'crescente' if reg.coef_[0] > 0 else 'decrescente'
-            else:
-                tendencia = 'estável'
-                r2 = 0
+            df_tendencia = df.groupby('Data').size()
+            tendencia = formato_tendencia(ajustar({nome: df_tendencia.values}, r2_constante=R2_CONSTANTE_SKLEARN).loc[nome])
 
             # Análise semanal
             df['DiaSemana'] = df['Data'].dt.day_name()
@@ -921,10 +918,7 @@ class AnalisadorAvancado:
                 'total_registros': total_registros,
                 'distribuicao_status': distribuicao,
                 'medias_diarias': medias_diarias,
-                'tendencia': {
-                    'direcao': tendencia,
-                    'r2': round(r2, 3)
-                },
+                'tendencia': tendencia,
                 'padrao_semanal': padrao_semanal,
                 'taxa_eficiencia': round(taxa_eficiencia, 1),
                 'analise_diaria': analise_diaria
@@ -933,6 +927,31 @@ class AnalisadorAvancado:
             print(f"Erro ao processar aba {nome}: {str(e)}")
             return None
 
+    def _novo_agregador(self):
+        """Cria um agregador configurado com as regras de processar_dados_colaborador"""
+        return AgregadorIncremental(
+            classificar=status_avancado,
+            descartar_sem_data=True,
+            formato_data='%d/%m/%Y'
+        )
+
+    def processar_colaborador_streaming(self, caminho_arquivo, nome):
+        """Processa uma aba em blocos, produzindo as mesmas métricas de processar_dados_colaborador"""
+        agregador = self._novo_agregador()
+        agregador.origem = nome
+        agregador.arquivo = caminho_arquivo
+        agregador.consumir(iterar_blocos(caminho_arquivo, nome, normalizar=normalizar_coluna,
+                                        colunas=self.COLUNAS_ANALISE))
+        
+        if not agregador.possui_data:
+            print(f"Erro: Coluna DATA não encontrada na aba {nome}")
+            return None
+        
+        metricas = agregador.metricas_avancadas()
+        if metricas is None:
+            print(f"Nenhum registro com data válida encontrado para {nome}")
+        return metricas
+
 if __name__ == "__main__":
     # Inicializar analisador
     analisador = AnalisadorAvancado()
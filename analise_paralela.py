@@ -21,31 +21,35 @@ from collections import defaultdict, Counter
 from debug_excel import AnalisadorExcel
 from analise_360 import Analise360
 from data_analysis_pipeline import DataAnalysisPipeline
+from cache_planilhas import listar_abas, ler_todas_abas, dimensoes_abas
+from esquema_colunas import carregar_aba, projetar
+from datas import converter_datas
+from categorias import contar
+from transicoes import analisar_transicoes
 
-def analisar_situacao_colaborador(nome_arquivo, nome_aba):
+# Colunas lógicas usadas na análise de qualidade (além das colunas de data)
+COLUNAS_QUALIDADE = ['SITUACAO']
+
+def analisar_situacao_colaborador(nome_arquivo, nome_aba, df=None):
     """
     Analisa a qualidade dos registros na coluna SITUAÇÃO para um colaborador específico.
     
     Args:
         nome_arquivo (str): Caminho para o arquivo Excel
         nome_aba (str): Nome da aba/colaborador a ser analisada
+        df (pandas.DataFrame, optional): Dados da aba já carregados pela etapa de ingestão.
+            Quando omitido, a aba é lida do arquivo.
         
     Returns:
         dict: Dicionário com métricas de qualidade dos registros
     """
     try:
-        # Carregar dados do colaborador
-        df = pd.read_excel(nome_arquivo, sheet_name=nome_aba)
-        
-        # Normalizar nomes das colunas
-        colunas_normalizadas = []
-        for col in df.columns:
-            col_norm = str(col).strip().upper()
-            if col_norm in ['SITUAÇÂO', 'SITUAÇÃO']:
-                col_norm = 'SITUACAO'
-            colunas_normalizadas.append(col_norm)
-        
-        df.columns = colunas_normalizadas
+        # Carregar dados do colaborador, se a ingestão ainda não os forneceu
+        if df is None:
+            df = carregar_aba(nome_arquivo, nome_aba, colunas=COLUNAS_QUALIDADE, contendo=['DATA'],
+                              converter_tipos=False)
+        else:
+            df = projetar(df, COLUNAS_QUALIDADE, contendo=['DATA'])
         
         # Verificar se a coluna SITUACAO existe
         if 'SITUACAO' not in df.columns:
@@ -60,7 +64,7 @@ def analisar_situacao_colaborador(nome_arquivo, nome_aba):
         total_registros = len(df)
         registros_vazios = df['SITUACAO'].isna().sum()
         valores_unicos = df['SITUACAO'].dropna().unique()
-        contagem_valores = df['SITUACAO'].value_counts().to_dict()
+        contagem_valores = contar(df['SITUACAO']).to_dict()
         
         # Verificar padrões de preenchimento
         valores_padronizados = ['PENDENTE', 'VERIFICADO', 'APROVADO', 'QUITADO', 'CANCELADO', 'EM ANÁLISE']
@@ -71,13 +75,14 @@ def analisar_situacao_colaborador(nome_arquivo, nome_aba):
         atualizacoes_diarias = {}
         coluna_data = None
         
-        # Verificar se há coluna de data
+        # Verificar se há coluna de data. Com os nomes lógicos, 'DATA RESOLUÇÃO' vira RESOLUCAO
+        # e não entra aqui: a análise usa DATA (e suas variantes), não a data de resolução
         for col in df.columns:
             if 'DATA' in col:
                 tem_data = True
                 coluna_data = col
                 try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
+                    df[col] = converter_datas(df[col], chave=(nome_aba, col), arquivo=nome_arquivo)
                     # Agrupar por data e contar atualizações de status
                     atualizacoes = df.groupby(df[col].dt.date)['SITUACAO'].count()
                     atualizacoes_diarias = atualizacoes.to_dict()
@@ -106,38 +111,13 @@ def analisar_situacao_colaborador(nome_arquivo, nome_aba):
             0.3 * consistencia_diaria   # 30% para consistência diária
         ) * 100
         
-        # Análise de transições de estado (se houver coluna de data)
+        # Análise de transições de estado e tempo médio em cada situação (se houver coluna de data)
         analise_transicoes = {}
-        if tem_data and coluna_data and not df[coluna_data].isna().all():
-            # Ordenar por data
-            df_ordenado = df.sort_values(by=coluna_data)
-            
-            # Verificar transições de estado
-            if 'SITUACAO' in df_ordenado.columns and len(df_ordenado) > 1:
-                transicoes = []
-                situacao_anterior = None
-                
-                for idx, row in df_ordenado.iterrows():
-                    situacao_atual = row['SITUACAO']
-                    if pd.notna(situacao_anterior) and pd.notna(situacao_atual) and situacao_anterior != situacao_atual:
-                        transicoes.append((situacao_anterior, situacao_atual))
-                    situacao_anterior = situacao_atual
-                
-                # Contar transições
-                contagem_transicoes = Counter(transicoes)
-                analise_transicoes = {f"{de} -> {para}": contagem for (de, para), contagem in contagem_transicoes.items()}
-        
-        # Análise de tempo médio em cada situação
         tempos_medios = {}
-        if tem_data and coluna_data and not df[coluna_data].isna().all():
-            # Agrupar por situação e calcular tempo médio
-            df_ordenado = df.sort_values(by=coluna_data)
-            df_ordenado['data_anterior'] = df_ordenado[coluna_data].shift(1)
-            df_ordenado['tempo_no_estado'] = (df_ordenado[coluna_data] - df_ordenado['data_anterior']).dt.days
-            
-            # Calcular tempo médio por situação
-            tempos_por_situacao = df_ordenado.groupby('SITUACAO')['tempo_no_estado'].mean()
-            tempos_medios = tempos_por_situacao.to_dict()
+        if tem_data and coluna_data and not df[coluna_data].isna().all() and 'SITUACAO' in df.columns:
+            transicoes = analisar_transicoes(df, coluna_data)
+            analise_transicoes = {f"{de} -> {para}": contagem for (de, para), contagem in transicoes['contagem'].items()}
+            tempos_medios = transicoes['tempos_medios']
         
         # Gerar visualização da distribuição de situações
         grafico_path = None
@@ -217,48 +197,137 @@ def analisar_situacao_colaborador(nome_arquivo, nome_aba):
             'status': 'FALHA'
         }
 
-def analisar_arquivo_paralelo(nome_arquivo):
+# Abas que não pertencem a colaboradores
+ABAS_IGNORADAS = ["", "TESTE", "RELATÓRIO GERAL"]
+
+
+class AgendadorAnalise:
     """
-    Analisa todas as abas de um arquivo Excel em paralelo.
+    Agenda a análise de qualidade das abas de vários arquivos em um único pool de processos.
     
-    Args:
-        nome_arquivo (str): Caminho para o arquivo Excel
-        
-    Returns:
-        dict: Resultados da análise para cada colaborador
+    As tarefas (arquivo, aba) de todos os arquivos são reunidas e enviadas das maiores
+    para as menores, segundo as dimensões lidas dos metadados das planilhas, para que
+    as abas grandes não fiquem para o final. O pool é mantido entre execuções até
+    encerrar() ser chamado.
     """
-    try:
-        # Carregar arquivo Excel
-        xls = pd.ExcelFile(nome_arquivo)
+    
+    def __init__(self, max_workers=None):
+        """
+        Args:
+            max_workers (int, optional): Número de processos. Por padrão, os núcleos disponíveis
+        """
+        self.max_workers = max_workers or os.cpu_count()
+        self._executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.encerrar()
+    
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def planejar(self, arquivos, erros=None):
+        """
+        Lista as tarefas de todos os arquivos, das maiores para as menores.
         
-        # Filtrar abas válidas (excluir relatórios gerais, etc.)
-        abas_validas = [aba for aba in xls.sheet_names if aba not in ["", "TESTE", "RELATÓRIO GERAL"]]
+        Um arquivo ausente ou ilegível não impede o planejamento dos demais.
         
-        resultados = {}
+        Args:
+            arquivos (list): Caminhos dos arquivos Excel
+            erros (dict, optional): Recebe arquivo -> mensagem de erro dos arquivos que
+                não puderam ser planejados
+            
+        Returns:
+            list: Tuplas (arquivo, aba, células), em ordem de envio
+        """
+        tarefas = []
+        for arquivo in arquivos:
+            try:
+                abas = [aba for aba in listar_abas(arquivo) if aba not in ABAS_IGNORADAS]
+                dimensoes = dimensoes_abas(arquivo, abas)
+            except Exception as e:
+                if erros is not None:
+                    erros[arquivo] = str(e)
+                continue
+            for aba, (linhas, colunas) in dimensoes.items():
+                tarefas.append((arquivo, aba, linhas * colunas))
+        return sorted(tarefas, key=lambda tarefa: tarefa[2], reverse=True)
+    
+    def executar(self, arquivos):
+        """
+        Analisa todas as abas válidas dos arquivos.
         
-        # Usar ProcessPoolExecutor para paralelizar a análise
-        with ProcessPoolExecutor(max_workers=min(os.cpu_count(), len(abas_validas))) as executor:
-            # Criar tarefas para cada aba
-            tarefas = {executor.submit(analisar_situacao_colaborador, nome_arquivo, aba): aba for aba in abas_validas}
+        Args:
+            arquivos (list): Caminhos dos arquivos Excel
             
-            # Processar resultados conforme são concluídos
-            for tarefa in as_completed(tarefas):
-                aba = tarefas[tarefa]
-                try:
-                    resultado = tarefa.result()
-                    resultados[aba] = resultado
-                except Exception as e:
-                    resultados[aba] = {
-                        'colaborador': aba,
-                        'arquivo': nome_arquivo,
-                        'erro': str(e),
-                        'status': 'FALHA'
-                    }
+        Returns:
+            dict: Arquivo -> resultados da análise de cada colaborador
+        """
+        resultados = {arquivo: {} for arquivo in arquivos}
+        
+        erros = {}
+        tarefas = self.planejar(arquivos, erros)
+        for arquivo, erro in erros.items():
+            resultados[arquivo] = {'erro_geral': erro}
+        
+        # Ingestão: cada arquivo é interpretado uma única vez e cada tarefa recebe apenas a
+        # sua aba, restrita às colunas que a análise usa
+        dados_abas = {}
+        for arquivo in arquivos:
+            if arquivo in erros:
+                continue
+            abas = [aba for arq, aba, _ in tarefas if arq == arquivo]
+            try:
+                for aba, df in ler_todas_abas(arquivo, abas).items():
+                    dados_abas[(arquivo, aba)] = projetar(df, COLUNAS_QUALIDADE, contendo=['DATA'])
+            except Exception as e:
+                resultados[arquivo] = {'erro_geral': str(e)}
+        
+        executor = self._pool()
+        futuros = {}
+        for arquivo, aba, _ in tarefas:
+            if (arquivo, aba) in dados_abas:
+                futuro = executor.submit(analisar_situacao_colaborador, arquivo, aba,
+                                         dados_abas.pop((arquivo, aba)))
+                futuros[futuro] = (arquivo, aba)
+        
+        # Processar resultados conforme são concluídos
+        for futuro in as_completed(futuros):
+            arquivo, aba = futuros[futuro]
+            try:
+                resultados[arquivo][aba] = futuro.result()
+            except Exception as e:
+                resultados[arquivo][aba] = {
+                    'colaborador': aba,
+                    'arquivo': arquivo,
+                    'erro': str(e),
+                    'status': 'FALHA'
+                }
         
         return resultados
     
-    except Exception as e:
-        return {'erro_geral': str(e)}
+    def encerrar(self):
+        """Encerra o pool de processos"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+def analisar_arquivo_paralelo(nome_arquivo):
+    """
+    Analisa todas as abas de um arquivo Excel em paralelo.
+    
+    Args:
+        nome_arquivo (str): Caminho para o arquivo Excel
+        
+    Returns:
+        dict: Resultados da análise para cada colaborador
+    """
+    with AgendadorAnalise() as agendador:
+        return agendador.executar([nome_arquivo])[nome_arquivo]
 
 def gerar_relatorio_melhorias(resultados_julio, resultados_leandro):
     """
@@ -451,11 +520,12 @@ def main():
     arquivo_julio = "(JULIO) LISTAS INDIVIDUAIS.xlsx"
     arquivo_leandro = "(LEANDRO_ADRIANO) LISTAS INDIVIDUAIS.xlsx"
     
-    print(f"Analisando arquivo: {arquivo_julio}")
-    resultados_julio = analisar_arquivo_paralelo(arquivo_julio)
-    
-    print(f"Analisando arquivo: {arquivo_leandro}")
-    resultados_leandro = analisar_arquivo_paralelo(arquivo_leandro)
+    # Um único pool para as abas dos dois arquivos
+    print(f"Analisando arquivos: {arquivo_julio}, {arquivo_leandro}")
+    with AgendadorAnalise() as agendador:
+        resultados = agendador.executar([arquivo_julio, arquivo_leandro])
+    resultados_julio = resultados[arquivo_julio]
+    resultados_leandro = resultados[arquivo_leandro]
     
     # Gerar relatório de melhorias
     relatorio = gerar_relatorio_melhorias(resultados_julio, resultados_leandro)
@@ -1,16 +1,37 @@
 from flask import Flask, render_template, jsonify, request
 from auditoria_dados import AuditorDados
 from analise_360 import Analise360
+from snapshots_api import PublicadorSnapshots, AtualizadorSnapshots, BANCO_COALESCENCIA_PADRAO, versao_dados
+from coalescencia import Coalescedor
 import os
+import threading
 
 app = Flask(__name__)
 
 class DataAnalyticsSAAS:
-    def __init__(self):
+    # Seções servidas a partir de snapshots
+    SECOES = ['acordo', 'diario', 'geral']
+
+    def __init__(self, atualizar_em_segundo_plano=True):
         self.auditor = AuditorDados()
         self.analise360 = Analise360()
         self.setup_default_files()
         
+        # Os resultados das seções são recalculados em segundo plano quando as planilhas mudam
+        # e cada cálculo caro roda uma única vez entre threads e workers, com os demais aguardando
+        self.snapshots = PublicadorSnapshots()
+        self.coalescedor = Coalescedor(BANCO_COALESCENCIA_PADRAO)
+        self.atualizador = AtualizadorSnapshots(
+            self.arquivos,
+            {secao: (lambda secao=secao: self.calcular_secao(secao)) for secao in self.SECOES},
+            publicador=self.snapshots,
+            preparar=self.auditor.gerar_relatorio_auditoria,
+            ao_alterar=self.invalidar_arquivos,
+            coalescedor=self.coalescedor
+        )
+        if atualizar_em_segundo_plano:
+            self.atualizador.iniciar()
+        
     def setup_default_files(self):
         """Configura os arquivos padrão para análise"""
         self.arquivos = {
@@ -20,14 +41,61 @@ class DataAnalyticsSAAS:
         self.auditor.arquivos = self.arquivos
         self.analise360.configurar_arquivos(self.arquivos)
         
+    def invalidar_arquivos(self, alterados):
+        """Descarta os rankings em cache das planilhas alteradas"""
+        for caminho in alterados.values():
+            self.analise360.invalidar_ranking(caminho)
+    
     def get_section_data(self, section, filters=None):
-        """Obtém dados baseados na seção e filtros"""
+        """
+        Obtém os dados de uma seção a partir do snapshot mais recente
+        
+        Returns:
+            tuple: (dados da seção com a chave 'snapshot', snapshot publicado)
+        """
+        secao = section if section in self.SECOES else 'geral'
+        snapshot = self.snapshots.ler(secao)
+        if snapshot is None:
+            # Nenhum snapshot publicado ainda: calcular agora
+            self.atualizador.atualizar()
+            snapshot = self.snapshots.ler(secao)
+        if snapshot is None:
+            # Requisições idênticas para a mesma versão dos dados compartilham um único cálculo
+            filtros = {k: v for k, v in (filters or {}).items() if k != 'section'}
+            chave = ('secao', secao, filtros, versao_dados(self.arquivos.values()))
+            try:
+                return self.coalescedor.executar(chave, lambda: self.calcular_secao(secao, filters)), None
+            except RuntimeError as e:
+                return {'error': str(e)}, None
+        
+        dados = snapshot['dados']
+        if isinstance(dados, dict):
+            dados = dict(dados, snapshot={
+                'versao': snapshot['versao'],
+                'versao_dados': snapshot['versao_dados'],
+                'gerado_em': snapshot['gerado_em'],
+                'idade_segundos': round(self.snapshots.idade(snapshot), 3)
+            })
+        return dados, snapshot
+    
+    def calcular_secao(self, section, filters=None):
+        """
+        Calcula os dados de uma seção
+        
+        Raises:
+            RuntimeError: Se o cálculo falhou; o snapshot anterior da seção continua valendo
+                e o atualizador tenta de novo no próximo ciclo
+        """
         if section == 'acordo':
-            return self.get_acordo_data(filters)
+            dados = self.get_acordo_data(filters)
         elif section == 'diario':
-            return self.get_daily_report(filters)
+            dados = self.get_daily_report(filters)
         else:
-            return self.get_general_report(filters)
+            dados = self.get_general_report(filters)
+        
+        if isinstance(dados, dict) and 'error' in dados:
+            raise RuntimeError(dados['error'])
+        return dados
             
     def get_acordo_data(self, filters):
         """Obtém dados relacionados a acordos"""
@@ -77,8 +145,18 @@ class DataAnalyticsSAAS:
         except Exception as e:
             return {'error': str(e)}
 
-# Instância global do SAAS
-saas = DataAnalyticsSAAS()
+# Instância global do SAAS, criada na primeira requisição: importar o módulo (testes, o
+# processo de recarga do modo debug) não inicia o atualizador nem cria arquivos
+_saas = None
+_trava_saas = threading.Lock()
+
+def obter_saas():
+    """Retorna a instância global do SAAS, criando-a e iniciando o atualizador na primeira chamada"""
+    global _saas
+    with _trava_saas:
+        if _saas is None:
+            _saas = DataAnalyticsSAAS()
+    return _saas
 
 @app.route('/')
 def index():
@@ -88,7 +166,12 @@ def index():
 def get_data():
     filters = request.json
     section = filters.get('section', 'geral')
-    return jsonify(saas.get_section_data(section, filters))
+    dados, snapshot = obter_saas().get_section_data(section, filters)
+    resposta = jsonify(dados)
+    if snapshot:
+        resposta.headers['Age'] = str(int(PublicadorSnapshots.idade(snapshot)))
+        resposta.headers['X-Snapshot-Version'] = str(snapshot['versao'])
+    return resposta
 
 @app.route('/api/update_title/<section>')
 def update_title(section):
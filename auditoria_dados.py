@@ -6,6 +6,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 import os
 import warnings
+from cache_planilhas import listar_abas, ler_todas_abas
+from datas import converter_datas, estatisticas_datas
 warnings.filterwarnings('ignore')
 
 class AuditorDados:
@@ -21,12 +23,12 @@ class AuditorDados:
         if not os.path.exists(caminho):
             return False, f"Arquivo {nome_arquivo} não encontrado em {caminho}"
         try:
-            pd.read_excel(caminho, sheet_name=None)
+            listar_abas(caminho)
             return True, f"Arquivo {nome_arquivo} validado com sucesso"
         except Exception as e:
             return False, f"Erro ao ler arquivo {nome_arquivo}: {str(e)}"
     
-    def analisar_aba(self, df, nome_aba):
+    def analisar_aba(self, df, nome_aba, caminho=None):
         """Análise detalhada de uma aba específica"""
         analise = {
             'total_linhas': len(df),
@@ -42,10 +44,10 @@ class AuditorDados:
         
         # Validações específicas
         if 'Data' in df.columns:
-            try:
-                pd.to_datetime(df['Data'])
-            except:
-                analise['problemas_detectados'].append("Erro na conversão de datas")
+            converter_datas(df['Data'], chave=(nome_aba, 'Data'), arquivo=caminho)
+            invalidas = estatisticas_datas((nome_aba, 'Data'), caminho)['invalidas']
+            if invalidas:
+                analise['problemas_detectados'].append(f"Erro na conversão de datas: {invalidas} valores inválidos")
                 
         if 'Status' in df.columns:
             status_invalidos = df[~df['Status'].isin(['VERIFICADO', 'ANÁLISE', 'PENDENTE', 'PRIORIDADE', 
@@ -65,11 +67,11 @@ class AuditorDados:
             if self.relatorio_completo[nome]['status_arquivo'][0]:
                 try:
                     # Lê todas as abas
-                    excel_file = pd.read_excel(caminho, sheet_name=None)
+                    excel_file = ler_todas_abas(caminho)
                     self.relatorio_completo[nome]['abas'] = {}
                     
                     for aba_nome, df in excel_file.items():
-                        self.relatorio_completo[nome]['abas'][aba_nome] = self.analisar_aba(df, aba_nome)
+                        self.relatorio_completo[nome]['abas'][aba_nome] = self.analisar_aba(df, aba_nome, caminho)
                         
                 except Exception as e:
                     self.relatorio_completo[nome]['erro_analise'] = str(e)
@@ -0,0 +1,466 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cache de Planilhas
+==================
+Cache compartilhado das abas dos arquivos Excel. Cada aba interpretada é gravada
+em formato colunar (Feather / Arrow IPC) e reaproveitada por todos os módulos de
+análise, evitando que o openpyxl refaça o parse das mesmas planilhas a cada execução.
+
+Cada entrada é identificada pelo caminho do arquivo, tamanho, mtime e hash do conteúdo.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+try:
+    import fcntl
+except ImportError:
+    # Sem travas de arquivo (Windows): o manifesto ainda é mesclado antes de gravado
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_CACHE_PADRAO = os.environ.get('CACHE_PLANILHAS_DIR', '.cache_planilhas')
+VERSAO_MANIFESTO = 2
+
+# Hashes já calculados neste processo, indexados por (caminho, tamanho, mtime)
+_hashes_calculados = {}
+
+
+def _gravar_atomico(destino, gravar):
+    """
+    Grava um arquivo por meio de um temporário exclusivo deste processo e thread,
+    renomeado sobre o destino. Leitores (inclusive outros processos) nunca veem
+    um arquivo parcial, e gravações concorrentes não disputam o mesmo temporário.
+
+    Args:
+        destino (str): Caminho final
+        gravar (callable): Recebe o caminho temporário e grava o conteúdo nele
+    """
+    temporario = f'{destino}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        gravar(temporario)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def _mesmo_conteudo(anterior, atual):
+    """Indica se duas impressões digitais descrevem o mesmo conteúdo do mesmo arquivo"""
+    if anterior['caminho'] != atual['caminho']:
+        return False
+    if anterior.get('hash') and atual.get('hash'):
+        return anterior['hash'] == atual['hash']
+    return anterior['tamanho'] == atual['tamanho'] and anterior['mtime'] == atual['mtime']
+
+
+def calcular_hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """
+    Calcula o hash SHA-256 do conteúdo de um arquivo.
+
+    Args:
+        caminho (str): Caminho do arquivo
+        tamanho_bloco (int): Tamanho dos blocos lidos do disco
+
+    Returns:
+        str: Hash hexadecimal do conteúdo
+    """
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def impressao_digital(caminho, calcular_hash=True):
+    """
+    Retorna a impressão digital de um arquivo: caminho absoluto, tamanho, mtime e hash.
+
+    Args:
+        caminho (str): Caminho do arquivo
+        calcular_hash (bool): Se False, o hash só é preenchido quando já conhecido
+
+    Returns:
+        dict: Impressão digital do arquivo
+    """
+    caminho = os.path.abspath(caminho)
+    info = os.stat(caminho)
+    chave = (caminho, info.st_size, info.st_mtime_ns)
+
+    hash_conteudo = _hashes_calculados.get(chave)
+    if hash_conteudo is None and calcular_hash:
+        hash_conteudo = calcular_hash_arquivo(caminho)
+        _hashes_calculados[chave] = hash_conteudo
+
+    return {
+        'caminho': caminho,
+        'tamanho': info.st_size,
+        'mtime': info.st_mtime_ns,
+        'hash': hash_conteudo
+    }
+
+
+def _nome_seguro(texto):
+    """Gera um nome de arquivo estável para uma aba ou planilha"""
+    return hashlib.sha1(str(texto).encode('utf-8')).hexdigest()[:16]
+
+
+class CachePlanilhas:
+    """
+    Cache em disco das abas de arquivos Excel.
+
+    Para cada arquivo é mantido um manifesto com a impressão digital usada na
+    leitura e a lista de abas já gravadas. Quando tamanho e mtime coincidem com o
+    manifesto a entrada é usada diretamente; caso contrário o hash do conteúdo é
+    recalculado e a entrada só é descartada se o conteúdo de fato mudou.
+    """
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or DIRETORIO_CACHE_PADRAO
+        self._arquivos_abertos = {}
+
+    def _diretorio_arquivo(self, caminho):
+        return os.path.join(self.diretorio, _nome_seguro(os.path.abspath(caminho)))
+
+    def _caminho_manifesto(self, caminho):
+        return os.path.join(self._diretorio_arquivo(caminho), 'manifesto.json')
+
+    @contextmanager
+    def _trava_manifesto(self, caminho):
+        """Trava exclusiva entre processos sobre o manifesto de um arquivo"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self._diretorio_arquivo(caminho), 'manifesto.lock'), 'a') as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+    def _ler_manifesto(self, caminho):
+        try:
+            with open(self._caminho_manifesto(caminho), 'r', encoding='utf-8') as f:
+                manifesto = json.load(f)
+            if manifesto.get('versao') != VERSAO_MANIFESTO:
+                return None
+            return manifesto
+        except (OSError, ValueError):
+            return None
+
+    def _gravar_manifesto(self, caminho, manifesto):
+        diretorio = self._diretorio_arquivo(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+
+        def gravar(temporario):
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+        # Outros processos podem ter gravado abas desde a leitura deste manifesto:
+        # relê-lo sob a trava e preservar as entradas deles para o mesmo conteúdo
+        with self._trava_manifesto(caminho):
+            gravado = self._ler_manifesto(caminho)
+            if gravado and _mesmo_conteudo(gravado['impressao'], manifesto['impressao']):
+                for aba, entrada in gravado['entradas'].items():
+                    manifesto['entradas'].setdefault(aba, entrada)
+                if manifesto['abas'] is None:
+                    manifesto['abas'] = gravado['abas']
+            _gravar_atomico(self._caminho_manifesto(caminho), gravar)
+
+    def _manifesto_valido(self, caminho):
+        """
+        Retorna o manifesto do arquivo, descartando-o se o conteúdo mudou.
+
+        Args:
+            caminho (str): Caminho do arquivo Excel
+
+        Returns:
+            dict: Manifesto atualizado com a impressão digital corrente
+        """
+        atual = impressao_digital(caminho, calcular_hash=False)
+        manifesto = self._ler_manifesto(caminho)
+
+        if manifesto:
+            anterior = manifesto['impressao']
+            if (anterior['caminho'] == atual['caminho'] and
+                    anterior['tamanho'] == atual['tamanho'] and
+                    anterior['mtime'] == atual['mtime']):
+                return manifesto
+
+            # Tamanho ou mtime mudaram: confirmar pelo hash do conteúdo
+            atual = impressao_digital(caminho)
+            if anterior.get('hash') == atual['hash']:
+                manifesto['impressao'] = atual
+                self._gravar_manifesto(caminho, manifesto)
+                return manifesto
+
+            logger.info(f"Conteúdo alterado, invalidando cache de {caminho}")
+            self.invalidar(caminho)
+
+        atual = impressao_digital(caminho)
+        return {
+            'versao': VERSAO_MANIFESTO,
+            'impressao': atual,
+            'abas': None,
+            'entradas': {}
+        }
+
+    def _abrir_excel(self, caminho, impressao):
+        """Abre o arquivo Excel uma única vez por processo e impressão digital"""
+        chave = (impressao['caminho'], impressao['tamanho'], impressao['mtime'])
+        if chave not in self._arquivos_abertos:
+            self._arquivos_abertos[chave] = pd.ExcelFile(caminho)
+        return self._arquivos_abertos[chave]
+
+    def _gravar_aba(self, caminho, manifesto, aba, df):
+        """Grava uma aba em Feather; recorre a pickle quando o Arrow não suporta os tipos"""
+        diretorio = self._diretorio_arquivo(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+        base = os.path.join(diretorio, _nome_seguro(aba))
+
+        formato = None
+        if PYARROW_DISPONIVEL and all(isinstance(col, str) for col in df.columns):
+            try:
+                _gravar_atomico(base + '.feather', df.reset_index(drop=True).to_feather)
+                formato = 'feather'
+            except Exception as e:
+                logger.debug(f"Aba {aba} não pôde ser gravada em Feather: {str(e)}")
+
+        if formato is None:
+            _gravar_atomico(base + '.pkl', df.to_pickle)
+            formato = 'pickle'
+
+        manifesto['entradas'][aba] = {
+            'arquivo': os.path.basename(base) + ('.feather' if formato == 'feather' else '.pkl'),
+            'formato': formato,
+            'linhas': int(df.shape[0]),
+            'colunas': int(df.shape[1]),
+            'nomes_colunas': [str(col) for col in df.columns]
+        }
+
+    def _carregar_entrada(self, caminho, entrada, colunas=None):
+        arquivo = os.path.join(self._diretorio_arquivo(caminho), entrada['arquivo'])
+        # Colunas projetadas que a aba não tem são ignoradas, como na leitura do Excel
+        nomes = entrada.get('nomes_colunas')
+        if colunas is not None and nomes is not None:
+            colunas = [col for col in colunas if col in nomes]
+        if entrada['formato'] == 'feather' and nomes is not None:
+            return pd.read_feather(arquivo, columns=colunas)
+        df = pd.read_feather(arquivo) if entrada['formato'] == 'feather' else pd.read_pickle(arquivo)
+        if colunas is not None:
+            df = df[[col for col in colunas if col in df.columns]]
+        return df
+
+    def listar_abas(self, caminho):
+        """
+        Lista as abas de um arquivo Excel, usando o manifesto quando disponível.
+
+        Args:
+            caminho (str): Caminho do arquivo Excel
+
+        Returns:
+            list: Nomes das abas na ordem do arquivo
+        """
+        manifesto = self._manifesto_valido(caminho)
+        if manifesto['abas'] is None:
+            manifesto['abas'] = list(self._abrir_excel(caminho, manifesto['impressao']).sheet_names)
+            self._gravar_manifesto(caminho, manifesto)
+        return list(manifesto['abas'])
+
+    def ler_cabecalho(self, caminho, aba):
+        """
+        Retorna os nomes das colunas de uma aba sem carregar seus dados.
+
+        Args:
+            caminho (str): Caminho do arquivo Excel
+            aba (str): Nome da aba
+
+        Returns:
+            list: Nomes das colunas
+        """
+        manifesto = self._manifesto_valido(caminho)
+        entrada = manifesto['entradas'].get(aba)
+        if entrada and 'nomes_colunas' in entrada:
+            return list(entrada['nomes_colunas'])
+
+        excel_file = self._abrir_excel(caminho, manifesto['impressao'])
+        return [str(col) for col in pd.read_excel(excel_file, sheet_name=aba, nrows=0).columns]
+
+    def dimensoes_abas(self, caminho, abas=None):
+        """
+        Retorna o tamanho de cada aba sem interpretar os dados.
+
+        Usa o manifesto para as abas já gravadas e, para as demais, a dimensão
+        declarada nos metadados da planilha.
+
+        Args:
+            caminho (str): Caminho do arquivo Excel
+            abas (list, optional): Abas desejadas. Por padrão, todas
+
+        Returns:
+            dict: Nome da aba -> (linhas, colunas)
+        """
+        if abas is None:
+            abas = self.listar_abas(caminho)
+        manifesto = self._manifesto_valido(caminho)
+
+        dimensoes = {}
+        faltantes = []
+        for aba in abas:
+            entrada = manifesto['entradas'].get(aba)
+            if entrada:
+                dimensoes[aba] = (entrada['linhas'], entrada['colunas'])
+            else:
+                faltantes.append(aba)
+
+        if faltantes:
+            try:
+                workbook = load_workbook(caminho, read_only=True)
+                try:
+                    for aba in faltantes:
+                        planilha = workbook[aba]
+                        # Descontar a linha de cabeçalho, como nas entradas do manifesto
+                        linhas = max((planilha.max_row or 1) - 1, 0)
+                        dimensoes[aba] = (linhas, planilha.max_column or 0)
+                finally:
+                    workbook.close()
+            except Exception as e:
+                logger.debug(f"Dimensões indisponíveis em {caminho}: {str(e)}")
+                for aba in faltantes:
+                    dimensoes.setdefault(aba, (0, 0))
+
+        return {aba: dimensoes[aba] for aba in abas}
+
+    def ler_aba(self, caminho, aba, colunas=None):
+        """
+        Lê uma aba do arquivo Excel, interpretando-a apenas se não estiver no cache.
+
+        Args:
+            caminho (str): Caminho do arquivo Excel
+            aba (str): Nome da aba
+            colunas (list, optional): Subconjunto de colunas a carregar
+
+        Returns:
+            pandas.DataFrame: Dados da aba
+        """
+        manifesto = self._manifesto_valido(caminho)
+        entrada = manifesto['entradas'].get(aba)
+
+        if entrada:
+            try:
+                return self._carregar_entrada(caminho, entrada, colunas)
+            except Exception as e:
+                logger.warning(f"Entrada de cache corrompida para {aba}: {str(e)}")
+
+        excel_file = self._abrir_excel(caminho, manifesto['impressao'])
+        df = pd.read_excel(excel_file, sheet_name=aba)
+        if manifesto['abas'] is None:
+            manifesto['abas'] = list(excel_file.sheet_names)
+        self._gravar_aba(caminho, manifesto, aba, df)
+        self._gravar_manifesto(caminho, manifesto)
+
+        if colunas is not None:
+            df = df[[col for col in colunas if col in df.columns]]
+        return df
+
+    def ler_todas_abas(self, caminho, abas=None):
+        """
+        Lê várias abas de um arquivo, interpretando de uma só vez as que faltam no cache.
+
+        Args:
+            caminho (str): Caminho do arquivo Excel
+            abas (list, optional): Abas desejadas. Por padrão, todas
+
+        Returns:
+            dict: Mapeamento nome da aba -> DataFrame
+        """
+        if abas is None:
+            abas = self.listar_abas(caminho)
+
+        manifesto = self._manifesto_valido(caminho)
+
+        resultado = {}
+        faltantes = []
+        for aba in abas:
+            entrada = manifesto['entradas'].get(aba)
+            if entrada:
+                try:
+                    resultado[aba] = self._carregar_entrada(caminho, entrada)
+                    continue
+                except Exception as e:
+                    logger.warning(f"Entrada de cache corrompida para {aba}: {str(e)}")
+            faltantes.append(aba)
+
+        if faltantes:
+            excel_file = self._abrir_excel(caminho, manifesto['impressao'])
+            dados = pd.read_excel(excel_file, sheet_name=faltantes)
+            if manifesto['abas'] is None:
+                manifesto['abas'] = list(excel_file.sheet_names)
+            for aba, df in dados.items():
+                self._gravar_aba(caminho, manifesto, aba, df)
+                resultado[aba] = df
+            self._gravar_manifesto(caminho, manifesto)
+
+        return {aba: resultado[aba] for aba in abas}
+
+    def invalidar(self, caminho):
+        """Remove todas as entradas de cache de um arquivo"""
+        diretorio = self._diretorio_arquivo(caminho)
+        caminho_abs = os.path.abspath(caminho)
+        for chave in [c for c in self._arquivos_abertos if c[0] == caminho_abs]:
+            self._arquivos_abertos.pop(chave).close()
+        if os.path.isdir(diretorio):
+            for nome in os.listdir(diretorio):
+                if nome == 'manifesto.lock':
+                    # Pode estar travado por outro processo
+                    continue
+                try:
+                    os.remove(os.path.join(diretorio, nome))
+                except FileNotFoundError:
+                    # Temporário já renomeado ou removido por outro processo
+                    pass
+
+
+# Instância compartilhada por todos os módulos
+cache_padrao = CachePlanilhas()
+
+
+def listar_abas(caminho):
+    """Lista as abas de um arquivo Excel usando o cache compartilhado"""
+    return cache_padrao.listar_abas(caminho)
+
+
+def ler_cabecalho(caminho, aba):
+    """Retorna os nomes das colunas de uma aba usando o cache compartilhado"""
+    return cache_padrao.ler_cabecalho(caminho, aba)
+
+
+def dimensoes_abas(caminho, abas=None):
+    """Retorna o tamanho de cada aba usando o cache compartilhado"""
+    return cache_padrao.dimensoes_abas(caminho, abas)
+
+
+def ler_aba(caminho, aba, colunas=None):
+    """Lê uma aba de um arquivo Excel usando o cache compartilhado"""
+    return cache_padrao.ler_aba(caminho, aba, colunas)
+
+
+def ler_todas_abas(caminho, abas=None):
+    """Lê várias abas de um arquivo Excel usando o cache compartilhado"""
+    return cache_padrao.ler_todas_abas(caminho, abas)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cache de Ranking
+================
+Guarda o ranking gerado por Analise360.gerar_ranking, em memória e em disco, para
+que consultas repetidas não refaçam a análise das planilhas.
+
+A chave de cada entrada combina a impressão digital dos arquivos de origem
+(caminho, tamanho, mtime e hash, ver cache_planilhas.impressao_digital) com a
+configuração do score. Um arquivo alterado produz outra chave; ao gravar a nova
+entrada, as entradas geradas a partir do conteúdo anterior do mesmo arquivo são
+descartadas. `invalidar` remove explicitamente as entradas de um arquivo.
+
+As entradas em disco são arquivos JSON gravados de forma atômica e sobrevivem a
+reinícios do processo.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+
+from cache_planilhas import impressao_digital, DIRETORIO_CACHE_PADRAO
+
+logger = logging.getLogger(__name__)
+
+VERSAO_CACHE_RANKING = 1
+# Número de rankings mantidos em memória
+MAX_ENTRADAS_MEMORIA = 16
+
+
+class CacheRanking:
+    """
+    Cache de rankings em dois níveis: dicionário em memória e arquivos JSON em disco.
+    """
+
+    def __init__(self, diretorio=None, max_entradas_memoria=MAX_ENTRADAS_MEMORIA):
+        """
+        Args:
+            diretorio (str, optional): Diretório das entradas em disco. Por padrão,
+                o subdiretório 'ranking' do cache de planilhas
+            max_entradas_memoria (int): Rankings mantidos em memória
+        """
+        self.diretorio = diretorio or os.path.join(DIRETORIO_CACHE_PADRAO, 'ranking')
+        self.max_entradas_memoria = max_entradas_memoria
+        self._memoria = OrderedDict()
+
+    def impressoes(self, arquivos):
+        """Impressões digitais dos arquivos de origem, na ordem recebida"""
+        return [impressao_digital(arquivo) for arquivo in arquivos]
+
+    def chave(self, impressoes, configuracao):
+        """
+        Calcula a chave de um ranking.
+
+        Args:
+            impressoes (list): Impressões digitais dos arquivos de origem
+            configuracao (dict): Configuração do score (pesos, métricas usadas)
+
+        Returns:
+            str: Hash da combinação de impressões e configuração
+        """
+        conteudo = json.dumps({'versao': VERSAO_CACHE_RANKING, 'impressoes': impressoes,
+                               'configuracao': configuracao}, sort_keys=True, default=str)
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+    def _caminho_entrada(self, chave):
+        return os.path.join(self.diretorio, f'{chave}.json')
+
+    def _ler_entrada(self, caminho):
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                entrada = json.load(f)
+            if entrada.get('versao') != VERSAO_CACHE_RANKING:
+                return None
+            return entrada
+        except (OSError, ValueError):
+            return None
+
+    def _lembrar(self, chave, entrada):
+        self._memoria[chave] = entrada
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_entradas_memoria:
+            self._memoria.popitem(last=False)
+
+    def obter(self, chave):
+        """
+        Retorna o ranking guardado sob uma chave.
+
+        Returns:
+            pandas.DataFrame: Cópia do ranking, ou None se não estiver no cache
+        """
+        entrada = self._memoria.get(chave)
+        if entrada is None:
+            entrada = self._ler_entrada(self._caminho_entrada(chave))
+            if entrada is None:
+                return None
+            self._lembrar(chave, entrada)
+        else:
+            self._memoria.move_to_end(chave)
+
+        ranking = entrada['ranking']
+        return pd.DataFrame(ranking['data'], index=ranking['index'], columns=ranking['columns'])
+
+    def guardar(self, chave, ranking, impressoes):
+        """
+        Guarda um ranking e descarta as entradas geradas a partir de versões anteriores dos mesmos arquivos.
+
+        Args:
+            chave (str): Chave calculada por `chave`
+            ranking (pandas.DataFrame): Ranking gerado
+            impressoes (list): Impressões digitais usadas no cálculo da chave
+        """
+        entrada = {
+            'versao': VERSAO_CACHE_RANKING,
+            'criado_em': datetime.now().isoformat(),
+            'impressoes': impressoes,
+            'ranking': ranking.to_dict('split')
+        }
+        self._descartar(lambda anterior: _desatualizada(anterior, impressoes))
+        self._lembrar(chave, entrada)
+
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            temporario = self._caminho_entrada(chave) + '.tmp'
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(entrada, f, ensure_ascii=False, default=str)
+            os.replace(temporario, self._caminho_entrada(chave))
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o ranking em cache: {str(e)}")
+
+    def invalidar(self, caminho=None):
+        """
+        Remove as entradas geradas a partir de um arquivo.
+
+        Args:
+            caminho (str, optional): Arquivo de origem alterado. Se None, remove todas as entradas
+        """
+        if caminho is None:
+            self._descartar(lambda entrada: True)
+            return
+        caminho = os.path.abspath(caminho)
+        self._descartar(lambda entrada: any(i['caminho'] == caminho for i in entrada['impressoes']))
+
+    def _descartar(self, condicao):
+        """Remove da memória e do disco as entradas que satisfazem a condição"""
+        for chave in [c for c, entrada in self._memoria.items() if condicao(entrada)]:
+            del self._memoria[chave]
+
+        if not os.path.isdir(self.diretorio):
+            return
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith('.json'):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            entrada = self._ler_entrada(caminho)
+            if entrada is None or condicao(entrada):
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+
+
+def _desatualizada(entrada, impressoes):
+    """Indica se a entrada foi gerada a partir de outro conteúdo de algum dos arquivos"""
+    atuais = {i['caminho']: i for i in impressoes}
+    return any(i['caminho'] in atuais and i != atuais[i['caminho']] for i in entrada['impressoes'])
+
+
+# Instância compartilhada
+cache_ranking_padrao = CacheRanking()
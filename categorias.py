@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Categorias
+==========
+Dicionário único de categorias do projeto para as colunas de baixa cardinalidade:
+status, banco e colaborador. As colunas são entregues pela ingestão como
+pandas.Categorical com essas categorias, o que reduz a memória e faz com que
+value_counts, isin e groupby trabalhem sobre códigos inteiros.
+
+A ordem das categorias é fixa: valores ainda não vistos são acrescentados ao
+final, de modo que os códigos já atribuídos nunca mudam durante a execução.
+"""
+
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CATEGORIAS = {
+    'status': [
+        'PENDENTE', 'VERIFICADO', 'QUITADO', 'APROVADO', 'ANÁLISE', 'EM ANÁLISE',
+        'PRIORIDADE', 'PRIORIDADE TOTAL', 'CANCELADO', 'APREENDIDO', 'CONCLUÍDO'
+    ],
+    # Os bancos variam por carteira; entram na ordem em que aparecem
+    'banco': [],
+    'colaborador': [
+        'ANA LIDIA', 'FELIPE', 'JULIANE', 'MATHEUS', 'ANA GESSICA', 'POLIANA',
+        'IGOR', 'ELISANGELA', 'NUNO', 'THALISSON', 'VICTOR ADRIANO', 'VITORIA',
+        'LEANDRO', 'LUARA', 'ALINE SALVADOR', 'AMANDA SANTANA', 'BRUNO', 'EDIANE',
+        'FABIANA', 'GREICY', 'ITAYNNARA', 'IZABEL', 'JULIA', 'JULIANA', 'KATIA',
+        'MARIA BRUNA', 'MONYZA'
+    ]
+}
+
+
+class DicionarioCategorias:
+    """
+    Mantém as categorias de cada dicionário e os CategoricalDtype correspondentes.
+
+    O registro de valores e a reconstrução dos tipos são protegidos por uma trava:
+    a instância compartilhada é usada ao mesmo tempo pela thread de atualização e
+    pelas requisições, e um tipo montado antes de um registro concorrente
+    transformaria os valores novos em NaN.
+    """
+
+    def __init__(self, categorias=None):
+        """
+        Args:
+            categorias (dict, optional): Nome do dicionário -> categorias iniciais.
+                Por padrão, CATEGORIAS
+        """
+        categorias = CATEGORIAS if categorias is None else categorias
+        self.categorias = {nome: list(valores) for nome, valores in categorias.items()}
+        self._tipos = {}
+        self._trava = threading.RLock()
+
+    def tipo(self, nome):
+        """Retorna o CategoricalDtype atual de um dicionário"""
+        with self._trava:
+            if nome not in self._tipos:
+                self._tipos[nome] = pd.CategoricalDtype(self.categorias[nome])
+            return self._tipos[nome]
+
+    def registrar(self, nome, valores):
+        """
+        Acrescenta ao dicionário os valores ainda não vistos.
+
+        Args:
+            nome (str): Nome do dicionário
+            valores (iterable): Valores observados
+        """
+        with self._trava:
+            conhecidos = set(self.categorias[nome])
+            novos = [valor for valor in dict.fromkeys(valores) if valor not in conhecidos]
+            if novos:
+                logger.debug(f"Novas categorias em {nome}: {novos}")
+                self.categorias[nome].extend(novos)
+                self._tipos.pop(nome, None)
+
+    def categorizar(self, serie, nome):
+        """
+        Converte uma coluna para o tipo categórico do dicionário.
+
+        Args:
+            serie (pandas.Series): Valores da coluna
+            nome (str): Nome do dicionário
+
+        Returns:
+            pandas.Series: Coluna categórica com as categorias do projeto
+        """
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            if serie.dtype == self.tipo(nome):
+                return serie
+            valores = serie.cat.categories
+        else:
+            valores = pd.unique(serie.dropna())
+        self.registrar(nome, valores)
+        return serie.astype(self.tipo(nome))
+
+    def de_codigos(self, nome, codigos):
+        """Monta uma coluna categórica a partir dos códigos do dicionário"""
+        return pd.Categorical.from_codes(np.asarray(codigos), dtype=self.tipo(nome))
+
+    def codigo(self, nome, valor):
+        """Retorna o código de um valor, registrando-o se necessário"""
+        with self._trava:
+            self.registrar(nome, [valor])
+            return self.categorias[nome].index(valor)
+
+
+# Instância compartilhada por todos os módulos
+dicionario_padrao = DicionarioCategorias()
+
+
+def categorizar(serie, nome):
+    """Converte uma coluna para o tipo categórico do dicionário compartilhado"""
+    return dicionario_padrao.categorizar(serie, nome)
+
+
+def contar(serie):
+    """
+    Conta as ocorrências de cada valor, como value_counts, sem as categorias ausentes.
+
+    Args:
+        serie (pandas.Series): Coluna categórica ou comum
+
+    Returns:
+        pandas.Series: Contagem por valor, em ordem decrescente, indexada pelos próprios valores
+    """
+    contagem = serie.value_counts()
+    contagem = contagem[contagem > 0]
+    if isinstance(contagem.index, pd.CategoricalIndex):
+        contagem.index = contagem.index.astype(object)
+    return contagem
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Coalescência de Cálculos
+========================
+Garante que um cálculo caro identificado por uma chave rode uma única vez, mesmo
+quando várias requisições idênticas chegam ao mesmo tempo.
+
+Dentro de um processo, a primeira thread a pedir uma chave executa o cálculo e as
+demais aguardam e recebem o mesmo resultado (ou a mesma exceção). Entre processos
+(ex.: workers do gunicorn), a execução é protegida por um arrendamento em uma
+tabela SQLite: só o processo que detém o arrendamento da chave calcula, e os
+outros aguardam sua liberação. O resultado pode ser gravado no mesmo banco, em
+JSON, para que os processos que aguardavam o leiam em vez de recalcular.
+
+O arrendamento expira após um prazo, de modo que um processo encerrado no meio do
+cálculo não bloqueia os demais indefinidamente.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Prazo (segundos) após o qual um arrendamento abandonado pode ser assumido por outro processo
+DURACAO_ARRENDAMENTO_PADRAO = 600.0
+# Intervalo (segundos) entre verificações de quem aguarda outro processo
+INTERVALO_ESPERA_PADRAO = 0.2
+# Tempo (segundos) durante o qual um resultado compartilhado é reaproveitado
+VALIDADE_RESULTADO_PADRAO = 60.0
+
+
+def _para_json(valor):
+    """Converte escalares numpy para tipos nativos e os demais tipos desconhecidos para texto"""
+    if hasattr(valor, 'item'):
+        try:
+            return valor.item()
+        except (TypeError, ValueError):
+            pass
+    return str(valor)
+
+
+def normalizar_chave(chave):
+    """Representação textual estável de uma chave (tuplas, listas e dicionários aninhados)"""
+    return json.dumps(chave, sort_keys=True, ensure_ascii=False, default=_para_json)
+
+
+class ArrendamentoSQLite:
+    """
+    Arrendamentos e resultados compartilhados entre processos em um banco SQLite.
+    """
+
+    def __init__(self, caminho, duracao=DURACAO_ARRENDAMENTO_PADRAO, validade_resultado=VALIDADE_RESULTADO_PADRAO):
+        """
+        Args:
+            caminho (str): Arquivo do banco, compartilhado pelos processos
+            duracao (float): Segundos até um arrendamento expirar
+            validade_resultado (float): Segundos durante os quais um resultado gravado é reaproveitado
+        """
+        self.caminho = caminho
+        self.duracao = duracao
+        self.validade_resultado = validade_resultado
+        self.dono = f"{os.getpid()}:{uuid.uuid4().hex}"
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(diretorio, exist_ok=True)
+        with self._conectar() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS arrendamentos (
+                    chave TEXT PRIMARY KEY,
+                    dono TEXT NOT NULL,
+                    expira_em REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS resultados (
+                    chave TEXT PRIMARY KEY,
+                    valor TEXT NOT NULL,
+                    criado_em REAL NOT NULL
+                )
+            ''')
+
+    def _conectar(self):
+        # Uma conexão por operação: o objeto é usado por várias threads
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def _dono_thread(self):
+        return f"{self.dono}:{threading.get_ident()}"
+
+    def adquirir(self, chave):
+        """
+        Tenta obter o arrendamento de uma chave.
+
+        Returns:
+            bool: True se o arrendamento foi obtido (livre ou expirado)
+        """
+        agora = time.time()
+        conn = self._conectar()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            linha = conn.execute('SELECT expira_em FROM arrendamentos WHERE chave = ?', (chave,)).fetchone()
+            if linha is not None and linha[0] > agora:
+                conn.rollback()
+                return False
+            conn.execute('INSERT OR REPLACE INTO arrendamentos (chave, dono, expira_em) VALUES (?, ?, ?)',
+                         (chave, self._dono_thread(), agora + self.duracao))
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def liberar(self, chave):
+        """Libera o arrendamento de uma chave, se ainda pertencer a esta thread"""
+        with self._conectar() as conn:
+            conn.execute('DELETE FROM arrendamentos WHERE chave = ? AND dono = ?', (chave, self._dono_thread()))
+
+    def gravar_resultado(self, chave, valor):
+        """
+        Grava o resultado de uma chave e descarta os resultados vencidos.
+
+        Returns:
+            O valor como será lido pelos demais processos (após a conversão para JSON)
+        """
+        texto = json.dumps(valor, ensure_ascii=False, default=_para_json)
+        agora = time.time()
+        with self._conectar() as conn:
+            conn.execute('DELETE FROM resultados WHERE criado_em < ?', (agora - self.validade_resultado,))
+            conn.execute('INSERT OR REPLACE INTO resultados (chave, valor, criado_em) VALUES (?, ?, ?)',
+                         (chave, texto, agora))
+        return json.loads(texto)
+
+    def ler_resultado(self, chave):
+        """
+        Lê o resultado gravado para uma chave.
+
+        Returns:
+            tuple: (encontrado, valor)
+        """
+        with self._conectar() as conn:
+            linha = conn.execute('SELECT valor FROM resultados WHERE chave = ? AND criado_em >= ?',
+                                 (chave, time.time() - self.validade_resultado)).fetchone()
+        if linha is None:
+            return False, None
+        return True, json.loads(linha[0])
+
+
+class _Chamada:
+    """Cálculo em andamento em uma thread, aguardado pelas demais"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class Coalescedor:
+    """
+    Executa cada chave uma única vez entre as threads do processo e, com um banco
+    SQLite, entre processos.
+    """
+
+    def __init__(self, caminho_banco=None, duracao_arrendamento=DURACAO_ARRENDAMENTO_PADRAO,
+                 intervalo_espera=INTERVALO_ESPERA_PADRAO, validade_resultado=VALIDADE_RESULTADO_PADRAO):
+        """
+        Args:
+            caminho_banco (str, optional): Banco SQLite compartilhado entre processos. Se None,
+                a coalescência vale apenas entre as threads deste processo
+            duracao_arrendamento (float): Segundos até um arrendamento abandonado expirar
+            intervalo_espera (float): Segundos entre verificações ao aguardar outro processo
+            validade_resultado (float): Segundos durante os quais um resultado compartilhado é reaproveitado
+        """
+        self.arrendamento = (ArrendamentoSQLite(caminho_banco, duracao_arrendamento, validade_resultado)
+                             if caminho_banco else None)
+        self.intervalo_espera = intervalo_espera
+        self._trava = threading.Lock()
+        self._em_andamento = {}
+
+    def executar(self, chave, funcao, compartilhar_resultado=True):
+        """
+        Executa `funcao` ou aguarda a execução em andamento da mesma chave.
+
+        Args:
+            chave: Identificação do cálculo (ex.: seção, filtros e versão dos dados)
+            funcao (callable): Cálculo, sem argumentos
+            compartilhar_resultado (bool): Grava o resultado para os outros processos. Se False,
+                quem aguardava outro processo executa `funcao` depois dele, que deve então
+                encontrar o trabalho já feito
+
+        Returns:
+            Resultado do cálculo (com o banco compartilhado e compartilhar_resultado, já convertido
+            para tipos JSON)
+        """
+        chave = normalizar_chave(chave)
+        with self._trava:
+            chamada = self._em_andamento.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._em_andamento[chave] = _Chamada()
+
+        if not lider:
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = self._executar_entre_processos(chave, funcao, compartilhar_resultado)
+            return chamada.resultado
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._trava:
+                del self._em_andamento[chave]
+            chamada.evento.set()
+
+    def _executar_entre_processos(self, chave, funcao, compartilhar_resultado):
+        if self.arrendamento is None:
+            return funcao()
+
+        while True:
+            if compartilhar_resultado:
+                encontrado, valor = self.arrendamento.ler_resultado(chave)
+                if encontrado:
+                    return valor
+            if self.arrendamento.adquirir(chave):
+                try:
+                    valor = funcao()
+                    if compartilhar_resultado:
+                        valor = self.arrendamento.gravar_resultado(chave, valor)
+                    return valor
+                finally:
+                    self.arrendamento.liberar(chave)
+            logger.debug(f"Aguardando outro processo calcular {chave}")
+            time.sleep(self.intervalo_espera)
@@ -6,8 +6,13 @@ import seaborn as sns
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
-from collections import defaultdict, Counter
+from collections import defaultdict
 import streamlit as st
+from cache_planilhas import listar_abas
+from esquema_colunas import carregar_aba
+from datas import converter_datas
+from categorias import contar
+from transicoes import analisar_transicoes
 
 # Configuração da página
 st.set_page_config(
@@ -20,32 +25,22 @@ st.set_page_config(
 st.title("Dashboard Interativo de Colaboradores")
 st.write(f"Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
 
-# Função para normalizar nomes das colunas
-def normalizar_coluna(coluna):
-    coluna = str(coluna).strip().upper()
-    mapeamento = {
-        'SITUAÇÂO': 'SITUACAO',
-        'SITUAÇÃO': 'SITUACAO',
-    }
-    return mapeamento.get(coluna, coluna)
-
 # Função para carregar dados
 @st.cache_data
 def carregar_dados(arquivo):
     try:
-        # Carregar todas as abas do arquivo Excel
-        xls = pd.ExcelFile(arquivo)
+        # Listar as abas do arquivo Excel
+        abas = listar_abas(arquivo)
         
         # Filtrar abas válidas (excluir abas de teste ou relatório geral)
-        abas_validas = [aba for aba in xls.sheet_names if aba not in ["", "TESTE", "RELATÓRIO GERAL"]]
+        abas_validas = [aba for aba in abas if aba not in ["", "TESTE", "RELATÓRIO GERAL"]]
         
         dados_colaboradores = {}
         for aba in abas_validas:
-            # Carregar dados da aba
-            df = pd.read_excel(arquivo, sheet_name=aba)
-            
-            # Normalizar nomes das colunas
-            df.columns = [normalizar_coluna(col) for col in df.columns]
+            # Carregar apenas SITUACAO e as colunas de data, com nomes lógicos. Cabeçalhos como
+            # 'DATA RESOLUÇÃO' passam a se chamar RESOLUCAO e são pedidos explicitamente
+            df = carregar_aba(arquivo, aba, colunas=['SITUACAO', 'RESOLUCAO'], contendo=['DATA'],
+                              converter_tipos=False)
             
             # Armazenar dados do colaborador
             dados_colaboradores[aba] = df
@@ -56,7 +51,7 @@ def carregar_dados(arquivo):
         return {}, []
 
 # Função para analisar dados de um colaborador
-def analisar_colaborador(df, nome_colaborador):
+def analisar_colaborador(df, nome_colaborador, arquivo=None):
     if df is None or len(df) == 0:
         st.warning(f"Não há dados para o colaborador {nome_colaborador}")
         return {}
@@ -71,7 +66,7 @@ def analisar_colaborador(df, nome_colaborador):
     valores_nao_padronizados = []
     
     if 'SITUACAO' in df.columns:
-        situacao_counts = df['SITUACAO'].value_counts().to_dict()
+        situacao_counts = contar(df['SITUACAO']).to_dict()
         situacao_percentual = {k: v/total_registros*100 for k, v in situacao_counts.items()}
         
         # Valores vazios
@@ -84,11 +79,11 @@ def analisar_colaborador(df, nome_colaborador):
     
     # Análise temporal
     analise_temporal = {}
-    colunas_data = [col for col in df.columns if 'DATA' in col]
+    colunas_data = [col for col in df.columns if 'DATA' in col or col == 'RESOLUCAO']
     
     for col_data in colunas_data:
         try:
-            df[col_data] = pd.to_datetime(df[col_data], errors='coerce')
+            df[col_data] = converter_datas(df[col_data], chave=(nome_colaborador, col_data), arquivo=arquivo)
             datas_validas = df[col_data].dropna()
             
             if len(datas_validas) > 0:
@@ -100,30 +95,13 @@ def analisar_colaborador(df, nome_colaborador):
                 }
                 
                 # Análise de transições se houver SITUACAO
-                transicoes = []
+                contagem_transicoes = {}
                 tempos_por_situacao = {}
                 
                 if 'SITUACAO' in df.columns:
-                    df_ordenado = df.sort_values(by=col_data)
-                    
-                    # Verificar transições de estado
-                    situacao_anterior = None
-                    
-                    for idx, row in df_ordenado.iterrows():
-                        situacao_atual = row['SITUACAO']
-                        if pd.notna(situacao_anterior) and pd.notna(situacao_atual) and situacao_anterior != situacao_atual:
-                            transicoes.append((situacao_anterior, situacao_atual))
-                        situacao_anterior = situacao_atual
-                    
-                    # Contar transições
-                    contagem_transicoes = Counter(transicoes)
-                    
-                    # Tempo médio em cada situação
-                    df_ordenado['data_anterior'] = df_ordenado[col_data].shift(1)
-                    df_ordenado['tempo_no_estado'] = (df_ordenado[col_data] - df_ordenado['data_anterior']).dt.days
-                    
-                    # Calcular tempo médio por situação
-                    tempos_por_situacao = df_ordenado.groupby('SITUACAO')['tempo_no_estado'].mean().to_dict()
+                    transicoes = analisar_transicoes(df, col_data)
+                    contagem_transicoes = transicoes['contagem']
+                    tempos_por_situacao = transicoes['tempos_medios']
                 
                 analise_temporal[col_data] = {
                     'periodo': periodo,
@@ -333,14 +311,14 @@ if opcao_visualizacao == "Colaborador Específico":
         colaborador = st.sidebar.selectbox("Selecione o Colaborador", colaboradores_julio)
         if colaborador:
             df = dados_julio.get(colaborador)
-            analise = analisar_colaborador(df, colaborador)
+            analise = analisar_colaborador(df, colaborador, arquivo_julio)
             exibir_dashboard_colaborador(analise, "Grupo Julio")
             todas_analises["Grupo Julio"][colaborador] = analise
     else:
         colaborador = st.sidebar.selectbox("Selecione o Colaborador", colaboradores_leandro)
         if colaborador:
             df = dados_leandro.get(colaborador)
-            analise = analisar_colaborador(df, colaborador)
+            analise = analisar_colaborador(df, colaborador, arquivo_leandro)
             exibir_dashboard_colaborador(analise, "Grupo Leandro")
             todas_analises["Grupo Leandro"][colaborador] = analise
 
@@ -352,7 +330,7 @@ elif opcao_visualizacao == "Todos os Colaboradores":
         st.header("Grupo Julio")
         for colaborador in colaboradores_julio:
             df = dados_julio.get(colaborador)
-            analise = analisar_colaborador(df, colaborador)
+            analise = analisar_colaborador(df, colaborador, arquivo_julio)
             exibir_dashboard_colaborador(analise, "Grupo Julio")
             todas_analises["Grupo Julio"][colaborador] = analise
             st.markdown("---")
@@ -361,7 +339,7 @@ elif opcao_visualizacao == "Todos os Colaboradores":
         st.header("Grupo Leandro")
         for colaborador in colaboradores_leandro:
             df = dados_leandro.get(colaborador)
-            analise = analisar_colaborador(df, colaborador)
+            analise = analisar_colaborador(df, colaborador, arquivo_leandro)
             exibir_dashboard_colaborador(analise, "Grupo Leandro")
             todas_analises["Grupo Leandro"][colaborador] = analise
             st.markdown("---")
@@ -371,12 +349,12 @@ elif opcao_visualizacao == "Comparação entre Colaboradores":
     # Analisar todos os colaboradores
     for colaborador in colaboradores_julio:
         df = dados_julio.get(colaborador)
-        analise = analisar_colaborador(df, colaborador)
+        analise = analisar_colaborador(df, colaborador, arquivo_julio)
         todas_analises["Grupo Julio"][colaborador] = analise
     
     for colaborador in colaboradores_leandro:
         df = dados_leandro.get(colaborador)
-        analise = analisar_colaborador(df, colaborador)
+        analise = analisar_colaborador(df, colaborador, arquivo_leandro)
         todas_analises["Grupo Leandro"][colaborador] = analise
     
     # Exibir comparação
@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+from cache_planilhas import listar_abas, ler_aba
 
 # Configuração da página
 st.set_page_config(page_title="Dashboard de Atividades", layout="wide", initial_sidebar_state="expanded")
@@ -19,12 +20,12 @@ def get_data():
         st.write("Arquivos encontrados:", os.listdir(base_path))
         
         # Ler planilha do Julio
-        df_julio = pd.read_excel(planilha_julio)
+        df_julio = ler_aba(planilha_julio, listar_abas(planilha_julio)[0])
         df_julio['Grupo'] = 'JULIO'
         st.success("Planilha do Julio carregada com sucesso!")
         
         # Ler planilha do Leandro
-        df_leandro = pd.read_excel(planilha_leandro)
+        df_leandro = ler_aba(planilha_leandro, listar_abas(planilha_leandro)[0])
         df_leandro['Grupo'] = 'LEANDRO'
         st.success("Planilha do Leandro carregada com sucesso!")
         
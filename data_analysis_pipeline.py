@@ -11,6 +11,7 @@ This module orchestrates the entire data workflow from raw Excel files to intera
 import os
 import json
 import logging
+import argparse
 from datetime import datetime
 import pandas as pd
 import numpy as np
@@ -25,6 +26,9 @@ from plotly.subplots import make_subplots
 from analise_avancada import AnalisadorAvancado
 from debug_excel import AnalisadorExcel
 from database_manager import DatabaseManager
+from ingestao_incremental import IngestaoIncremental
+from monitor_planilhas import MonitorPlanilhas
+from grupos import RegistroGrupos
 
 # Configure logging
 logging.basicConfig(
@@ -53,8 +57,10 @@ class DataAnalysisPipeline:
         """
         self.config = self._load_config(config_file)
         self.db_manager = DatabaseManager('analise_historica.db')
-        self.analisador = AnalisadorAvancado()
+        self.analisador = AnalisadorAvancado(RegistroGrupos.de_config(self.config["groups"]))
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Id of the metrics run stored by the last _store_results
+        self.run_id = None
         
         # Create output directories if they don't exist
         os.makedirs('output/reports', exist_ok=True)
@@ -70,8 +76,12 @@ class DataAnalysisPipeline:
                 "julio": "(JULIO) LISTAS INDIVIDUAIS.xlsx",
                 "leandro": "(LEANDRO_ADRIANO) LISTAS INDIVIDUAIS.xlsx"
             },
+            # Group name -> {"rotulo", "colaboradores"}; empty keeps the default groups
+            "groups": {},
             "analysis_settings": {
                 "store_history": True,
+                # Also keep each analysis as a JSON blob next to its child tables
+                "store_history_blob": False,
                 "history_limit": 10,
                 "generate_predictions": True,
                 "confidence_threshold": 0.7
@@ -81,6 +91,18 @@ class DataAnalysisPipeline:
                 "color_palette": "Set1",
                 "include_annotations": True
             },
+            "incremental_settings": {
+                "enabled": False,
+                "state_file": "output/data/marcas_dagua.json",
+                "hash_rows": 50
+            },
+            "staging_settings": {
+                "enabled": False
+            },
+            "watch_settings": {
+                "interval": 5.0,
+                "debounce": 3.0
+            },
             "output_settings": {
                 "dashboard_filename": "dashboard_atividades.html",
                 "save_intermediate_data": True,
@@ -138,16 +160,15 @@ class DataAnalysisPipeline:
         """Extract data from source Excel files."""
         logger.info("Extracting data from Excel files")
         
+        if self.config["incremental_settings"]["enabled"]:
+            self._extract_data_incremental()
+            return
+        
         try:
-            # Process Julio's group data
-            julio_file = self.config["input_files"]["julio"]
-            logger.info(f"Processing {julio_file}")
-            self.analisador.analisar_arquivo(julio_file)
-            
-            # Process Leandro's group data
-            leandro_file = self.config["input_files"]["leandro"]
-            logger.info(f"Processing {leandro_file}")
-            self.analisador.analisar_arquivo(leandro_file)
+            # Process each group's file
+            for arquivo in self.config["input_files"].values():
+                logger.info(f"Processing {arquivo}")
+                self.analisador.analisar_arquivo(arquivo)
             
             # Save extracted data if configured
             if self.config["output_settings"]["save_intermediate_data"]:
@@ -159,6 +180,86 @@ class DataAnalysisPipeline:
             logger.error(f"Data extraction failed: {str(e)}")
             raise
     
+    def _extract_data_incremental(self, input_files=None):
+        """
+        Extract data processing only the rows appended since the last run.
+        
+        Each sheet keeps a watermark (row count and hash of the last rows) next to its
+        aggregated state. Sheets whose prefix changed are recomputed from scratch.
+        
+        Args:
+            input_files (dict, optional): Group -> file to process. Defaults to all input files
+        """
+        settings = self.config["incremental_settings"]
+        ingestao = IngestaoIncremental(settings["state_file"], linhas_hash=settings["hash_rows"])
+        
+        try:
+            for grupo, arquivo in (input_files or self.config["input_files"]).items():
+                logger.info(f"Incrementally processing {arquivo}")
+                modos = self.analisador.analisar_arquivo_incremental(arquivo, ingestao)
+                for aba, modo in modos.items():
+                    logger.info(f"{grupo}/{aba}: {modo}")
+            
+            ingestao.salvar()
+            
+            if self.config["output_settings"]["save_intermediate_data"]:
+                self._save_intermediate_data("extracted")
+            
+            logger.info("Incremental data extraction completed")
+            
+        except Exception as e:
+            logger.error(f"Incremental data extraction failed: {str(e)}")
+            raise
+    
+    def refresh(self, changed_files):
+        """
+        Incrementally re-ingest the changed input files and rebuild the results.
+        
+        Metrics of the files that did not change are kept from the previous run.
+        
+        Args:
+            changed_files (dict): Group -> path of the files that changed
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        logger.info(f"Refreshing results for {', '.join(changed_files)}")
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        try:
+            self._extract_data_incremental(changed_files)
+            self._transform_data()
+            self._analyze_data()
+            self._generate_visualizations()
+            self._store_results()
+            self._generate_reports()
+            
+            logger.info("Refresh completed successfully")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Refresh failed: {str(e)}")
+            return False
+    
+    def watch(self, max_cycles=None):
+        """
+        Watch the input files and refresh the results whenever one of them is saved.
+        
+        The first poll processes every input file; afterwards only files whose
+        content hash changed are re-ingested.
+        
+        Args:
+            max_cycles (int, optional): Number of polls before returning. Runs until interrupted if None
+        """
+        settings = self.config["watch_settings"]
+        monitor = MonitorPlanilhas(
+            self.config["input_files"],
+            self.refresh,
+            intervalo=settings["interval"],
+            espera_estabilidade=settings["debounce"]
+        )
+        monitor.executar(max_ciclos=max_cycles)
+    
     def _transform_data(self):
         """Transform and clean the extracted data."""
         logger.info("Transforming and cleaning data")
@@ -224,29 +325,45 @@ class DataAnalysisPipeline:
         logger.info("Storing results in database")
         
         try:
-            # Store summary metrics for Julio's group
-            for colaborador, metricas in self.analisador.metricas_julio.items():
-                if metricas:
-                    self.db_manager.store_metrics(
-                        colaborador=colaborador,
-                        grupo="Julio",
-                        data=datetime.now(),
-                        total_registros=metricas.get('total_registros', 0),
-                        taxa_eficiencia=metricas.get('taxa_eficiencia', 0),
-                        tendencia=metricas.get('tendencia', {}).get('direcao', 'estável')
-                    )
+            # Store summary metrics for every group as one run: one transaction, one timestamp
+            run_date = datetime.now()
+            self.run_id = self.db_manager.store_metrics_batch([
+                {
+                    'colaborador': colaborador,
+                    'grupo': self.analisador.grupos.rotulo(grupo),
+                    'total_registros': metricas.get('total_registros', 0),
+                    'taxa_eficiencia': metricas.get('taxa_eficiencia', 0),
+                    'tendencia': metricas.get('tendencia', {}).get('direcao', 'estável')
+                }
+                for grupo, metricas_grupo in self.analisador.metricas_por_grupo.items()
+                for colaborador, metricas in metricas_grupo.items()
+                if metricas
+            ], data=run_date)
+            if self.run_id is None:
+                # The batch was rolled back: fail the run so the workbook is processed again
+                raise RuntimeError("Metrics batch was not stored")
             
-            # Store summary metrics for Leandro's group
-            for colaborador, metricas in self.analisador.metricas_leandro.items():
-                if metricas:
-                    self.db_manager.store_metrics(
-                        colaborador=colaborador,
-                        grupo="Leandro",
-                        data=datetime.now(),
-                        total_registros=metricas.get('total_registros', 0),
-                        taxa_eficiencia=metricas.get('taxa_eficiencia', 0),
-                        tendencia=metricas.get('tendencia', {}).get('direcao', 'estável')
+            # Store each group's full analysis, decomposed into the history child tables
+            settings = self.config["analysis_settings"]
+            if settings["store_history"]:
+                for grupo, metricas_grupo in self.analisador.metricas_por_grupo.items():
+                    metricas_validas = {colaborador: metricas for colaborador, metricas in metricas_grupo.items() if metricas}
+                    if not metricas_validas:
+                        continue
+                    analise_id = self.db_manager.store_analysis_history(
+                        run_date,
+                        self.analisador.grupos.rotulo(grupo),
+                        metricas_validas,
+                        run_id=self.run_id,
+                        store_blob=settings["store_history_blob"]
                     )
+                    if analise_id is None:
+                        raise RuntimeError(f"Analysis history of group {grupo} was not stored")
+            
+            # Copy spreadsheet rows into the registros staging table
+            if self.config["staging_settings"]["enabled"]:
+                for grupo, arquivo in self.config["input_files"].items():
+                    self.db_manager.load_raw_records(arquivo, grupo=grupo.capitalize())
             
             logger.info("Results stored in database")
             
@@ -263,18 +380,15 @@ class DataAnalysisPipeline:
             report_data = {
                 "timestamp": datetime.now().isoformat(),
                 "summary": {
-                    "julio": {
-                        "total_colaboradores": len(self.analisador.metricas_julio),
-                        "total_registros": sum(m.get('total_registros', 0) for m in self.analisador.metricas_julio.values() if m)
-                    },
-                    "leandro": {
-                        "total_colaboradores": len(self.analisador.metricas_leandro),
-                        "total_registros": sum(m.get('total_registros', 0) for m in self.analisador.metricas_leandro.values() if m)
+                    grupo.lower(): {
+                        "total_colaboradores": len(metricas),
+                        "total_registros": sum(m.get('total_registros', 0) for m in metricas.values() if m)
                     }
+                    for grupo, metricas in self.analisador.metricas_por_grupo.items()
                 },
                 "detalhes": {
-                    "julio": {colab: metrics for colab, metrics in self.analisador.metricas_julio.items() if metrics},
-                    "leandro": {colab: metrics for colab, metrics in self.analisador.metricas_leandro.items() if metrics}
+                    grupo.lower(): {colab: metrics for colab, metrics in metricas.items() if metrics}
+                    for grupo, metricas in self.analisador.metricas_por_grupo.items()
                 }
             }
             
@@ -296,8 +410,8 @@ class DataAnalysisPipeline:
             data = {
                 "stage": stage,
                 "timestamp": datetime.now().isoformat(),
-                "metricas_julio": {k: v for k, v in self.analisador.metricas_julio.items() if v},
-                "metricas_leandro": {k: v for k, v in self.analisador.metricas_leandro.items() if v}
+                **{f"metricas_{grupo.lower()}": {k: v for k, v in metricas.items() if v}
+                   for grupo, metricas in self.analisador.metricas_por_grupo.items()}
             }
             
             with open(filename, 'w', encoding='utf-8') as f:
@@ -309,8 +423,19 @@ class DataAnalysisPipeline:
             logger.warning(f"Failed to save intermediate data: {str(e)}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Data analysis pipeline")
+    parser.add_argument("--config", help="Path to a JSON configuration file")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and refresh the results whenever an input file changes")
+    args = parser.parse_args()
+    
+    pipeline = DataAnalysisPipeline(args.config)
+    
+    if args.watch:
+        pipeline.watch()
+        raise SystemExit(0)
+    
     # Run the pipeline
-    pipeline = DataAnalysisPipeline()
     success = pipeline.run_pipeline()
     
     if success:
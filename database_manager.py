@@ -6,15 +6,513 @@ Database Manager
 ===============
 Handles all database operations for storing and retrieving analysis results.
 Provides a clean interface for data persistence across analysis runs.
+
+Connections are lent one per thread from a pool and opened in WAL mode, so
+dashboard readers never block pipeline writers and request paths do not pay
+per-call connection setup.
 """
 
+import os
+import re
 import sqlite3
 import logging
+import hashlib
 import json
+import threading
+import weakref
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 
+import pandas as pd
+
+from cache_planilhas import listar_abas, impressao_digital
+from esquema_colunas import carregar_aba
+
 logger = logging.getLogger(__name__)
 
+# Sheets that do not belong to a collaborator
+NON_COLLABORATOR_SHEETS = ["", "TESTE", "RELATÓRIO GERAL"]
+
+# Logical column (esquema_colunas) -> column of the registros staging table
+RAW_RECORD_COLUMNS = {
+    'DATA': 'data',
+    'SITUACAO': 'situacao',
+    'RESOLUCAO': 'resolucao',
+    'ÚLTIMO PAGAMENTO': 'ultimo_pagamento',
+    'BANCO': 'banco',
+    'NEGOCIACAO': 'negociacao',
+    'ANALISE': 'analise'
+}
+
+# Pragmas applied to every pooled connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',      # readers and the writer do not block each other
+    'synchronous': 'NORMAL',    # safe with WAL; fsync only at checkpoints
+    'mmap_size': 268435456,     # 256 MiB of memory-mapped I/O
+    'cache_size': -65536,       # 64 MiB page cache (negative = KiB)
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON'
+}
+
+# Seconds a connection waits for a lock before failing
+SQLITE_TIMEOUT = 30.0
+
+# Connections of finished threads kept for reuse by new threads
+MAX_IDLE_CONNECTIONS = 8
+
+
+def _migration_baseline(cursor):
+    """Version 1: tables used before schema versions were recorded."""
+    # Create metrics table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS metricas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        colaborador TEXT NOT NULL,
+        grupo TEXT NOT NULL,
+        data TIMESTAMP NOT NULL,
+        total_registros INTEGER NOT NULL,
+        taxa_eficiencia REAL NOT NULL,
+        tendencia TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    # Create analysis_history table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analise_historica (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data TIMESTAMP NOT NULL,
+        grupo TEXT NOT NULL,
+        metricas TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    # Create raw staging table: one row per spreadsheet row
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS registros (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        arquivo TEXT NOT NULL,
+        grupo TEXT,
+        colaborador TEXT NOT NULL,
+        linha INTEGER NOT NULL,
+        data TEXT,
+        situacao TEXT,
+        resolucao TEXT,
+        ultimo_pagamento TEXT,
+        banco TEXT,
+        negociacao TEXT,
+        analise TEXT
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_registros_colaborador_data ON registros (colaborador, data)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_registros_situacao ON registros (situacao)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_registros_arquivo ON registros (arquivo, colaborador)
+    ''')
+    
+    # Create load control table: hashes of the last load of each sheet
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS cargas_registros (
+        arquivo TEXT NOT NULL,
+        colaborador TEXT NOT NULL,
+        hash_arquivo TEXT NOT NULL,
+        hash_aba TEXT NOT NULL,
+        linhas INTEGER NOT NULL,
+        loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (arquivo, colaborador)
+    )
+    ''')
+    
+    # Create configuration table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS configuracoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chave TEXT UNIQUE NOT NULL,
+        valor TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _migration_runs(cursor):
+    """Version 2: pipeline runs and the run id of each metrics row."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS execucoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data TIMESTAMP NOT NULL,
+        total_metricas INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(metricas)")}
+    if 'execucao_id' not in columns:
+        cursor.execute("ALTER TABLE metricas ADD COLUMN execucao_id INTEGER REFERENCES execucoes (id)")
+
+
+def _migration_metrics_indexes(cursor):
+    """Version 3: indexes for the metricas history queries."""
+    # get_efficiency_trend: colaborador + date range, covering taxa_eficiencia.
+    # Also serves get_metrics_history filtered by colaborador, ordered by data
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_metricas_colaborador_data
+    ON metricas (colaborador, data, taxa_eficiencia)
+    ''')
+    # get_metrics_history filtered by grupo, ordered by data
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_metricas_grupo_data ON metricas (grupo, data)
+    ''')
+    # get_metrics_history without filters or by date only
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_metricas_data ON metricas (data)
+    ''')
+    # get_group_comparison: GROUP BY grupo read entirely from the index
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_metricas_grupo_totais
+    ON metricas (grupo, taxa_eficiencia, total_registros)
+    ''')
+    # Rows of one run
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_metricas_execucao ON metricas (execucao_id)
+    ''')
+
+
+# Partitions of the group summary: (nivel, expression of the partition key over a metricas row).
+# 'total' holds one row per group; 'dia' one per group and day; 'execucao' one per group and run
+SUMMARY_LEVELS = [
+    ('total', "''"),
+    ('dia', "substr({row}.data, 1, 10)"),
+    ('execucao', "{row}.execucao_id"),
+]
+
+
+def _summary_upsert(level, key, row, sign):
+    """SQL adding (sign=+1) or removing (sign=-1) one metricas row from a summary partition."""
+    key = key.format(row=row)
+    return f'''
+        INSERT INTO resumo_grupos (nivel, chave, grupo, registros, soma_eficiencia, soma_registros)
+        SELECT '{level}', {key}, {row}.grupo, {sign}, {sign} * {row}.taxa_eficiencia, {sign} * {row}.total_registros
+        WHERE {key} IS NOT NULL
+        ON CONFLICT (nivel, chave, grupo) DO UPDATE SET
+            registros = registros + excluded.registros,
+            soma_eficiencia = soma_eficiencia + excluded.soma_eficiencia,
+            soma_registros = soma_registros + excluded.soma_registros;
+    '''
+
+
+def _migration_group_summary(cursor):
+    """Version 4: per-group summary of metricas, kept up to date by triggers."""
+    # chave has no type affinity: '' for 'total', 'YYYY-MM-DD' for 'dia', the run id for 'execucao'
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS resumo_grupos (
+        nivel TEXT NOT NULL,
+        chave,
+        grupo TEXT NOT NULL,
+        registros INTEGER NOT NULL,
+        soma_eficiencia REAL NOT NULL,
+        soma_registros INTEGER NOT NULL,
+        PRIMARY KEY (nivel, chave, grupo)
+    )
+    ''')
+    
+    add_new = ''.join(_summary_upsert(level, key, 'NEW', 1) for level, key in SUMMARY_LEVELS)
+    remove_old = ''.join(_summary_upsert(level, key, 'OLD', -1) for level, key in SUMMARY_LEVELS)
+    drop_empty = "DELETE FROM resumo_grupos WHERE registros = 0;"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_metricas_resumo_insert AFTER INSERT ON metricas "
+                   f"BEGIN {add_new} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_metricas_resumo_delete AFTER DELETE ON metricas "
+                   f"BEGIN {remove_old} {drop_empty} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_metricas_resumo_update "
+                   f"AFTER UPDATE OF grupo, data, taxa_eficiencia, total_registros, execucao_id ON metricas "
+                   f"BEGIN {remove_old} {add_new} {drop_empty} END")
+    
+    # Summarize the history stored before the triggers existed
+    cursor.execute("DELETE FROM resumo_grupos")
+    for level, key in SUMMARY_LEVELS:
+        key = key.format(row='metricas')
+        cursor.execute(f'''
+        INSERT INTO resumo_grupos (nivel, chave, grupo, registros, soma_eficiencia, soma_registros)
+        SELECT '{level}', {key}, grupo, COUNT(*), SUM(taxa_eficiencia), SUM(total_registros)
+        FROM metricas
+        WHERE {key} IS NOT NULL
+        GROUP BY {key}, grupo
+        ''')
+
+
+# Child tables of analise_historica: table -> columns after analise_id
+ANALYSIS_CHILD_COLUMNS = {
+    'analise_status': ['colaborador', 'status', 'quantidade'],
+    'analise_diaria': ['colaborador', 'dia', 'status', 'quantidade'],
+    'analise_colaboradores': ['colaborador', 'total_registros', 'taxa_eficiencia', 'direcao', 'r2'],
+}
+
+
+def _analysis_child_rows(analise_id, metricas):
+    """
+    Decompose the collaborator -> metrics dict of an analysis into child table rows.
+    
+    Args:
+        analise_id (int): analise_historica id
+        metricas (dict): Collaborator -> metrics (distribuicao_status, analise_diaria,
+            tendencia, total_registros, taxa_eficiencia); other values are ignored
+    
+    Returns:
+        dict: Child table -> list of row tuples
+    """
+    rows = {table: [] for table in ANALYSIS_CHILD_COLUMNS}
+    for colaborador, dados in metricas.items():
+        if not isinstance(dados, dict):
+            continue
+        for status, quantidade in (dados.get('distribuicao_status') or {}).items():
+            rows['analise_status'].append((analise_id, colaborador, status, int(quantidade)))
+        for dia, contagens in (dados.get('analise_diaria') or {}).items():
+            for status, quantidade in contagens.items():
+                rows['analise_diaria'].append((analise_id, colaborador, dia, status, int(quantidade)))
+        tendencia = dados.get('tendencia') or {}
+        if not isinstance(tendencia, dict):
+            tendencia = {'direcao': tendencia}
+        rows['analise_colaboradores'].append((
+            analise_id, colaborador, dados.get('total_registros'), dados.get('taxa_eficiencia'),
+            tendencia.get('direcao'), tendencia.get('r2')
+        ))
+    return rows
+
+
+def _insert_analysis_children(cursor, analise_id, metricas):
+    """Insert the child rows of one analysis with one executemany per table."""
+    for table, rows in _analysis_child_rows(analise_id, metricas).items():
+        columns = ['analise_id'] + ANALYSIS_CHILD_COLUMNS[table]
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})", rows
+        )
+
+
+def _migration_analysis_tables(cursor):
+    """Version 5: analise_historica decomposed into child tables; the JSON blob becomes optional."""
+    # Rebuild analise_historica: metricas loses NOT NULL and each entry may point to its run
+    cursor.execute('''
+    CREATE TABLE analise_historica_nova (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data TIMESTAMP NOT NULL,
+        grupo TEXT NOT NULL,
+        metricas TEXT,
+        execucao_id INTEGER REFERENCES execucoes (id),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute('''
+    INSERT INTO analise_historica_nova (id, data, grupo, metricas, created_at)
+    SELECT id, data, grupo, metricas, created_at FROM analise_historica
+    ''')
+    cursor.execute("DROP TABLE analise_historica")
+    cursor.execute("ALTER TABLE analise_historica_nova RENAME TO analise_historica")
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_analise_historica_grupo_data ON analise_historica (grupo, data)
+    ''')
+    
+    # Status counts of each collaborator
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analise_status (
+        analise_id INTEGER NOT NULL REFERENCES analise_historica (id) ON DELETE CASCADE,
+        colaborador TEXT NOT NULL,
+        status TEXT NOT NULL,
+        quantidade INTEGER NOT NULL,
+        PRIMARY KEY (analise_id, colaborador, status)
+    )
+    ''')
+    # Counts of each collaborator per day and status
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analise_diaria (
+        analise_id INTEGER NOT NULL REFERENCES analise_historica (id) ON DELETE CASCADE,
+        colaborador TEXT NOT NULL,
+        dia TEXT NOT NULL,
+        status TEXT NOT NULL,
+        quantidade INTEGER NOT NULL,
+        PRIMARY KEY (analise_id, colaborador, dia, status)
+    )
+    ''')
+    # Totals and trend fit of each collaborator
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analise_colaboradores (
+        analise_id INTEGER NOT NULL REFERENCES analise_historica (id) ON DELETE CASCADE,
+        colaborador TEXT NOT NULL,
+        total_registros INTEGER,
+        taxa_eficiencia REAL,
+        direcao TEXT,
+        r2 REAL,
+        PRIMARY KEY (analise_id, colaborador)
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_analise_status_colaborador ON analise_status (colaborador, analise_id)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_analise_diaria_colaborador ON analise_diaria (colaborador, analise_id, dia)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_analise_colaboradores_colaborador ON analise_colaboradores (colaborador, analise_id)
+    ''')
+    
+    # Decompose the blobs stored so far
+    for analise_id, metricas in cursor.execute("SELECT id, metricas FROM analise_historica").fetchall():
+        try:
+            metricas = json.loads(metricas) if metricas else {}
+        except ValueError:
+            continue
+        if isinstance(metricas, dict):
+            _insert_analysis_children(cursor, analise_id, metricas)
+
+
+# Schema migrations: (version, description, function applied to a cursor).
+# Append new migrations at the end; never edit an applied one
+MIGRATIONS = [
+    (1, "baseline schema", _migration_baseline),
+    (2, "pipeline runs", _migration_runs),
+    (3, "metricas history indexes", _migration_metrics_indexes),
+    (4, "group summary", _migration_group_summary),
+    (5, "analise_historica child tables", _migration_analysis_tables),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Efficiency of one collaborator since a relative date, e.g. '-30 days'
+EFFICIENCY_TREND_QUERY = '''
+SELECT data, taxa_eficiencia
+FROM metricas
+WHERE colaborador = ?
+AND data >= date('now', ?)
+ORDER BY data ASC
+'''
+
+
+class _Lease:
+    """A pooled connection lent to one thread; collected together with the thread's locals."""
+    
+    __slots__ = ('conn', 'generation', '__weakref__')
+    
+    def __init__(self, conn, generation):
+        self.conn = conn
+        self.generation = generation
+
+
+class ConnectionPool:
+    """
+    SQLite connections lent one per thread.
+    
+    A thread keeps its connection for as long as it lives. When the thread ends,
+    its lease is collected with the thread's locals and the connection returns
+    to a bounded queue of idle connections, which the next new thread reuses, so
+    thread-per-request servers neither leak connections nor open one per request.
+    """
+    
+    def __init__(self, db_path, pragmas=None, timeout=SQLITE_TIMEOUT, max_idle=MAX_IDLE_CONNECTIONS):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file
+            pragmas (dict, optional): Pragmas applied to each new connection. Defaults to SQLITE_PRAGMAS
+            timeout (float): Seconds to wait for a lock held by another connection
+            max_idle (int): Idle connections kept for reuse; extra ones are closed
+        """
+        self.db_path = db_path
+        self.pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+        self.timeout = timeout
+        self.max_idle = max_idle
+        # Reentrant: a lease may be collected (and released) while this thread holds the lock
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._idle = []
+        self._leases = weakref.WeakSet()
+        self._generation = 0
+        # Connections inherited through fork: kept referenced so the child never closes them
+        self._inherited = []
+        _pools.add(self)
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}").fetchall()
+        return conn
+    
+    def connection(self):
+        """Return the connection of the calling thread."""
+        lease = getattr(self._local, 'lease', None)
+        if lease is None or lease.generation != self._generation:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+                generation = self._generation
+            lease = _Lease(conn or self._connect(), generation)
+            weakref.finalize(lease, self._release, lease.conn, generation)
+            with self._lock:
+                self._leases.add(lease)
+            self._local.lease = lease
+        return lease.conn
+    
+    def _release(self, conn, generation):
+        """Return the connection of a finished thread to the idle queue."""
+        with self._lock:
+            if generation != self._generation:
+                # Closed by close() or inherited through fork: no longer ours to reuse
+                return
+            if conn.in_transaction:
+                conn.rollback()
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Yield the thread connection inside a transaction: committed on success,
+        rolled back on error.
+        """
+        conn = self.connection()
+        with conn:
+            yield conn
+    
+    def close(self):
+        """Close the idle connections and those lent to live threads."""
+        with self._lock:
+            self._generation += 1
+            connections = self._idle + [lease.conn for lease in list(self._leases)]
+            self._idle = []
+            self._leases = weakref.WeakSet()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    
+    def _after_fork(self):
+        """In a forked child, drop the parent's connections without closing them."""
+        # New generation first: leases collected below must not return to the idle queue
+        self._generation += 1
+        self._lock = threading.RLock()
+        self._inherited.extend(self._idle)
+        self._inherited.extend(lease.conn for lease in list(self._leases))
+        self._idle = []
+        self._leases = weakref.WeakSet()
+        self._local = threading.local()
+
+
+# Live pools, reset in forked children (e.g. gunicorn workers)
+_pools = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for pool in list(_pools):
+        pool._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
 class DatabaseManager:
     """
     Manages database operations for the analytics system.
@@ -29,57 +527,71 @@ class DatabaseManager:
             db_path (str): Path to the SQLite database file
         """
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
         self._initialize_db()
     
+    def close(self):
+        """Close the pooled connections."""
+        self.pool.close()
+    
     def _initialize_db(self):
-        """Create the database schema if it doesn't exist."""
+        """
+        Create the database schema or bring it up to SCHEMA_VERSION.
+        
+        Pending migrations run in order inside one immediate transaction, so
+        concurrent processes opening the same file apply each migration once.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Create metrics table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS metricas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                colaborador TEXT NOT NULL,
-                grupo TEXT NOT NULL,
-                data TIMESTAMP NOT NULL,
-                total_registros INTEGER NOT NULL,
-                taxa_eficiencia REAL NOT NULL,
-                tendencia TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            # Create analysis_history table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analise_historica (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data TIMESTAMP NOT NULL,
-                grupo TEXT NOT NULL,
-                metricas TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            # Create configuration table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS configuracoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chave TEXT UNIQUE NOT NULL,
-                valor TEXT NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+            conn = self.pool.connection()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute('''
+                CREATE TABLE IF NOT EXISTS versoes_esquema (
+                    versao INTEGER PRIMARY KEY,
+                    descricao TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                ''')
+                current = conn.execute("SELECT COALESCE(MAX(versao), 0) FROM versoes_esquema").fetchone()[0]
+                
+                for version, description, migrate in MIGRATIONS:
+                    if version <= current:
+                        continue
+                    migrate(conn.cursor())
+                    conn.execute(
+                        "INSERT INTO versoes_esquema (versao, descricao) VALUES (?, ?)", (version, description)
+                    )
+                    logger.info(f"Schema migrated to version {version}: {description}")
             
-            conn.commit()
             logger.info("Database initialized successfully")
             
         except Exception as e:
             logger.error(f"Database initialization failed: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
+    
+    def schema_version(self):
+        """
+        Return the schema version recorded in the database.
+        
+        Returns:
+            int: Last applied migration, 0 if none
+        """
+        return self.pool.connection().execute(
+            "SELECT COALESCE(MAX(versao), 0) FROM versoes_esquema"
+        ).fetchone()[0]
+    
+    def query_plan(self, query, params=()):
+        """
+        Return the EXPLAIN QUERY PLAN details of a query.
+        
+        Args:
+            query (str): SQL query
+            params (tuple, optional): Query parameters
+        
+        Returns:
+            list: One detail string per plan step
+        """
+        cursor = self.pool.connection().execute(f"EXPLAIN QUERY PLAN {query}", params)
+        return [row[-1] for row in cursor.fetchall()]
     
     def store_metrics(self, colaborador, grupo, data, total_registros, taxa_eficiencia, tendencia):
         """
@@ -96,103 +608,422 @@ class DatabaseManager:
         Returns:
             bool: True if successful, False otherwise
         """
+        return self.store_metrics_batch([{
+            'colaborador': colaborador,
+            'grupo': grupo,
+            'total_registros': total_registros,
+            'taxa_eficiencia': taxa_eficiencia,
+            'tendencia': tendencia
+        }], data=data) is not None
+    
+    def store_metrics_batch(self, metrics, data=None):
+        """
+        Store the metrics of many collaborators as one pipeline run.
+        
+        Every row is written with a single executemany inside one transaction
+        and shares the run timestamp and run id.
+        
+        Args:
+            metrics (iterable): Dicts with colaborador, grupo, total_registros,
+                taxa_eficiencia and tendencia. A 'data' key overrides the run
+                timestamp for that row (e.g. when backfilling history)
+            data (datetime, optional): Run timestamp. Defaults to now
+        
+        Returns:
+            int: Run id (execucoes.id), or None if nothing was stored
+        """
+        data = data or datetime.now()
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            rows = [(
+                m['colaborador'],
+                m['grupo'],
+                m.get('data', data).isoformat(),
+                m.get('total_registros', 0),
+                m.get('taxa_eficiencia', 0),
+                m.get('tendencia', 'estável')
+            ) for m in metrics]
             
-            cursor.execute('''
-            INSERT INTO metricas (colaborador, grupo, data, total_registros, taxa_eficiencia, tendencia)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ''', (colaborador, grupo, data.isoformat(), total_registros, taxa_eficiencia, tendencia))
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                INSERT INTO execucoes (data, total_metricas) VALUES (?, ?)
+                ''', (data.isoformat(), len(rows)))
+                run_id = cursor.lastrowid
+                
+                cursor.executemany('''
+                INSERT INTO metricas (colaborador, grupo, data, total_registros, taxa_eficiencia, tendencia, execucao_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (row + (run_id,) for row in rows))
             
-            conn.commit()
-            logger.info(f"Metrics stored for {colaborador} in group {grupo}")
-            return True
+            logger.info(f"Metrics stored for {len(rows)} collaborators (run {run_id})")
+            return run_id
             
         except Exception as e:
             logger.error(f"Failed to store metrics: {str(e)}")
-            return False
-        finally:
-            if conn:
-                conn.close()
+            return None
     
-    def store_analysis_history(self, data, grupo, metricas):
+    def store_analysis_history(self, data, grupo, metricas, run_id=None, store_blob=True):
         """
         Store a complete analysis history entry.
         
+        The per-collaborator status counts, daily counts and trend fits are
+        written to the analise_status, analise_diaria and analise_colaboradores
+        child tables in the same transaction.
+        
         Args:
             data (datetime): Date of the analysis
             grupo (str): Group name
-            metricas (dict): Metrics data
+            metricas (dict): Metrics data, collaborator -> metrics
+            run_id (int, optional): Pipeline run (execucoes.id) of the analysis
+            store_blob (bool): Also keep the whole dict as JSON in analise_historica.metricas
         
         Returns:
-            bool: True if successful, False otherwise
+            int: Id of the analise_historica entry, or None on failure
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+                
+                # Convert metrics to JSON string
+                metricas_json = json.dumps(metricas, ensure_ascii=False) if store_blob else None
+                
+                cursor.execute('''
+                INSERT INTO analise_historica (data, grupo, metricas, execucao_id)
+                VALUES (?, ?, ?, ?)
+                ''', (data.isoformat(), grupo, metricas_json, run_id))
+                analise_id = cursor.lastrowid
+                _insert_analysis_children(cursor, analise_id, metricas)
             
-            # Convert metrics to JSON string
-            metricas_json = json.dumps(metricas, ensure_ascii=False)
-            
-            cursor.execute('''
-            INSERT INTO analise_historica (data, grupo, metricas)
-            VALUES (?, ?, ?)
-            ''', (data.isoformat(), grupo, metricas_json))
-            
-            conn.commit()
             logger.info(f"Analysis history stored for group {grupo}")
-            return True
+            return analise_id
             
         except Exception as e:
             logger.error(f"Failed to store analysis history: {str(e)}")
-            return False
-        finally:
-            if conn:
-                conn.close()
+            return None
     
-    def get_metrics_history(self, colaborador=None, grupo=None, start_date=None, end_date=None, limit=10):
+    def get_analysis_trends(self, colaborador=None, grupo=None, limit=10):
         """
-        Retrieve metrics history with optional filters.
+        Retrieve the stored totals and trend fits of collaborators, newest analysis first.
         
         Args:
             colaborador (str, optional): Filter by collaborator name
             grupo (str, optional): Filter by group name
-            start_date (datetime, optional): Start date for filtering
-            end_date (datetime, optional): End date for filtering
             limit (int, optional): Maximum number of records to return
         
         Returns:
-            list: List of metrics records
+            list: Dicts with analise_id, data, grupo, colaborador, total_registros,
+                taxa_eficiencia, direcao and r2
+        """
+        query = '''
+        SELECT h.id AS analise_id, h.data, h.grupo, c.colaborador, c.total_registros,
+               c.taxa_eficiencia, c.direcao, c.r2
+        FROM analise_colaboradores c
+        JOIN analise_historica h ON h.id = c.analise_id
+        WHERE 1=1
+        '''
+        params = []
+        if colaborador:
+            query += " AND c.colaborador = ?"
+            params.append(colaborador)
+        if grupo:
+            query += " AND h.grupo = ?"
+            params.append(grupo)
+        query += " ORDER BY h.data DESC, c.colaborador LIMIT ?"
+        params.append(limit)
+        
+        try:
+            cursor = self.pool.connection().cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve analysis trends: {str(e)}")
+            return []
+    
+    def get_analysis_status_counts(self, colaborador):
+        """
+        Get the status counts of a collaborator in the latest analysis that includes them.
+        
+        Args:
+            colaborador (str): Collaborator name
+        
+        Returns:
+            dict: Status -> count
+        """
+        try:
+            cursor = self.pool.connection().execute('''
+            SELECT status, quantidade
+            FROM analise_status
+            WHERE colaborador = ?
+            AND analise_id = (SELECT MAX(analise_id) FROM analise_status WHERE colaborador = ?)
+            ORDER BY status
+            ''', (colaborador, colaborador))
+            return dict(cursor.fetchall())
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve analysis status counts: {str(e)}")
+            return {}
+    
+    def get_analysis_daily_counts(self, colaborador, start_date=None, end_date=None):
+        """
+        Get the daily counts of a collaborator from the latest analysis that includes them.
+        
+        Args:
+            colaborador (str): Collaborator name
+            start_date (datetime, optional): First day included
+            end_date (datetime, optional): Last day included
+        
+        Returns:
+            dict: Day ('YYYY-MM-DD') -> {status: count}
+        """
+        query = '''
+        SELECT dia, status, quantidade
+        FROM analise_diaria
+        WHERE colaborador = ?
+        AND analise_id = (SELECT MAX(analise_id) FROM analise_diaria WHERE colaborador = ?)
+        '''
+        params = [colaborador, colaborador]
+        if start_date:
+            query += " AND dia >= ?"
+            params.append(start_date.strftime('%Y-%m-%d'))
+        if end_date:
+            query += " AND dia <= ?"
+            params.append(end_date.strftime('%Y-%m-%d'))
+        query += " ORDER BY dia, status"
+        
+        try:
+            counts = {}
+            for dia, status, quantidade in self.pool.connection().execute(query, params):
+                counts.setdefault(dia, {})[status] = quantidade
+            return counts
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve analysis daily counts: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def _raw_records_frame(df):
+        """
+        Convert a sheet loaded with logical column names into staging table rows.
+        
+        Args:
+            df (pandas.DataFrame): Sheet data from esquema_colunas.carregar_aba
+        
+        Returns:
+            pandas.DataFrame: Object columns in table order, None for missing values
+        """
+        frame = pd.DataFrame(index=df.index)
+        # Excel row number: header on row 1
+        frame['linha'] = df.index + 2
+        for logical, column in RAW_RECORD_COLUMNS.items():
+            if logical not in df.columns:
+                frame[column] = None
+            elif pd.api.types.is_datetime64_any_dtype(df[logical]):
+                frame[column] = df[logical].dt.strftime('%Y-%m-%d')
+            else:
+                values = df[logical].astype(object)
+                frame[column] = values.where(values.isna(), values.astype(str))
+        frame = frame.astype(object)
+        return frame.where(frame.notna(), None)
+    
+    def load_raw_records(self, file_path, grupo=None, sheets=None):
+        """
+        Copy every collaborator row of a workbook into the registros staging table.
+        
+        Sheets are skipped without being read when the workbook hash matches the
+        last load, and skipped after reading when the sheet content hash matches.
+        Changed sheets are replaced, and rows of sheets that no longer exist in the
+        workbook are deleted, inside a single transaction per workbook.
+        
+        Args:
+            file_path (str): Path to the Excel workbook
+            grupo (str, optional): Group name. Defaults to the name in parentheses
+                at the start of the file name, e.g. "(JULIO) LISTAS INDIVIDUAIS.xlsx"
+            sheets (list, optional): Sheets to load. Defaults to all collaborator sheets
+        
+        Returns:
+            dict: Sheet name -> {'status': 'loaded' | 'unchanged' | 'removed', 'rows': int}
+        
+        Raises:
+            Exception: If the load fails; the transaction is rolled back and nothing is stored
+        """
+        arquivo = os.path.abspath(file_path)
+        if grupo is None:
+            match = re.match(r'\(([^)]+)\)', os.path.basename(file_path))
+            grupo = match.group(1) if match else None
+        workbook_sheets = listar_abas(file_path)
+        if sheets is None:
+            sheets = [aba for aba in workbook_sheets if aba not in NON_COLLABORATOR_SHEETS]
+        
+        hash_arquivo = impressao_digital(file_path)['hash']
+        columns = ['arquivo', 'grupo', 'colaborador', 'linha'] + list(RAW_RECORD_COLUMNS.values())
+        insert_sql = (
+            f"INSERT INTO registros ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        
+        result = {}
+        try:
+            conn = self.pool.connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT colaborador, hash_arquivo, hash_aba, linhas FROM cargas_registros WHERE arquivo = ?",
+                (arquivo,)
+            )
+            previous = {row[0]: row[1:] for row in cursor.fetchall()}
+            
+            with conn:
+                for aba in sheets:
+                    last = previous.get(aba)
+                    if last and last[0] == hash_arquivo:
+                        result[aba] = {'status': 'unchanged', 'rows': last[2]}
+                        continue
+                    
+                    df = carregar_aba(file_path, aba, colunas=list(RAW_RECORD_COLUMNS))
+                    frame = self._raw_records_frame(df)
+                    hash_aba = hashlib.sha256(
+                        pd.util.hash_pandas_object(frame, index=False).values.tobytes()
+                    ).hexdigest()
+                    
+                    if not (last and last[1] == hash_aba):
+                        cursor.execute(
+                            "DELETE FROM registros WHERE arquivo = ? AND colaborador = ?", (arquivo, aba)
+                        )
+                        cursor.executemany(insert_sql, (
+                            (arquivo, grupo, aba) + row
+                            for row in frame.itertuples(index=False, name=None)
+                        ))
+                        result[aba] = {'status': 'loaded', 'rows': len(frame)}
+                    else:
+                        result[aba] = {'status': 'unchanged', 'rows': len(frame)}
+                    
+                    cursor.execute('''
+                    INSERT OR REPLACE INTO cargas_registros (arquivo, colaborador, hash_arquivo, hash_aba, linhas, loaded_at)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ''', (arquivo, aba, hash_arquivo, hash_aba, len(frame)))
+                
+                # Sheets deleted from the workbook since the last load
+                for aba in set(previous) - set(workbook_sheets):
+                    cursor.execute(
+                        "DELETE FROM registros WHERE arquivo = ? AND colaborador = ?", (arquivo, aba)
+                    )
+                    cursor.execute(
+                        "DELETE FROM cargas_registros WHERE arquivo = ? AND colaborador = ?", (arquivo, aba)
+                    )
+                    result[aba] = {'status': 'removed', 'rows': previous[aba][2]}
+            
+            counts = Counter(r['status'] for r in result.values())
+            logger.info(f"Raw records of {file_path}: {counts['loaded']} sheets loaded, "
+                        f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Failed to load raw records: {str(e)}")
+            raise
+    
+    def get_raw_records(self, colaborador=None, situacao=None, start_date=None, end_date=None, limit=1000):
+        """
+        Retrieve staged spreadsheet rows with optional filters.
+        
+        Args:
+            colaborador (str, optional): Filter by collaborator (sheet) name
+            situacao (str, optional): Filter by status
+            start_date (datetime, optional): Start date for filtering on DATA
+            end_date (datetime, optional): End date for filtering on DATA
+            limit (int, optional): Maximum number of records to return
+        
+        Returns:
+            list: List of raw records
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+            conn = self.pool.connection()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
-            query = "SELECT * FROM metricas WHERE 1=1"
+            query = "SELECT * FROM registros WHERE 1=1"
             params = []
             
             if colaborador:
                 query += " AND colaborador = ?"
                 params.append(colaborador)
             
-            if grupo:
-                query += " AND grupo = ?"
-                params.append(grupo)
+            if situacao:
+                query += " AND situacao = ?"
+                params.append(situacao)
             
             if start_date:
                 query += " AND data >= ?"
-                params.append(start_date.isoformat())
+                params.append(start_date.strftime('%Y-%m-%d'))
             
             if end_date:
                 query += " AND data <= ?"
-                params.append(end_date.isoformat())
+                params.append(end_date.strftime('%Y-%m-%d'))
             
-            query += " ORDER BY data DESC LIMIT ?"
+            query += " ORDER BY colaborador, data LIMIT ?"
             params.append(limit)
             
             cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve raw records: {str(e)}")
+            return []
+    
+    @staticmethod
+    def _metrics_history_query(colaborador=None, grupo=None, start_date=None, end_date=None, limit=10):
+        """
+        Build the get_metrics_history query.
+        
+        Returns:
+            tuple: (query, params)
+        """
+        query = "SELECT * FROM metricas WHERE 1=1"
+        params = []
+        
+        if colaborador:
+            query += " AND colaborador = ?"
+            params.append(colaborador)
+        
+        if grupo:
+            query += " AND grupo = ?"
+            params.append(grupo)
+        
+        if start_date:
+            query += " AND data >= ?"
+            params.append(start_date.isoformat())
+        
+        if end_date:
+            query += " AND data <= ?"
+            params.append(end_date.isoformat())
+        
+        query += " ORDER BY data DESC LIMIT ?"
+        params.append(limit)
+        
+        return query, params
+    
+    def get_metrics_history(self, colaborador=None, grupo=None, start_date=None, end_date=None, limit=10):
+        """
+        Retrieve metrics history with optional filters.
+        
+        Args:
+            colaborador (str, optional): Filter by collaborator name
+            grupo (str, optional): Filter by group name
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            limit (int, optional): Maximum number of records to return
+        
+        Returns:
+            list: List of metrics records
+        """
+        try:
+            conn = self.pool.connection()
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            cursor.execute(*self._metrics_history_query(colaborador, grupo, start_date, end_date, limit))
             results = [dict(row) for row in cursor.fetchall()]
             
             logger.info(f"Retrieved {len(results)} metrics records")
@@ -201,9 +1032,6 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Failed to retrieve metrics history: {str(e)}")
             return []
-        finally:
-            if conn:
-                conn.close()
     
     def get_efficiency_trend(self, colaborador, days=30):
         """
@@ -217,17 +1045,11 @@ class DatabaseManager:
             dict: Trend data with dates and efficiency values
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.pool.connection()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
-            cursor.execute('''
-            SELECT data, taxa_eficiencia 
-            FROM metricas 
-            WHERE colaborador = ? 
-            AND data >= date('now', ?) 
-            ORDER BY data ASC
-            ''', (colaborador, f'-{days} days'))
+            cursor.execute(EFFICIENCY_TREND_QUERY, (colaborador, f'-{days} days'))
             
             results = [dict(row) for row in cursor.fetchall()]
             
@@ -242,55 +1064,65 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Failed to retrieve efficiency trend: {str(e)}")
             return {"dates": [], "efficiency": []}
-        finally:
-            if conn:
-                conn.close()
     
     def get_group_comparison(self):
         """
-        Get comparison data between Julio and Leandro groups.
+        Get comparison data between groups.
+        
+        Reads the 'total' partition of the resumo_grupos summary: one row per
+        group, whatever the length of the metrics history.
         
         Returns:
             dict: Comparison metrics between groups
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get average efficiency by group
-            cursor.execute('''
-            SELECT grupo, AVG(taxa_eficiencia) as avg_eficiencia
-            FROM metricas
-            GROUP BY grupo
-            ''')
-            
-            efficiency_results = cursor.fetchall()
-            efficiency_by_group = {row[0]: row[1] for row in efficiency_results}
-            
-            # Get total records by group
-            cursor.execute('''
-            SELECT grupo, SUM(total_registros) as total
-            FROM metricas
-            GROUP BY grupo
-            ''')
-            
-            total_results = cursor.fetchall()
-            total_by_group = {row[0]: row[1] for row in total_results}
-            
-            # Compile the comparison data
-            comparison = {
-                "efficiency": efficiency_by_group,
-                "total_records": total_by_group
+            summary = self.get_group_summary()
+            return {
+                "efficiency": {row['grupo']: row['avg_eficiencia'] for row in summary},
+                "total_records": {row['grupo']: row['total_registros'] for row in summary}
             }
             
-            return comparison
-            
         except Exception as e:
             logger.error(f"Failed to retrieve group comparison: {str(e)}")
             return {"efficiency": {}, "total_records": {}}
-        finally:
-            if conn:
-                conn.close()
+    
+    def get_group_summary(self, level='total', start=None, end=None):
+        """
+        Get per-group totals from the resumo_grupos summary.
+        
+        Args:
+            level (str): 'total' (one row per group), 'dia' (per group and day)
+                or 'execucao' (per group and pipeline run)
+            start (optional): First partition included: a datetime for 'dia', a run id for 'execucao'
+            end (optional): Last partition included
+        
+        Returns:
+            list: Dicts with grupo, chave (day or run id), registros (metrics rows),
+                avg_eficiencia and total_registros
+        """
+        bounds = [value.strftime('%Y-%m-%d') if isinstance(value, datetime) else value
+                  for value in (start, end)]
+        
+        query = '''
+        SELECT grupo, chave, registros,
+               soma_eficiencia / registros AS avg_eficiencia,
+               soma_registros AS total_registros
+        FROM resumo_grupos
+        WHERE nivel = ?
+        '''
+        params = [level]
+        if bounds[0] is not None:
+            query += " AND chave >= ?"
+            params.append(bounds[0])
+        if bounds[1] is not None:
+            query += " AND chave <= ?"
+            params.append(bounds[1])
+        query += " ORDER BY chave, grupo"
+        
+        cursor = self.pool.connection().cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
     
     def save_configuration(self, key, value):
         """
@@ -304,28 +1136,24 @@ class DatabaseManager:
             bool: True if successful, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+                
+                # Convert value to JSON if it's not a string
+                if not isinstance(value, str):
+                    value = json.dumps(value)
+                
+                cursor.execute('''
+                INSERT OR REPLACE INTO configuracoes (chave, valor, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ''', (key, value))
             
-            # Convert value to JSON if it's not a string
-            if not isinstance(value, str):
-                value = json.dumps(value)
-            
-            cursor.execute('''
-            INSERT OR REPLACE INTO configuracoes (chave, valor, updated_at)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-            ''', (key, value))
-            
-            conn.commit()
             logger.info(f"Configuration saved: {key}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to save configuration: {str(e)}")
             return False
-        finally:
-            if conn:
-                conn.close()
     
     def get_configuration(self, key, default=None):
         """
@@ -339,7 +1167,7 @@ class DatabaseManager:
             any: Configuration value
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.pool.connection()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -362,6 +1190,3 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Failed to retrieve configuration: {str(e)}")
             return default
-        finally:
-            if conn:
-                conn.close()
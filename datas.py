@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Conversão de Datas
+==================
+Motor único de normalização das colunas de data das planilhas. Os valores de uma
+coluna chegam misturados: datas já interpretadas pelo openpyxl, números seriais do
+Excel e textos no padrão brasileiro (dd/mm/aaaa) ou ISO.
+
+Cada classe de valor é convertida em uma passada vetorizada. Para os textos, o
+formato dominante é detectado a partir de uma amostra e guardado por arquivo, aba e
+coluna, de modo que as leituras seguintes aplicam o formato diretamente. Os formatos
+de um arquivo são descartados quando o arquivo muda. Valores que não
+seguem o formato dominante passam pelos formatos alternativos e o que sobra é
+contabilizado como inválido.
+"""
+
+import os
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+# Formatos aceitos, em ordem de preferência em caso de empate na amostra
+FORMATOS_CANDIDATOS = [
+    '%d/%m/%Y',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%y',
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%d-%m-%Y',
+    '%d.%m.%Y'
+]
+TAMANHO_AMOSTRA = 200
+# Arquivos cujos formatos detectados são mantidos; os usados há mais tempo são descartados
+MAX_ARQUIVOS = 32
+
+# Data zero do sistema de datas 1900 do Excel (já compensado o falso 29/02/1900)
+EPOCA_EXCEL = pd.Timestamp('1899-12-30')
+# Limites válidos de um serial: 01/01/1900 a 31/12/9999
+SERIAL_MINIMO = 1
+SERIAL_MAXIMO = 2958465
+
+_PADRAO_SERIAL = r'\d+(?:[.,]\d+)?'
+
+
+def seriais_para_datas(valores):
+    """
+    Converte números seriais do Excel em datas.
+
+    Args:
+        valores (pandas.Series): Valores numéricos
+
+    Returns:
+        pandas.Series: Datas; seriais fora do intervalo válido viram NaT
+    """
+    valores = pd.to_numeric(valores, errors='coerce').astype('float64')
+    valores = valores.where((valores >= SERIAL_MINIMO) & (valores <= SERIAL_MAXIMO))
+    return EPOCA_EXCEL + pd.to_timedelta(valores, unit='D')
+
+
+def _classe_valor(tipo):
+    """Classifica o tipo Python de um valor de célula: nativa, serial, texto ou outro"""
+    if issubclass(tipo, (datetime, date)):
+        return 'nativa'
+    if issubclass(tipo, (int, float, np.number)) and not issubclass(tipo, (bool, np.bool_)):
+        return 'serial'
+    if issubclass(tipo, str):
+        return 'texto'
+    return 'outro'
+
+
+class MotorDatas:
+    """
+    Converte colunas de data com detecção de formato em cache.
+
+    Os formatos detectados ficam em `formatos_detectados` e as estatísticas da
+    última conversão de cada chave em `estatisticas`. Quando o arquivo de origem é
+    informado, a chave começa pelo seu caminho absoluto: arquivos com as mesmas abas
+    não compartilham formatos, e as entradas de um arquivo são descartadas quando seu
+    tamanho ou mtime mudam ou quando ele sai dos MAX_ARQUIVOS usados mais recentemente.
+    """
+
+    def __init__(self, formatos=None, tamanho_amostra=TAMANHO_AMOSTRA, max_arquivos=MAX_ARQUIVOS):
+        """
+        Args:
+            formatos (list, optional): Formatos candidatos. Por padrão, FORMATOS_CANDIDATOS
+            tamanho_amostra (int): Quantidade de textos usados na detecção do formato
+            max_arquivos (int): Arquivos cujos formatos e estatísticas são mantidos
+        """
+        self.formatos = list(formatos or FORMATOS_CANDIDATOS)
+        self.tamanho_amostra = tamanho_amostra
+        self.max_arquivos = max_arquivos
+        self.formatos_detectados = {}
+        self.estatisticas = {}
+        self._arquivos = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def chave_arquivo(chave, arquivo=None):
+        """Chave do cache para uma coluna, prefixada pelo caminho absoluto do arquivo quando informado"""
+        if chave is None or arquivo is None:
+            return chave
+        return (os.path.abspath(arquivo),) + tuple(chave)
+
+    def _descartar(self, arquivo):
+        """Remove as entradas de um arquivo (chamado com a trava obtida)"""
+        for cache in (self.formatos_detectados, self.estatisticas):
+            for chave in [c for c in cache if isinstance(c, tuple) and c[0] == arquivo]:
+                del cache[chave]
+
+    def _sincronizar(self, arquivo):
+        """Descarta as entradas de um arquivo alterado e limita o número de arquivos guardados"""
+        arquivo = os.path.abspath(arquivo)
+        try:
+            info = os.stat(arquivo)
+            impressao = (info.st_size, info.st_mtime_ns)
+        except OSError:
+            impressao = None
+        with self._trava:
+            if self._arquivos.get(arquivo, impressao) != impressao:
+                self._descartar(arquivo)
+            self._arquivos[arquivo] = impressao
+            self._arquivos.move_to_end(arquivo)
+            while len(self._arquivos) > self.max_arquivos:
+                antigo, _ = self._arquivos.popitem(last=False)
+                self._descartar(antigo)
+
+    def _amostra(self, textos):
+        """Seleciona textos espalhados ao longo da coluna"""
+        if len(textos) <= self.tamanho_amostra:
+            return textos
+        posicoes = np.linspace(0, len(textos) - 1, self.tamanho_amostra).astype(int)
+        return textos.iloc[posicoes]
+
+    def detectar_formato(self, textos):
+        """
+        Detecta o formato que interpreta a maior parte de uma amostra dos textos.
+
+        Args:
+            textos (pandas.Series): Datas em texto, sem valores vazios
+
+        Returns:
+            str | None: Formato dominante, ou None se nenhum formato se aplica
+        """
+        amostra = self._amostra(textos)
+        melhor, acertos_melhor = None, 0
+        for formato in self.formatos:
+            acertos = pd.to_datetime(amostra, format=formato, errors='coerce').notna().sum()
+            if acertos > acertos_melhor:
+                melhor, acertos_melhor = formato, acertos
+                if acertos == len(amostra):
+                    break
+        return melhor
+
+    def _converter_textos(self, textos, formato):
+        """Aplica o formato dominante e, às sobras, os formatos alternativos"""
+        resultado = pd.to_datetime(textos, format=formato, errors='coerce')
+        for alternativo in self.formatos:
+            pendentes = resultado.isna()
+            if not pendentes.any():
+                break
+            if alternativo == formato:
+                continue
+            resultado[pendentes] = pd.to_datetime(textos[pendentes], format=alternativo, errors='coerce')
+        return resultado
+
+    def converter(self, serie, chave=None, formato=None, arquivo=None):
+        """
+        Converte uma coluna de datas em datetime64.
+
+        Args:
+            serie (pandas.Series): Valores da coluna
+            chave (tuple, optional): Identifica a coluna (ex.: (aba, coluna)) para
+                guardar o formato detectado e as estatísticas
+            formato (str, optional): Formato preferido dos textos; dispensa a detecção
+            arquivo (str, optional): Arquivo de origem da coluna; restringe a chave a ele
+
+        Returns:
+            pandas.Series: Datas convertidas, com NaT nos valores vazios ou inválidos
+        """
+        if chave is not None and arquivo is not None:
+            self._sincronizar(arquivo)
+            chave = self.chave_arquivo(chave, arquivo)
+        indice = serie.index
+        serie = serie.reset_index(drop=True)
+        resultado = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+        estatisticas = {
+            'total': int(len(serie)), 'vazios': 0, 'nativas': 0, 'seriais': 0,
+            'textos': 0, 'formato': None, 'convertidas': 0, 'invalidas': 0
+        }
+        vazios = int(serie.isna().sum())
+
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            resultado = pd.to_datetime(serie, cache=False)
+            estatisticas['nativas'] = int(resultado.notna().sum())
+        elif pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            resultado = seriais_para_datas(serie)
+            estatisticas['seriais'] = int(serie.notna().sum())
+        else:
+            # Colunas de data repetem muito os mesmos valores: cada valor distinto é
+            # interpretado uma única vez e o resultado é espalhado pelos códigos
+            codigos, unicos = pd.factorize(serie)
+            frequencias = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+            unicos = pd.Series(unicos, dtype=object)
+            convertidos = pd.Series(pd.NaT, index=unicos.index, dtype='datetime64[ns]')
+
+            # Classificação por tipo feita uma vez para cada tipo distinto
+            tipos = unicos.map(type)
+            classes = tipos.map({tipo: _classe_valor(tipo) for tipo in tipos.unique()})
+
+            nativas = unicos[classes == 'nativa']
+            if len(nativas):
+                convertidos[nativas.index] = pd.to_datetime(nativas, errors='coerce')
+
+            textos = unicos[classes == 'texto'].str.strip()
+            vazios += int(frequencias[textos.index[textos == '']].sum())
+            textos = textos[textos != '']
+            seriais_texto = textos.str.fullmatch(_PADRAO_SERIAL)
+            seriais = pd.concat([unicos[classes == 'serial'], textos[seriais_texto].str.replace(',', '.')])
+            textos = textos[~seriais_texto]
+
+            if len(seriais):
+                convertidos[seriais.index] = seriais_para_datas(seriais)
+
+            if len(textos):
+                if formato is None and chave is not None:
+                    formato = self.formatos_detectados.get(chave)
+                if formato is None:
+                    formato = self.detectar_formato(textos)
+                    if chave is not None and formato is not None:
+                        with self._trava:
+                            self.formatos_detectados[chave] = formato
+                if formato is not None:
+                    convertidos[textos.index] = self._converter_textos(textos, formato)
+
+            datas = np.append(convertidos.to_numpy(), np.datetime64('NaT', 'ns'))
+            resultado = pd.Series(datas[codigos], index=serie.index)
+
+            estatisticas.update({
+                'nativas': int(frequencias[nativas.index].sum()),
+                'seriais': int(frequencias[seriais.index].sum()),
+                'textos': int(frequencias[textos.index].sum()),
+                'formato': formato
+            })
+
+        estatisticas['vazios'] = vazios
+        estatisticas['convertidas'] = int(resultado.notna().sum())
+        estatisticas['invalidas'] = estatisticas['total'] - vazios - estatisticas['convertidas']
+        resultado.index = indice
+
+        if chave is not None:
+            with self._trava:
+                self.estatisticas[chave] = estatisticas
+        if estatisticas['invalidas']:
+            logger.warning(f"{estatisticas['invalidas']} datas inválidas em {chave or serie.name}")
+        return resultado
+
+
+# Instância compartilhada por todos os módulos
+motor_padrao = MotorDatas()
+
+
+def converter_datas(serie, chave=None, formato=None, arquivo=None):
+    """Converte uma coluna de datas usando o motor compartilhado"""
+    return motor_padrao.converter(serie, chave, formato, arquivo)
+
+
+def estatisticas_datas(chave, arquivo=None):
+    """Retorna as estatísticas da última conversão de uma coluna, se houver"""
+    return motor_padrao.estatisticas.get(MotorDatas.chave_arquivo(chave, arquivo))
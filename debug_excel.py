@@ -3,28 +3,33 @@ import numpy as np
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
+from cache_planilhas import listar_abas
+from esquema_colunas import normalizar_coluna, carregar_aba
+from datas import converter_datas
+from categorias import contar
+from motor_metricas import MotorMetricas, GRAFO_EXCEL
+from tendencias import ajustar, formato_tendencias
+from estatisticas_online import quantis_de_dict
+from leitura_streaming import iterar_blocos, AgregadorIncremental, TAMANHO_BLOCO_PADRAO
 
 class AnalisadorExcel:
-    def __init__(self, file_path):
+    # Colunas lógicas lidas para as métricas dos colaboradores
+    COLUNAS_ANALISE = ['DATA', 'SITUACAO', 'RESOLUCAO']
+
+    def __init__(self, file_path, streaming=False, tamanho_bloco=TAMANHO_BLOCO_PADRAO, k_quantis=None):
         self.file_path = file_path
-        self.xls = pd.ExcelFile(file_path)
+        self.streaming = streaming
+        self.tamanho_bloco = tamanho_bloco
+        # Com streaming, k_quantis troca o histograma exato dos tempos de resolução por um
+        # sketch KLL (erro de posto ~1,65/k), que pode ser mesclado entre abas e arquivos
+        self.k_quantis = k_quantis
         self.colaboradores = {}
+        self.agregadores = {}
         self.metricas_gerais = {}
         
     def normalizar_coluna(self, coluna):
-        """Normaliza o nome da coluna para um formato consistente"""
-        mapeamento = {
-            'SITUAÇÂO': 'SITUACAO',
-            'SITUAÇÃO': 'SITUACAO',
-            'RESOLUCAO': 'RESOLUCAO',
-            'RESOLUÇÃO': 'RESOLUCAO',
-            'ANÁLISE': 'ANALISE',
-            'DATA VENCIMENTO': 'DATA',
-            'DT VENCIMENTO': 'DATA'
-        }
-        coluna = str(coluna).strip().upper()
-        return mapeamento.get(coluna, coluna)
+        """Normaliza o nome da coluna para o nome lógico definido em esquema_colunas"""
+        return normalizar_coluna(coluna)
     
     def calcular_metricas_colaborador(self, df, nome):
         """Calcula métricas avançadas para um colaborador"""
@@ -43,7 +48,7 @@ class AnalisadorExcel:
         
         # 1. Distribuição de Status
         if 'SITUACAO' in df.columns:
-            status_counts = df['SITUACAO'].value_counts()
+            status_counts = contar(df['SITUACAO'])
             metricas['distribuicao_status'] = status_counts.to_dict()
             
             # Calcular percentuais
@@ -51,8 +56,8 @@ class AnalisadorExcel:
         
         # 2. Análise Temporal
         if 'DATA' in df.columns and 'RESOLUCAO' in df.columns:
-            df['DATA'] = pd.to_datetime(df['DATA'])
-            df['RESOLUCAO'] = pd.to_datetime(df['RESOLUCAO'])
+            df['DATA'] = converter_datas(df['DATA'], chave=(nome, 'DATA'), arquivo=self.file_path)
+            df['RESOLUCAO'] = converter_datas(df['RESOLUCAO'], chave=(nome, 'RESOLUCAO'), arquivo=self.file_path)
             
             # Tempo médio de resolução
             tempo_resolucao = (df['RESOLUCAO'] - df['DATA']).dropna()
@@ -75,7 +80,7 @@ class AnalisadorExcel:
             
             # Análise diária
             if 'DATA' in df.columns:
-                df_diario = df.groupby(df['DATA'].dt.date)['SITUACAO'].value_counts().unstack(fill_value=0)
+                df_diario = df.groupby([df['DATA'].dt.date, 'SITUACAO'], observed=True).size().unstack(fill_value=0)
                 metricas['media_diaria'] = df_diario.mean().to_dict()
                 metricas['max_diario'] = df_diario.max().to_dict()
         
@@ -83,10 +88,7 @@ class AnalisadorExcel:
         if 'DATA' in df.columns and 'SITUACAO' in df.columns:
             # Tendência temporal de status
             df_trend = df.groupby(df['DATA'].dt.date)['SITUACAO'].count()
-            if len(df_trend) > 1:
-                slope, intercept, r_value, p_value, std_err = stats.linregress(range(len(df_trend)), df_trend.values)
-                metricas['tendencias']['slope'] = slope
-                metricas['tendencias']['r_squared'] = r_value ** 2
+            metricas['tendencias'].update(formato_tendencias(ajustar({nome: df_trend.values}).loc[nome]))
         
         # 5. Análise de Prioridades
         prioridade_cols = [col for col in df.columns if 'PRIORIDADE' in col]
@@ -101,35 +103,122 @@ class AnalisadorExcel:
         
         return metricas
     
-    def analisar_arquivo(self):
-        """Analisa o arquivo Excel completo"""
-        print("Iniciando análise detalhada do arquivo...")
+    def calcular_metricas_streaming(self, nome):
+        """Calcula as métricas de um colaborador lendo a aba em blocos, com memória constante"""
+        blocos = iterar_blocos(self.file_path, nome, self.tamanho_bloco, normalizar=self.normalizar_coluna,
+                               colunas=self.COLUNAS_ANALISE, contendo=['PRIORIDADE'])
+        agregador = AgregadorIncremental(origem=nome, arquivo=self.file_path, k_quantis=self.k_quantis).consumir(blocos)
+        self.agregadores[nome] = agregador
+        return agregador.metricas_excel(nome)
+    
+    def quantis_resolucao(self):
+        """
+        Mescla os tempos de resolução de todas as abas lidas em streaming.
+        
+        Returns:
+            HistogramaQuantis ou SketchKLL: Acumulador de quantis do arquivo, ou None sem dados
+        """
+        quantis = None
+        for agregador in self.agregadores.values():
+            if agregador.tempos_resolucao.n == 0:
+                continue
+            if quantis is None:
+                quantis = quantis_de_dict(agregador.tempos_resolucao.para_dict())
+            else:
+                quantis.mesclar(agregador.tempos_resolucao)
+        return quantis
+    
+    def resumo_resolucao(self, quantis=None):
+        """
+        Mediana, quartis e outliers (critério do IQR) dos tempos de resolução, em dias.
+        
+        Args:
+            quantis (optional): Acumulador já mesclado (ex.: de vários arquivos ou execuções).
+                Por padrão, quantis_resolucao()
+        
+        Returns:
+            dict: Resumo dos tempos de resolução, ou vazio sem dados
+        """
+        quantis = quantis if quantis is not None else self.quantis_resolucao()
+        if quantis is None or quantis.n == 0:
+            return {}
+        return {
+            'registros': quantis.n,
+            'tempo_mediano_resolucao': pd.Timedelta(days=quantis.quantil(0.5)).days,
+            'q1_dias': quantis.quantil(0.25),
+            'q3_dias': quantis.quantil(0.75),
+            'outliers': quantis.contar_outliers_iqr()
+        }
+    
+    def colunas_necessarias(self, metricas):
+        """
+        Colunas a carregar para calcular um subconjunto das métricas.
+        
+        Returns:
+            tuple: (colunas lógicas, trechos de nome adicionais) para carregar_aba
+        """
+        lidas = GRAFO_EXCEL.colunas(metricas, entradas=['motor'])
+        colunas = [coluna for coluna in self.COLUNAS_ANALISE if coluna in lidas]
+        contendo = ['PRIORIDADE'] if 'PRIORIDADE' in lidas else []
+        # Ao menos uma coluna é lida para que o total de registros da aba seja conhecido
+        return colunas or self.COLUNAS_ANALISE[:1], contendo
+    
+    def analisar_arquivo(self, metricas=None):
+        """
+        Analisa o arquivo Excel completo
+        
+        Args:
+            metricas (iterable, optional): Nomes das métricas necessárias (ver motor_metricas.METRICAS_EXCEL).
+                Apenas essas, suas dependências e as colunas que elas leem são processadas, sem exibição
+                nem métricas comparativas. Por padrão, a análise completa
+        """
+        detalhada = metricas is None
+        colunas, contendo = (self.COLUNAS_ANALISE, ['PRIORIDADE']) if detalhada else self.colunas_necessarias(metricas)
+        if detalhada:
+            print("Iniciando análise detalhada do arquivo...")
         
         # Lista para armazenar nomes dos colaboradores
         nomes_colaboradores = []
         
-        for sheet_name in self.xls.sheet_names:
+        # Sem streaming, as abas são empilhadas e as métricas de todos saem de uma vez
+        motor = MotorMetricas()
+        
+        for sheet_name in listar_abas(self.file_path):
             if sheet_name != "RELATÓRIO GERAL" and sheet_name not in ["", "TESTE"]:
                 try:
-                    print(f"\nAnalisando dados de: {sheet_name}")
-                    df = pd.read_excel(self.xls, sheet_name=sheet_name)
-                    
-                    # Normalizar nomes das colunas
-                    df.columns = [self.normalizar_coluna(col) for col in df.columns]
-                    
-                    # Calcular métricas para o colaborador
-                    metricas = self.calcular_metricas_colaborador(df, sheet_name)
-                    self.colaboradores[sheet_name] = metricas
-                    nomes_colaboradores.append(sheet_name)
-                    
-                    # Exibir resumo das métricas
-                    self.exibir_metricas_colaborador(metricas)
+                    if detalhada:
+                        print(f"\nAnalisando dados de: {sheet_name}")
+                    if self.streaming:
+                        metricas_aba = self.calcular_metricas_streaming(sheet_name)
+                        self.colaboradores[sheet_name] = metricas_aba
+                        nomes_colaboradores.append(sheet_name)
+                        
+                        # Exibir resumo das métricas
+                        if detalhada:
+                            self.exibir_metricas_colaborador(metricas_aba)
+                    else:
+                        # Apenas as colunas usadas nas métricas, já com nomes lógicos
+                        df = carregar_aba(self.file_path, sheet_name, colunas=colunas,
+                                          contendo=contendo, converter_tipos=False)
+                        motor.adicionar(sheet_name, df, arquivo=self.file_path)
                     
                 except Exception as e:
                     print(f"Erro ao processar aba {sheet_name}: {str(e)}")
         
+        if motor.partes:
+            # Calcular métricas de todos os colaboradores
+            for sheet_name, metricas_aba in motor.metricas_excel(metricas).items():
+                self.colaboradores[sheet_name] = metricas_aba
+                nomes_colaboradores.append(sheet_name)
+                if detalhada:
+                    self.exibir_metricas_colaborador(metricas_aba)
+        
+        if self.streaming:
+            self.metricas_gerais['tempo_resolucao'] = self.resumo_resolucao()
+        
         # Calcular métricas comparativas
-        self.calcular_metricas_comparativas()
+        if detalhada:
+            self.calcular_metricas_comparativas()
         
         return nomes_colaboradores
     
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Esquema de Colunas
+==================
+Registro único das colunas lógicas das planilhas dos colaboradores, com as
+variações de cabeçalho encontradas nos arquivos e o tipo de cada coluna.
+
+Os leitores resolvem primeiro a linha de cabeçalho e carregam apenas as colunas
+que a análise precisa, já renomeadas para o nome lógico. Colunas associadas a um
+dicionário de categorias são sempre entregues como pandas.Categorical.
+"""
+
+import pandas as pd
+
+from cache_planilhas import ler_aba, ler_cabecalho
+from datas import converter_datas
+from categorias import categorizar
+
+# Nome lógico -> variações de cabeçalho e tipo declarado
+COLUNAS = {
+    'DATA': {
+        'variantes': ['DATA', 'DATA VENCIMENTO', 'DT VENCIMENTO', 'DATA CRIACAO', 'DATA CRIAÇÃO'],
+        'tipo': 'data'
+    },
+    'SITUACAO': {
+        'variantes': ['SITUACAO', 'SITUAÇÃO', 'SITUAÇÂO', 'STATUS'],
+        'tipo': 'texto',
+        'categoria': 'status'
+    },
+    'RESOLUCAO': {
+        'variantes': ['RESOLUCAO', 'RESOLUÇÃO', 'DATA RESOLUCAO', 'DATA RESOLUÇÃO'],
+        'tipo': 'data'
+    },
+    'BANCO': {
+        'variantes': ['BANCO'],
+        'tipo': 'texto',
+        'categoria': 'banco'
+    },
+    'NEGOCIACAO': {
+        'variantes': ['NEGOCIACAO', 'NEGOCIAÇÃO'],
+        'tipo': 'texto'
+    },
+    'ÚLTIMO PAGAMENTO': {
+        'variantes': ['ÚLTIMO PAGAMENTO', 'ULTIMO PAGAMENTO'],
+        'tipo': 'data'
+    },
+    'ANALISE': {
+        'variantes': ['ANALISE', 'ANÁLISE'],
+        'tipo': 'texto'
+    }
+}
+
+# Índice reverso: cabeçalho normalizado -> nome lógico
+_VARIANTES = {
+    variante: logico
+    for logico, definicao in COLUNAS.items()
+    for variante in definicao['variantes']
+}
+
+
+def normalizar_coluna(coluna):
+    """
+    Normaliza o nome de uma coluna para o nome lógico do registro.
+
+    Colunas fora do registro são apenas convertidas para maiúsculas e sem espaços
+    nas extremidades.
+
+    Args:
+        coluna: Nome da coluna como aparece na planilha
+
+    Returns:
+        str: Nome lógico da coluna
+    """
+    coluna = str(coluna).strip().upper()
+    return _VARIANTES.get(coluna, coluna)
+
+
+def variantes(logico):
+    """Retorna as variações de cabeçalho conhecidas para uma coluna lógica"""
+    return list(COLUNAS[logico]['variantes'])
+
+
+def resolver_cabecalho(colunas):
+    """
+    Associa cada coluna lógica presente ao nome original no cabeçalho.
+
+    Quando mais de uma coluna original corresponde ao mesmo nome lógico,
+    a primeira é usada.
+
+    Args:
+        colunas (iterable): Nomes das colunas como aparecem na planilha
+
+    Returns:
+        dict: Nome lógico -> nome original
+    """
+    mapeamento = {}
+    for original in colunas:
+        logico = normalizar_coluna(original)
+        mapeamento.setdefault(logico, original)
+    return mapeamento
+
+
+def selecionar_colunas(cabecalho, colunas=None, contendo=None):
+    """
+    Escolhe as colunas originais necessárias para uma análise.
+
+    Args:
+        cabecalho (list): Nomes das colunas como aparecem na planilha
+        colunas (list, optional): Nomes lógicos desejados. Se None, todas as colunas
+        contendo (list, optional): Trechos de nome; colunas cujo nome lógico contenha
+            algum deles também são incluídas (ex.: 'PRIORIDADE')
+
+    Returns:
+        dict: Nome original -> nome lógico, na ordem do cabeçalho
+    """
+    mapeamento = resolver_cabecalho(cabecalho)
+    selecionadas = {}
+    for logico, original in mapeamento.items():
+        incluir = colunas is None or logico in colunas
+        if not incluir and contendo:
+            incluir = any(trecho in logico for trecho in contendo)
+        if incluir:
+            selecionadas[original] = logico
+    return selecionadas
+
+
+def projetar(df, colunas=None, contendo=None):
+    """
+    Restringe um DataFrame já carregado às colunas necessárias, com nomes lógicos.
+
+    Args:
+        df (pandas.DataFrame): Dados com o cabeçalho original ou já normalizado
+        colunas (list, optional): Nomes lógicos desejados. Se None, todas as colunas
+        contendo (list, optional): Trechos de nome de colunas adicionais
+
+    Returns:
+        pandas.DataFrame: Dados projetados e renomeados
+    """
+    selecionadas = selecionar_colunas(df.columns, colunas, contendo)
+    return aplicar_categorias(df[list(selecionadas)].rename(columns=selecionadas))
+
+
+def aplicar_categorias(df):
+    """Converte as colunas lógicas associadas a um dicionário para o tipo categórico"""
+    for coluna in df.columns:
+        definicao = COLUNAS.get(coluna)
+        if definicao and 'categoria' in definicao:
+            df[coluna] = categorizar(df[coluna], definicao['categoria'])
+    return df
+
+
+def aplicar_tipos(df, aba=None, arquivo=None):
+    """Converte as colunas lógicas do DataFrame para os tipos declarados no registro"""
+    for coluna in df.columns:
+        definicao = COLUNAS.get(coluna)
+        if definicao and definicao['tipo'] == 'data':
+            chave = (aba, coluna) if aba is not None else None
+            df[coluna] = converter_datas(df[coluna], chave=chave, arquivo=arquivo)
+    return df
+
+
+def carregar_aba(caminho, aba, colunas=None, contendo=None, converter_tipos=True):
+    """
+    Carrega uma aba com as colunas renomeadas para os nomes lógicos.
+
+    O cabeçalho é resolvido antes da leitura e somente as colunas pedidas são
+    carregadas do cache colunar.
+
+    Args:
+        caminho (str): Caminho do arquivo Excel
+        aba (str): Nome da aba
+        colunas (list, optional): Nomes lógicos desejados. Se None, todas as colunas
+        contendo (list, optional): Trechos de nome de colunas adicionais
+        converter_tipos (bool): Converte as colunas de data declaradas no registro
+
+    Returns:
+        pandas.DataFrame: Dados da aba com nomes lógicos
+    """
+    selecionadas = selecionar_colunas(ler_cabecalho(caminho, aba), colunas, contendo)
+    df = ler_aba(caminho, aba, colunas=list(selecionadas))
+    df = aplicar_categorias(df.rename(columns=selecionadas))
+    if converter_tipos:
+        df = aplicar_tipos(df, aba, caminho)
+    return df
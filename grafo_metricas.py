@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Grafo de Métricas
+=================
+Métricas declaradas como nós de um grafo de dependências, avaliadas sob demanda.
+
+Cada nó declara as métricas (ou entradas) de que depende e as colunas lógicas que
+lê. Um consumidor pede apenas os nomes de que precisa: a avaliação percorre o
+fecho dessas dependências, calcula cada nó uma única vez (os resultados ficam
+memorizados na avaliação) e não toca nos nós que ninguém pediu. As colunas do
+fecho indicam o que precisa ser carregado das planilhas.
+
+Exemplo:
+    grafo = GrafoMetricas()
+
+    @grafo.metrica(dependencias=['registros'], colunas=['SITUACAO'])
+    def distribuicao(registros):
+        ...
+
+    Avaliacao(grafo, registros=df).obter('distribuicao')
+"""
+
+
+class No:
+    """
+    Uma métrica do grafo: função, dependências e colunas lidas.
+    """
+
+    def __init__(self, nome, funcao, dependencias=(), colunas=()):
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = tuple(dependencias)
+        self.colunas = tuple(colunas)
+
+
+class GrafoMetricas:
+    """
+    Conjunto de nós de métricas e das relações de dependência entre eles.
+    """
+
+    def __init__(self):
+        self.nos = {}
+
+    def metrica(self, nome=None, dependencias=(), colunas=()):
+        """
+        Decorador que registra uma função como nó do grafo.
+
+        A função recebe os valores das dependências como argumentos nomeados.
+
+        Args:
+            nome (str, optional): Nome da métrica. Por padrão, o nome da função
+            dependencias (iterable): Métricas ou entradas usadas no cálculo
+            colunas (iterable): Colunas lógicas lidas diretamente pelo nó
+        """
+        def registrar(funcao):
+            self.nos[nome or funcao.__name__] = No(nome or funcao.__name__, funcao, dependencias, colunas)
+            return funcao
+        return registrar
+
+    def ordem(self, nomes, entradas=()):
+        """
+        Ordena topologicamente os nós necessários para calcular as métricas pedidas.
+
+        Args:
+            nomes (iterable): Métricas pedidas
+            entradas (iterable): Nomes fornecidos diretamente, sem nó
+
+        Returns:
+            list: Nós do fecho de dependências, cada um depois das suas dependências
+
+        Raises:
+            KeyError: Se uma métrica não existe no grafo nem nas entradas
+            ValueError: Se houver dependência circular
+        """
+        entradas = set(entradas)
+        ordem, visitados, em_andamento = [], set(), set()
+
+        def visitar(nome):
+            if nome in visitados or nome in entradas:
+                return
+            if nome in em_andamento:
+                raise ValueError(f"Dependência circular envolvendo a métrica {nome}")
+            if nome not in self.nos:
+                raise KeyError(f"Métrica desconhecida: {nome}")
+            em_andamento.add(nome)
+            for dependencia in self.nos[nome].dependencias:
+                visitar(dependencia)
+            em_andamento.discard(nome)
+            visitados.add(nome)
+            ordem.append(self.nos[nome])
+
+        for nome in nomes:
+            visitar(nome)
+        return ordem
+
+    def colunas(self, nomes, entradas=()):
+        """
+        Colunas lógicas lidas pelas métricas pedidas e por suas dependências.
+
+        Returns:
+            set: Nomes lógicos das colunas
+        """
+        return {coluna for no in self.ordem(nomes, entradas) for coluna in no.colunas}
+
+
+class Avaliacao:
+    """
+    Avaliação memorizada de um grafo sobre um conjunto de entradas.
+    """
+
+    def __init__(self, grafo, **entradas):
+        """
+        Args:
+            grafo (GrafoMetricas): Definição das métricas
+            **entradas: Valores das entradas do grafo (ex.: registros=DataFrame)
+        """
+        self.grafo = grafo
+        self.entradas = entradas
+        self.valores = dict(entradas)
+        self.calculados = []
+
+    def obter(self, *nomes):
+        """
+        Calcula as métricas pedidas, reaproveitando o que já foi calculado.
+
+        Returns:
+            dict: Métrica -> valor, apenas para os nomes pedidos
+        """
+        for no in self.grafo.ordem(nomes, self.valores):
+            self.valores[no.nome] = no.funcao(**{d: self.valores[d] for d in no.dependencias})
+            self.calculados.append(no.nome)
+        return {nome: self.valores[nome] for nome in nomes}
+
+    def __getitem__(self, nome):
+        return self.obter(nome)[nome]
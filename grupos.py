@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Grupos
+======
+Registro dos grupos de supervisão e dos colaboradores de cada um, e agregações
+por grupo sobre uma tabela longa com as chaves `grupo` e `colaborador`.
+
+O registro substitui as listas fixas dos grupos Julio e Leandro: novos grupos são
+acrescentados com `registrar` (ou pela seção "groups" da configuração do pipeline)
+e a busca do grupo de um colaborador é feita por dicionário. Colaboradores não
+registrados pertencem ao grupo padrão.
+
+As estatísticas de grupo (médias, coeficiente de variação, correlação entre volume
+e eficiência) saem de um único groupby sobre a tabela de todos os grupos, em vez
+de um laço por grupo.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Grupos conhecidos: nome -> rótulo de exibição e colaboradores
+GRUPOS_PADRAO = {
+    'JULIO': {
+        'rotulo': 'Julio',
+        'colaboradores': [
+            'ANA LIDIA', 'FELIPE', 'JULIANE', 'MATHEUS', 'ANA GESSICA', 'POLIANA',
+            'IGOR', 'ELISANGELA', 'NUNO', 'THALISSON', 'VICTOR ADRIANO'
+        ]
+    },
+    'LEANDRO': {
+        'rotulo': 'Leandro',
+        'colaboradores': ['VITORIA', 'LEANDRO']
+    }
+}
+# Grupo atribuído aos colaboradores sem grupo registrado
+GRUPO_PADRAO = 'LEANDRO'
+
+
+class RegistroGrupos:
+    """
+    Mantém os grupos, seus rótulos e o grupo de cada colaborador.
+    """
+
+    def __init__(self, grupos=None, padrao=GRUPO_PADRAO):
+        """
+        Args:
+            grupos (dict, optional): Nome do grupo -> {'rotulo', 'colaboradores'}. Por padrão, GRUPOS_PADRAO
+            padrao (str): Grupo dos colaboradores não registrados
+        """
+        self.rotulos = {}
+        self.membros = {}
+        self._grupo_de = {}
+        for nome, grupo in (GRUPOS_PADRAO if grupos is None else grupos).items():
+            self.registrar(nome, grupo.get('colaboradores', []), grupo.get('rotulo'))
+        self.padrao = padrao
+        if padrao not in self.rotulos:
+            self.registrar(padrao)
+
+    def registrar(self, nome, colaboradores=(), rotulo=None):
+        """
+        Registra um grupo ou acrescenta colaboradores a um grupo existente.
+
+        Um colaborador registrado em outro grupo é transferido para este.
+
+        Args:
+            nome (str): Nome do grupo (ex.: 'JULIO')
+            colaboradores (iterable): Colaboradores do grupo
+            rotulo (str, optional): Nome de exibição. Por padrão, o nome capitalizado
+        """
+        if nome not in self.rotulos or rotulo:
+            self.rotulos[nome] = rotulo or nome.capitalize()
+        self.membros.setdefault(nome, [])
+        for colaborador in colaboradores:
+            anterior = self._grupo_de.get(colaborador)
+            if anterior == nome:
+                continue
+            if anterior is not None:
+                self.membros[anterior].remove(colaborador)
+            self.membros[nome].append(colaborador)
+            self._grupo_de[colaborador] = nome
+
+    @property
+    def nomes(self):
+        """Nomes dos grupos, na ordem de registro"""
+        return list(self.rotulos)
+
+    @property
+    def colaboradores(self):
+        """Todos os colaboradores registrados"""
+        return list(self._grupo_de)
+
+    def possui(self, colaborador):
+        """Indica se o colaborador pertence a algum grupo registrado"""
+        return colaborador in self._grupo_de
+
+    def grupo_de(self, colaborador):
+        """Retorna o grupo do colaborador (o grupo padrão se não estiver registrado)"""
+        return self._grupo_de.get(colaborador, self.padrao)
+
+    def rotulo(self, grupo):
+        """Retorna o nome de exibição de um grupo"""
+        return self.rotulos.get(grupo, grupo)
+
+    @classmethod
+    def de_config(cls, config):
+        """
+        Cria um registro a partir da seção "groups" da configuração.
+
+        Args:
+            config (dict, optional): Nome do grupo -> {'rotulo', 'colaboradores'}, e opcionalmente
+                'padrao' com o grupo dos não registrados. Vazio ou None retorna os grupos padrão
+
+        Returns:
+            RegistroGrupos: Registro configurado
+        """
+        if not config:
+            return cls()
+        config = dict(config)
+        padrao = config.pop('padrao', None) or next(iter(config))
+        return cls(config, padrao=padrao)
+
+
+# Registro compartilhado pelos analisadores
+registro_padrao = RegistroGrupos()
+
+
+def tabela_colaboradores(metricas_por_grupo):
+    """
+    Dispõe as métricas de todos os grupos em uma tabela longa.
+
+    Args:
+        metricas_por_grupo (dict): Grupo -> {colaborador: métricas}; métricas vazias são ignoradas
+
+    Returns:
+        pandas.DataFrame: grupo, colaborador, total_registros, taxa_eficiencia e volume
+            (soma da distribuição de status), uma linha por colaborador
+    """
+    linhas = [
+        (grupo, colaborador, dados.get('total_registros', 0), dados.get('taxa_eficiencia', 0),
+         sum(dados.get('distribuicao_status', {}).values()))
+        for grupo, metricas in metricas_por_grupo.items()
+        for colaborador, dados in metricas.items()
+        if dados
+    ]
+    tabela = pd.DataFrame(linhas, columns=['grupo', 'colaborador', 'total_registros', 'taxa_eficiencia', 'volume'])
+    tabela['grupo'] = pd.Categorical(tabela['grupo'], categories=list(metricas_por_grupo))
+    return tabela
+
+
+def correlacoes_por_grupo(tabela, x, y):
+    """
+    Correlação de Pearson entre duas colunas, para todos os grupos de uma vez.
+
+    Args:
+        tabela (pandas.DataFrame): Tabela com a coluna `grupo`
+        x (str): Primeira coluna
+        y (str): Segunda coluna
+
+    Returns:
+        pandas.DataFrame: n, coeficiente e p_valor (teste bicaudal, como scipy.stats.pearsonr) por grupo
+    """
+    por_grupo = tabela.groupby('grupo', observed=True)
+    x_c = tabela[x] - por_grupo[x].transform('mean')
+    y_c = tabela[y] - por_grupo[y].transform('mean')
+    somas = pd.DataFrame({'sxy': x_c * y_c, 'sxx': x_c * x_c, 'syy': y_c * y_c, 'n': 1},
+                         index=tabela.index).groupby(tabela['grupo'], observed=True).sum()
+
+    n = somas['n'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.clip(somas['sxy'] / np.sqrt(somas['sxx'] * somas['syy']), -1.0, 1.0).to_numpy()
+        t = np.abs(r) * np.sqrt((n - 2) / (1.0 - r * r))
+        p = np.where(n > 2, 2 * stats.t.sf(t, np.maximum(n - 2, 1)), 1.0)
+    p = np.where(np.isnan(r), np.nan, p)
+    return pd.DataFrame({'n': n, 'coeficiente': r, 'p_valor': p}, index=somas.index)
+
+
+def resumo_grupos(tabela):
+    """
+    Estatísticas de carga e eficiência de cada grupo, em um único groupby.
+
+    Args:
+        tabela (pandas.DataFrame): Resultado de tabela_colaboradores
+
+    Returns:
+        pandas.DataFrame: n, media_registros, media_eficiencia, desvio_registros (populacional, como
+            numpy.std), cv (coeficiente de variação dos registros) e correlacao (volume de registros
+            vs eficiência) por grupo
+    """
+    por_grupo = tabela.groupby('grupo', observed=True)
+    resumo = por_grupo.agg(
+        n=('total_registros', 'size'),
+        media_registros=('total_registros', 'mean'),
+        media_eficiencia=('taxa_eficiencia', 'mean')
+    )
+    centrado = tabela['total_registros'] - por_grupo['total_registros'].transform('mean')
+    resumo['desvio_registros'] = np.sqrt((centrado * centrado).groupby(tabela['grupo'], observed=True).mean())
+    resumo['cv'] = resumo['desvio_registros'] / resumo['media_registros']
+    resumo['correlacao'] = correlacoes_por_grupo(tabela, 'total_registros', 'taxa_eficiencia')['coeficiente']
+    return resumo
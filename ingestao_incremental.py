@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Ingestão Incremental
+====================
+Mantém uma marca d'água por aba (número de linhas já processadas e hash das
+últimas linhas) junto com o estado agregado das métricas. Como os colaboradores
+apenas acrescentam linhas às suas abas, cada execução processa somente as linhas
+novas e as soma ao estado guardado. Se o hash do prefixo não confere, a aba é
+recalculada do início.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from collections import deque
+from itertools import islice
+
+from cache_planilhas import impressao_digital
+from leitura_streaming import iterar_linhas, agrupar_em_blocos, TAMANHO_BLOCO_PADRAO
+
+logger = logging.getLogger(__name__)
+
+VERSAO_ESTADO = 1
+LINHAS_HASH_PADRAO = 50
+
+
+def hash_linhas(colunas, linhas):
+    """
+    Calcula o hash do cabeçalho e de uma sequência de linhas brutas.
+
+    Args:
+        colunas (list): Nomes das colunas
+        linhas (iterable): Tuplas de valores
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    sha = hashlib.sha256()
+    sha.update(repr(list(colunas)).encode('utf-8'))
+    for linha in linhas:
+        sha.update(repr(tuple(linha)).encode('utf-8'))
+    return sha.hexdigest()
+
+
+class IngestaoIncremental:
+    """
+    Controla as marcas d'água por aba e o estado agregado persistido em JSON.
+    """
+
+    def __init__(self, arquivo_estado, linhas_hash=LINHAS_HASH_PADRAO, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+        """
+        Args:
+            arquivo_estado (str): Caminho do arquivo JSON com as marcas d'água
+            linhas_hash (int): Quantidade de linhas finais incluídas no hash de verificação
+            tamanho_bloco (int): Linhas por bloco entregue aos agregadores
+        """
+        self.arquivo_estado = arquivo_estado
+        self.linhas_hash = linhas_hash
+        self.tamanho_bloco = tamanho_bloco
+        self.estado = self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.arquivo_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+            if estado.get('versao') == VERSAO_ESTADO:
+                return estado
+        except (OSError, ValueError):
+            pass
+        return {'versao': VERSAO_ESTADO, 'abas': {}}
+
+    def salvar(self):
+        """Grava o estado de forma atômica"""
+        diretorio = os.path.dirname(self.arquivo_estado)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        temporario = self.arquivo_estado + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, ensure_ascii=False, default=str)
+        os.replace(temporario, self.arquivo_estado)
+
+    @staticmethod
+    def _chave(caminho, aba, perfil):
+        return f"{perfil}::{os.path.abspath(caminho)}::{aba}"
+
+    def marca_dagua(self, caminho, aba, perfil='padrao'):
+        """Retorna a marca d'água registrada para a aba, se houver"""
+        return self.estado['abas'].get(self._chave(caminho, aba, perfil))
+
+    def atualizar_aba(self, caminho, aba, criar_agregador, perfil='padrao', normalizar=None):
+        """
+        Atualiza o estado agregado de uma aba processando apenas as linhas novas.
+
+        Args:
+            caminho (str): Caminho do arquivo Excel
+            aba (str): Nome da aba
+            criar_agregador (callable): Fábrica de AgregadorIncremental vazio
+            perfil (str): Identifica a configuração do agregador; estados de perfis
+                diferentes não se misturam
+            normalizar (callable, optional): Função aplicada aos nomes das colunas
+
+        Returns:
+            dict: Agregador atualizado, modo ('inalterado', 'incremental' ou 'completo')
+                e número de linhas processadas
+        """
+        chave = self._chave(caminho, aba, perfil)
+        marca = self.estado['abas'].get(chave)
+        agregador = criar_agregador()
+
+        impressao = impressao_digital(caminho, calcular_hash=False)
+        impressao = {'tamanho': impressao['tamanho'], 'mtime': impressao['mtime']}
+
+        # Arquivo idêntico ao da última execução: nada a ler
+        if marca and marca.get('impressao') == impressao:
+            agregador.carregar_estado(marca['agregado'])
+            return {'agregador': agregador, 'modo': 'inalterado', 'linhas_processadas': 0}
+
+        linhas = iterar_linhas(caminho, aba, normalizar)
+        colunas = next(linhas, None)
+        if colunas is None:
+            colunas = []
+        ultimas = deque(maxlen=self.linhas_hash)
+        posicao = 0
+        modo = 'completo'
+
+        if marca and colunas:
+            inicio_verificacao = max(0, marca['linhas'] - self.linhas_hash)
+            for linha in islice(linhas, marca['linhas']):
+                if posicao >= inicio_verificacao:
+                    ultimas.append(linha)
+                posicao += 1
+
+            if posicao == marca['linhas'] and hash_linhas(colunas, ultimas) == marca['hash_sufixo']:
+                agregador.carregar_estado(marca['agregado'])
+                modo = 'incremental'
+            else:
+                logger.info(f"Prefixo alterado na aba {aba}; recalculando do início")
+                linhas.close()
+                linhas = iterar_linhas(caminho, aba, normalizar)
+                colunas = next(linhas, None) or []
+                ultimas.clear()
+                posicao = 0
+
+        linhas_anteriores = posicao
+
+        def acompanhar(origem):
+            nonlocal posicao
+            for linha in origem:
+                ultimas.append(linha)
+                posicao += 1
+                yield linha
+
+        agregador.consumir(agrupar_em_blocos(colunas, acompanhar(linhas), self.tamanho_bloco))
+
+        self.estado['abas'][chave] = {
+            'linhas': posicao,
+            'hash_sufixo': hash_linhas(colunas, ultimas),
+            'impressao': impressao,
+            'agregado': agregador.para_dict()
+        }
+
+        logger.info(f"Aba {aba}: modo {modo}, {posicao - linhas_anteriores} linhas processadas")
+        return {'agregador': agregador, 'modo': modo, 'linhas_processadas': posicao - linhas_anteriores}
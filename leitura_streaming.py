@@ -0,0 +1,444 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Leitura em Streaming de Planilhas
+=================================
+Lê as abas dos colaboradores com os iteradores somente-leitura do openpyxl
+(read_only=True, data_only=True) em blocos de tamanho fixo, alimentando
+agregadores incrementais. O uso de memória depende do tamanho do bloco e não
+do número de linhas da aba.
+"""
+
+import numpy as np
+import pandas as pd
+from collections import Counter, defaultdict
+from openpyxl import load_workbook
+
+from datas import converter_datas
+from categorias import dicionario_padrao, contar
+from estatisticas_online import MediaVariancia, Maximo, HistogramaQuantis, SketchKLL, quantis_de_dict
+from tendencias import ajustar, formato_tendencia, formato_tendencias, R2_CONSTANTE_SKLEARN
+
+TAMANHO_BLOCO_PADRAO = 5000
+STATUS_POSITIVOS = ['VERIFICADO', 'APROVADO', 'QUITADO']
+SEGUNDOS_POR_DIA = 86400
+
+
+def iterar_linhas(caminho, aba, normalizar=None, colunas=None, contendo=None):
+    """
+    Itera sobre as linhas brutas de uma aba usando openpyxl somente-leitura.
+
+    O primeiro item produzido é a lista com os nomes das colunas; os seguintes são
+    tuplas com os valores de cada linha. Linhas vazias no meio da aba são mantidas
+    (como faz o pd.read_excel) e as linhas vazias finais são descartadas.
+
+    Args:
+        caminho (str): Caminho para o arquivo Excel
+        aba (str): Nome da aba
+        normalizar (callable, optional): Função aplicada aos nomes das colunas
+        colunas (list, optional): Nomes (já normalizados) das colunas a manter
+        contendo (list, optional): Trechos de nome de colunas adicionais a manter
+
+    Yields:
+        list | tuple: Nomes das colunas e, em seguida, os valores de cada linha
+    """
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = wb[aba].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+
+        nomes = []
+        for i, nome in enumerate(cabecalho):
+            nome = f'Unnamed: {i}' if nome is None else nome
+            nomes.append(normalizar(nome) if normalizar else nome)
+
+        # Projeção: apenas as colunas pedidas são extraídas de cada linha
+        indices = [
+            i for i, nome in enumerate(nomes)
+            if (colunas is None and contendo is None)
+            or (colunas is not None and nome in colunas)
+            or (contendo is not None and any(trecho in str(nome) for trecho in contendo))
+        ]
+        yield [nomes[i] for i in indices]
+
+        largura = len(indices)
+        vazias_pendentes = 0
+        for linha in linhas:
+            if all(valor is None for valor in linha):
+                vazias_pendentes += 1
+                continue
+
+            # Linhas vazias só contam quando seguidas de uma linha com dados
+            for _ in range(vazias_pendentes):
+                yield (None,) * largura
+            vazias_pendentes = 0
+
+            yield tuple(linha[i] if i < len(linha) else None for i in indices)
+    finally:
+        wb.close()
+
+
+def agrupar_em_blocos(colunas, linhas, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """
+    Agrupa um iterador de linhas brutas em DataFrames de tamanho fixo.
+
+    Args:
+        colunas (list): Nomes das colunas
+        linhas (iterable): Tuplas de valores
+        tamanho_bloco (int): Número máximo de linhas por bloco
+
+    Yields:
+        pandas.DataFrame: Bloco com até `tamanho_bloco` linhas
+    """
+    bloco = []
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= tamanho_bloco:
+            yield pd.DataFrame(bloco, columns=colunas)
+            bloco = []
+    if bloco:
+        yield pd.DataFrame(bloco, columns=colunas)
+
+
+def iterar_blocos(caminho, aba, tamanho_bloco=TAMANHO_BLOCO_PADRAO, normalizar=None, colunas=None, contendo=None):
+    """
+    Itera sobre uma aba em blocos de linhas, sem montar o DataFrame completo.
+
+    Args:
+        caminho (str): Caminho para o arquivo Excel
+        aba (str): Nome da aba
+        tamanho_bloco (int): Número máximo de linhas por bloco
+        normalizar (callable, optional): Função aplicada aos nomes das colunas
+        colunas (list, optional): Nomes (já normalizados) das colunas a manter
+        contendo (list, optional): Trechos de nome de colunas adicionais a manter
+
+    Yields:
+        pandas.DataFrame: Bloco com até `tamanho_bloco` linhas
+    """
+    linhas = iterar_linhas(caminho, aba, normalizar, colunas, contendo)
+    colunas = next(linhas, None)
+    if colunas is None:
+        return
+    yield from agrupar_em_blocos(colunas, linhas, tamanho_bloco)
+
+
+def status_avancado(bloco):
+    """
+    Deriva o status de cada registro como em AnalisadorAvancado.processar_dados_colaborador:
+    PENDENTE por padrão, VERIFICADO quando há RESOLUÇÃO e QUITADO quando há ÚLTIMO PAGAMENTO.
+    Espera os nomes lógicos de esquema_colunas e devolve uma coluna categórica.
+    """
+    codigos = np.full(len(bloco), dicionario_padrao.codigo('status', 'PENDENTE'))
+    if 'RESOLUCAO' in bloco.columns:
+        codigos[bloco['RESOLUCAO'].notna().to_numpy()] = dicionario_padrao.codigo('status', 'VERIFICADO')
+    if 'ÚLTIMO PAGAMENTO' in bloco.columns:
+        codigos[bloco['ÚLTIMO PAGAMENTO'].notna().to_numpy()] = dicionario_padrao.codigo('status', 'QUITADO')
+    return pd.Series(dicionario_padrao.de_codigos('status', codigos), index=bloco.index)
+
+
+def _segundos_para_dias(segundos):
+    """Converte durações em segundos para dias inteiros, arredondando para baixo como Timedelta.days"""
+    return np.floor_divide(np.asarray(segundos, dtype='int64'), SEGUNDOS_POR_DIA)
+
+
+def _quantis_em_dias(quantis):
+    """Converte para dias um acumulador de quantis gravado em segundos por versões anteriores"""
+    if isinstance(quantis, SketchKLL):
+        quantis.niveis = [np.floor(nivel / SEGUNDOS_POR_DIA) for nivel in quantis.niveis]
+        return quantis
+    dias = HistogramaQuantis()
+    for segundos, n in quantis.contagens.items():
+        dias.contagens[int(segundos // SEGUNDOS_POR_DIA)] += n
+    return dias
+
+
+class AgregadorIncremental:
+    """
+    Agrega contagens de status, contagens diárias e tempos de resolução bloco a bloco.
+
+    O estado guardado é proporcional ao número de dias e de status distintos, nunca ao
+    número de linhas lidas. Os tempos de resolução alimentam uma média/variância de
+    Welford em segundos e um histograma exato em dias inteiros (mediana e quartis), ou
+    um sketch KLL quando k_quantis é informado; as contagens diárias
+    mantêm somas e máximos correntes por status. Cada bloco atualiza as estatísticas em
+    O(linhas do bloco), e dois agregadores podem ser combinados com mesclar.
+    """
+
+    def __init__(self, coluna_data='DATA', coluna_situacao='SITUACAO', coluna_resolucao='RESOLUCAO',
+                 classificar=None, descartar_sem_data=False, formato_data=None, origem=None, arquivo=None,
+                 k_quantis=None):
+        self.coluna_data = coluna_data
+        self.coluna_situacao = coluna_situacao
+        self.coluna_resolucao = coluna_resolucao
+        self.classificar = classificar
+        self.descartar_sem_data = descartar_sem_data
+        self.formato_data = formato_data
+        self.origem = origem
+        self.arquivo = arquivo
+        self.k_quantis = k_quantis
+
+        self.total_registros = 0
+        self.contagem_status = Counter()
+        self.contagem_diaria = defaultdict(Counter)
+        self.media_resolucao = MediaVariancia()
+        self.tempos_resolucao = self._novo_quantis()
+        self.soma_diaria = Counter()
+        self.maximo_diario = defaultdict(Maximo)
+        self.dias_com_status = 0
+        self.prioridades = Counter()
+        self.possui_data = False
+        self.possui_situacao = False
+        self.possui_resolucao = False
+
+    def _novo_quantis(self):
+        """Histograma exato dos tempos de resolução ou, com k_quantis, sketch KLL de memória limitada"""
+        return HistogramaQuantis() if self.k_quantis is None else SketchKLL(self.k_quantis)
+
+    def _converter_datas(self, bloco, coluna):
+        """Converte uma coluna de datas do bloco; com origem definida, o formato detectado vale para os blocos seguintes"""
+        chave = (self.origem, coluna) if self.origem is not None else None
+        return converter_datas(bloco[coluna], chave=chave, formato=self.formato_data, arquivo=self.arquivo)
+
+    def atualizar(self, bloco):
+        """Incorpora um bloco de linhas ao estado do agregador"""
+        datas = None
+        if self.coluna_data in bloco.columns:
+            self.possui_data = True
+            datas = self._converter_datas(bloco, self.coluna_data)
+            if self.descartar_sem_data:
+                validas = datas.notna()
+                bloco = bloco[validas]
+                datas = datas[validas]
+
+        self.total_registros += len(bloco)
+
+        if self.classificar is not None:
+            status = self.classificar(bloco)
+            self.possui_situacao = True
+        elif self.coluna_situacao in bloco.columns:
+            status = bloco[self.coluna_situacao]
+            self.possui_situacao = True
+        else:
+            status = None
+
+        if status is not None:
+            self.contagem_status.update({valor: int(n) for valor, n in contar(status).items()})
+
+        if datas is not None:
+            dias = datas.dt.date
+            for dia in dias.dropna().unique():
+                self.contagem_diaria[dia.isoformat()]
+            if status is not None:
+                pares = pd.DataFrame({'dia': dias, 'status': status}).dropna()
+                for (dia, valor), n in pares.groupby(['dia', 'status'], observed=True).size().items():
+                    self._somar_dia(dia.isoformat(), valor, int(n))
+
+            if self.coluna_resolucao in bloco.columns:
+                self.possui_resolucao = True
+                resolucoes = self._converter_datas(bloco, self.coluna_resolucao)
+                segundos = ((resolucoes - datas).dropna().dt.total_seconds()).astype('int64').to_numpy()
+                self.media_resolucao.atualizar(segundos)
+                # Os quantis ficam em dias inteiros, a unidade das métricas: horários nas
+                # células não criam novas entradas no histograma
+                self.tempos_resolucao.atualizar(_segundos_para_dias(segundos))
+
+        colunas_prioridade = [col for col in bloco.columns if 'PRIORIDADE' in str(col)]
+        if colunas_prioridade:
+            self.prioridades.update(bloco[colunas_prioridade[-1]].dropna().tolist())
+
+    def _somar_dia(self, dia, valor, n):
+        """Soma n registros de um status em um dia, mantendo somas e máximos correntes"""
+        contagem = self.contagem_diaria[dia]
+        if not contagem:
+            self.dias_com_status += 1
+        contagem[valor] += n
+        self.soma_diaria[valor] += n
+        self.maximo_diario[valor].atualizar([contagem[valor]])
+
+    def mesclar(self, outro):
+        """
+        Incorpora o estado de outro agregador, alimentado com outras linhas da mesma aba.
+
+        Args:
+            outro (AgregadorIncremental): Agregador parcial (ex.: de outro worker)
+
+        Returns:
+            AgregadorIncremental: O próprio agregador
+        """
+        self.total_registros += outro.total_registros
+        self.contagem_status.update(outro.contagem_status)
+        for dia, contagem in outro.contagem_diaria.items():
+            self.contagem_diaria[dia]
+            for valor, n in contagem.items():
+                self._somar_dia(dia, valor, n)
+        self.media_resolucao.mesclar(outro.media_resolucao)
+        self.tempos_resolucao.mesclar(outro.tempos_resolucao)
+        self.prioridades.update(outro.prioridades)
+        self.possui_data |= outro.possui_data
+        self.possui_situacao |= outro.possui_situacao
+        self.possui_resolucao |= outro.possui_resolucao
+        return self
+
+    def para_dict(self):
+        """Serializa o estado do agregador em um dicionário compatível com JSON"""
+        return {
+            'total_registros': self.total_registros,
+            'contagem_status': list(self.contagem_status.items()),
+            'contagem_diaria': {dia: list(c.items()) for dia, c in self.contagem_diaria.items()},
+            'media_resolucao': self.media_resolucao.para_dict(),
+            'tempos_resolucao': self.tempos_resolucao.para_dict(),
+            'unidade_tempos_resolucao': 'dias',
+            'soma_diaria': list(self.soma_diaria.items()),
+            'maximo_diario': {valor: m.para_dict() for valor, m in self.maximo_diario.items()},
+            'dias_com_status': self.dias_com_status,
+            'prioridades': list(self.prioridades.items()),
+            'possui_data': self.possui_data,
+            'possui_situacao': self.possui_situacao,
+            'possui_resolucao': self.possui_resolucao
+        }
+
+    def carregar_estado(self, estado):
+        """Restaura um estado produzido por para_dict, mantendo a configuração do agregador"""
+        self.total_registros = estado['total_registros']
+        self.contagem_status = Counter(dict(estado['contagem_status']))
+        self.contagem_diaria = defaultdict(Counter, {
+            dia: Counter(dict(pares)) for dia, pares in estado['contagem_diaria'].items()
+        })
+        self.prioridades = Counter(dict(estado['prioridades']))
+        if 'media_resolucao' in estado:
+            self.media_resolucao = MediaVariancia.de_dict(estado['media_resolucao'])
+            self.tempos_resolucao = quantis_de_dict(estado['tempos_resolucao'])
+            if estado.get('unidade_tempos_resolucao') != 'dias':
+                self.tempos_resolucao = _quantis_em_dias(self.tempos_resolucao)
+            self.soma_diaria = Counter(dict(estado['soma_diaria']))
+            self.maximo_diario = defaultdict(Maximo, {
+                valor: Maximo.de_dict(m) for valor, m in estado['maximo_diario'].items()
+            })
+            self.dias_com_status = estado['dias_com_status']
+        else:
+            # Estado gravado antes dos acumuladores: reconstruí-los a partir das contagens
+            historico = HistogramaQuantis.de_dict({'contagens': estado['tempos_resolucao']})
+            segundos = np.repeat(list(historico.contagens), list(historico.contagens.values()))
+            self.media_resolucao = MediaVariancia().atualizar(segundos)
+            dias = _quantis_em_dias(historico)
+            self.tempos_resolucao = dias if self.k_quantis is None else self._novo_quantis().atualizar(
+                np.repeat(list(dias.contagens), list(dias.contagens.values())))
+            contagem_diaria, self.contagem_diaria = self.contagem_diaria, defaultdict(Counter)
+            self.soma_diaria, self.maximo_diario, self.dias_com_status = Counter(), defaultdict(Maximo), 0
+            for dia, contagem in contagem_diaria.items():
+                self.contagem_diaria[dia]
+                for valor, n in contagem.items():
+                    self._somar_dia(dia, valor, n)
+        self.possui_data = estado['possui_data']
+        self.possui_situacao = estado['possui_situacao']
+        self.possui_resolucao = estado['possui_resolucao']
+        return self
+
+    def consumir(self, blocos):
+        """Consome um iterador de blocos e retorna o próprio agregador"""
+        for bloco in blocos:
+            self.atualizar(bloco)
+        return self
+
+    def _contagens_por_dia(self):
+        dias = sorted(self.contagem_diaria)
+        return dias, [sum(self.contagem_diaria[dia].values()) for dia in dias]
+
+    def metricas_excel(self, nome):
+        """
+        Monta as métricas no mesmo formato de AnalisadorExcel.calcular_metricas_colaborador.
+
+        Args:
+            nome (str): Nome do colaborador
+
+        Returns:
+            dict: Métricas do colaborador
+        """
+        total = self.total_registros
+        metricas = {
+            'nome': nome,
+            'total_registros': total,
+            'distribuicao_status': {},
+            'tempo_medio_resolucao': None,
+            'taxa_resolucao': 0,
+            'eficiencia': {},
+            'tendencias': {},
+            'correlacoes': {},
+            'outliers': {},
+            'sazonalidade': {}
+        }
+
+        if self.possui_situacao:
+            distribuicao = dict(self.contagem_status.most_common())
+            metricas['distribuicao_status'] = distribuicao
+            metricas['percentuais'] = {k: v / total * 100 for k, v in distribuicao.items()}
+
+        if self.possui_resolucao and self.tempos_resolucao.n:
+            # A média de Welford é arredondada ao microssegundo para que médias inteiras
+            # em dias não caiam no dia anterior por erro de ponto flutuante
+            metricas['tempo_medio_resolucao'] = pd.Timedelta(seconds=round(self.media_resolucao.media, 6)).days
+            metricas['tempo_mediano_resolucao'] = pd.Timedelta(days=self.tempos_resolucao.quantil(0.5)).days
+            metricas['outliers']['tempo_resolucao'] = self.tempos_resolucao.contar_outliers_iqr()
+
+        if self.possui_situacao:
+            positivos = sum(self.contagem_status.get(s, 0) for s in STATUS_POSITIVOS)
+            metricas['taxa_eficiencia'] = positivos / total if total > 0 else 0
+
+            if self.possui_data:
+                if self.dias_com_status:
+                    status_vistos = sorted(self.soma_diaria)
+                    metricas['media_diaria'] = {s: self.soma_diaria[s] / self.dias_com_status for s in status_vistos}
+                    metricas['max_diario'] = {s: self.maximo_diario[s].valor for s in status_vistos}
+
+        if self.possui_data and self.possui_situacao:
+            _, contagens = self._contagens_por_dia()
+            metricas['tendencias'].update(formato_tendencias(ajustar({nome: contagens}).loc[nome]))
+
+        if self.prioridades:
+            metricas['prioridades'] = dict(self.prioridades.most_common())
+
+        if self.possui_data:
+            padrao = Counter()
+            for dia, contagem in self.contagem_diaria.items():
+                padrao[pd.Timestamp(dia).day_name()] += sum(contagem.values())
+            metricas['padrao_semanal'] = dict(sorted(padrao.items()))
+
+        return metricas
+
+    def metricas_avancadas(self):
+        """
+        Monta as métricas no mesmo formato de AnalisadorAvancado.processar_dados_colaborador.
+
+        Returns:
+            dict: Métricas do colaborador, ou None se não houver registros com data válida
+        """
+        if self.total_registros == 0:
+            return None
+
+        total = self.total_registros
+        distribuicao = dict(self.contagem_status.most_common())
+        dias, contagens = self._contagens_por_dia()
+
+        medias_diarias = {status: round(count / len(dias), 1) for status, count in distribuicao.items()}
+
+        tendencia = formato_tendencia(ajustar({0: contagens}, r2_constante=R2_CONSTANTE_SKLEARN).loc[0])
+
+        padrao = Counter()
+        for dia, contagem in zip(dias, contagens):
+            padrao[pd.Timestamp(dia).day_name()] += contagem
+
+        total_processados = sum(v for k, v in distribuicao.items() if k in ['VERIFICADO', 'QUITADO'])
+        taxa_eficiencia = (total_processados / total) * 100
+
+        return {
+            'total_registros': total,
+            'distribuicao_status': distribuicao,
+            'medias_diarias': medias_diarias,
+            'tendencia': tendencia,
+            'padrao_semanal': dict(padrao.most_common()),
+            'taxa_eficiencia': round(taxa_eficiencia, 1),
+            'analise_diaria': {dia: dict(self.contagem_diaria[dia]) for dia in dias}
+        }
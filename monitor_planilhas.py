@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Monitor de Planilhas
+====================
+Observa os arquivos de entrada e dispara o reprocessamento quando algum deles é
+salvo. A detecção é feita por consulta periódica: tamanho e mtime indicam uma
+possível alteração, que só é confirmada pelo hash do conteúdo.
+
+Enquanto o Excel grava o arquivo, tamanho e mtime continuam mudando; o arquivo só
+é considerado pronto depois de ficar estável por um intervalo de espera.
+
+Um arquivo alterado só é marcado como processado quando o reprocessamento dá
+certo; se falhar, é entregue de novo na consulta seguinte.
+"""
+
+import os
+import time
+import logging
+
+from cache_planilhas import impressao_digital
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_PADRAO = 5.0
+ESPERA_ESTABILIDADE_PADRAO = 3.0
+
+
+class MonitorPlanilhas:
+    """
+    Consulta periodicamente um conjunto de arquivos e entrega os que mudaram.
+    """
+
+    def __init__(self, arquivos, ao_alterar, intervalo=INTERVALO_PADRAO,
+                 espera_estabilidade=ESPERA_ESTABILIDADE_PADRAO, relogio=time.monotonic):
+        """
+        Args:
+            arquivos (dict): Nome do grupo -> caminho do arquivo
+            ao_alterar (callable): Recebe o dicionário grupo -> caminho dos arquivos alterados e
+                retorna True se os reprocessou com sucesso
+            intervalo (float): Segundos entre consultas
+            espera_estabilidade (float): Segundos sem mudança de tamanho/mtime antes de processar
+            relogio (callable): Fonte de tempo monotônica
+        """
+        self.arquivos = dict(arquivos)
+        self.ao_alterar = ao_alterar
+        self.intervalo = intervalo
+        self.espera_estabilidade = espera_estabilidade
+        self.relogio = relogio
+        self.estado = {}
+
+    def verificar(self, confirmar=True):
+        """
+        Faz uma consulta aos arquivos.
+
+        Args:
+            confirmar (bool): Marca os arquivos alterados como processados. Se False, eles
+                continuam sendo entregues até uma chamada a `confirmar`
+
+        Returns:
+            dict: Grupo -> caminho dos arquivos cujo conteúdo mudou e já está estável
+        """
+        agora = self.relogio()
+        alterados = {}
+
+        for grupo, arquivo in self.arquivos.items():
+            try:
+                info = os.stat(arquivo)
+            except OSError:
+                # Arquivo ausente ou sendo substituído: aguardar a próxima consulta
+                continue
+
+            assinatura = (info.st_size, info.st_mtime_ns)
+            estado = self.estado.get(arquivo)
+            if estado is None:
+                # Primeira observação: o arquivo já é considerado estável
+                estado = {'assinatura': assinatura, 'desde': agora - self.espera_estabilidade,
+                          'processada': None, 'hash': None}
+                self.estado[arquivo] = estado
+            elif assinatura != estado['assinatura']:
+                estado['assinatura'] = assinatura
+                estado['desde'] = agora
+
+            if assinatura == estado['processada']:
+                continue
+            if agora - estado['desde'] < self.espera_estabilidade:
+                logger.debug(f"{arquivo} ainda em gravação; aguardando estabilidade")
+                continue
+
+            try:
+                hash_conteudo = impressao_digital(arquivo)['hash']
+            except OSError as e:
+                logger.debug(f"{arquivo} indisponível para leitura: {str(e)}")
+                continue
+
+            if hash_conteudo == estado['hash']:
+                estado['processada'] = assinatura
+                continue
+            estado['pendente'] = (assinatura, hash_conteudo)
+            alterados[grupo] = arquivo
+
+        if confirmar:
+            self.confirmar(alterados)
+        return alterados
+
+    def confirmar(self, alterados):
+        """
+        Marca como processados os arquivos entregues por `verificar`.
+
+        Args:
+            alterados (dict): Grupo -> caminho, como retornado por `verificar`
+        """
+        for arquivo in alterados.values():
+            estado = self.estado.get(arquivo)
+            pendente = estado.pop('pendente', None) if estado else None
+            if pendente:
+                estado['processada'], estado['hash'] = pendente
+
+    def ciclo(self):
+        """
+        Faz uma consulta e entrega os arquivos alterados a `ao_alterar`.
+
+        Os arquivos só são marcados como processados se `ao_alterar` retornar True; se
+        retornar outro valor ou lançar uma exceção, são entregues de novo na próxima consulta.
+
+        Returns:
+            dict: Grupo -> caminho dos arquivos entregues nesta consulta
+        """
+        alterados = self.verificar(confirmar=False)
+        if not alterados:
+            return alterados
+
+        logger.info(f"Arquivos alterados: {', '.join(alterados.values())}")
+        try:
+            sucesso = self.ao_alterar(alterados) is True
+        except Exception as e:
+            logger.error(f"Falha ao reprocessar arquivos alterados: {str(e)}")
+            sucesso = False
+
+        if sucesso:
+            self.confirmar(alterados)
+        else:
+            logger.warning("Reprocessamento sem sucesso; nova tentativa na próxima consulta")
+        return alterados
+
+    def executar(self, max_ciclos=None):
+        """
+        Consulta os arquivos em laço até ser interrompido.
+
+        Args:
+            max_ciclos (int, optional): Número máximo de consultas. Se None, executa indefinidamente
+        """
+        logger.info(f"Monitorando {len(self.arquivos)} arquivos a cada {self.intervalo}s")
+        ciclos = 0
+        try:
+            while max_ciclos is None or ciclos < max_ciclos:
+                self.ciclo()
+                ciclos += 1
+                if max_ciclos is None or ciclos < max_ciclos:
+                    time.sleep(self.intervalo)
+        except KeyboardInterrupt:
+            logger.info("Monitoramento encerrado")
@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Motor de Métricas
+=================
+Calcula as métricas de todos os colaboradores de uma vez, sobre um único
+DataFrame longo com as chaves `colaborador` e `grupo`.
+
+Em vez de um conjunto de groupby/value_counts por aba, cada métrica é obtida com
+um groupby de várias chaves sobre todas as abas empilhadas. O resultado é
+entregue nos mesmos formatos de AnalisadorExcel.calcular_metricas_colaborador e
+AnalisadorAvancado.processar_dados_colaborador, consumidos pelos dashboards.
+
+As métricas do formato de AnalisadorExcel são nós de GRAFO_EXCEL (ver
+grafo_metricas): um consumidor que pede apenas algumas delas paga só por esses nós
+e suas dependências.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from datas import converter_datas
+from categorias import dicionario_padrao
+from esquema_colunas import aplicar_categorias
+from leitura_streaming import status_avancado, STATUS_POSITIVOS
+from tendencias import (ajustar_agrupado, formato_tendencia, formato_tendencias,
+                        R2_CONSTANTE_LINREGRESS, R2_CONSTANTE_SKLEARN)
+from grafo_metricas import GrafoMetricas, Avaliacao
+
+# Status considerados processados na taxa de eficiência do formato avançado
+STATUS_PROCESSADOS = ['VERIFICADO', 'QUITADO']
+# Nomes de Series.dt.day_name, na ordem de Series.dt.dayofweek
+DIAS_SEMANA = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _por_colaborador(serie, ordenar=False):
+    """Separa uma série indexada por (colaborador, chave) em {colaborador: {chave: valor}}"""
+    resultado = {}
+    for colaborador, valores in serie.groupby(level=0, observed=True):
+        valores = valores.droplevel(0)
+        if ordenar:
+            valores = valores.sort_values(ascending=False, kind='stable')
+        resultado[colaborador] = valores.to_dict()
+    return resultado
+
+
+def _dias_semana(datas):
+    """
+    Equivalente a datas.dt.day_name(), calculado a partir de dt.dayofweek.
+
+    Returns:
+        pandas.Series: Coluna categórica com os nomes em ordem alfabética, como ordena um groupby
+    """
+    ordem = sorted(DIAS_SEMANA)
+    posicoes = np.array([ordem.index(dia) for dia in DIAS_SEMANA])
+    dias = datas.dt.dayofweek.fillna(-1).to_numpy(dtype=np.int64)
+    codigos = np.where(dias >= 0, posicoes[dias], -1)
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=ordem), index=datas.index)
+
+
+# Métricas do formato de AnalisadorExcel, com os valores padrão das chaves sempre presentes
+PADROES_EXCEL = {
+    'distribuicao_status': {},
+    'tempo_medio_resolucao': None,
+    'taxa_resolucao': 0,
+    'eficiencia': {},
+    'tendencias': {},
+    'correlacoes': {},
+    'outliers': {},
+    'sazonalidade': {}
+}
+METRICAS_EXCEL = tuple(PADROES_EXCEL) + (
+    'percentuais', 'tempo_mediano_resolucao', 'taxa_eficiencia', 'media_diaria', 'max_diario',
+    'prioridades', 'padrao_semanal'
+)
+
+# Cada nó recebe o motor e/ou as métricas de que depende e retorna {colaborador: valor}
+GRAFO_EXCEL = GrafoMetricas()
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor'])
+def totais(motor):
+    return {colaborador: len(df) for colaborador, df in motor.partes}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor'])
+def registros(motor):
+    return motor.registros()
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor', 'registros'], colunas=['SITUACAO'])
+def distribuicao_status(motor, registros):
+    """Contagem de cada situação, da mais frequente para a menos frequente"""
+    com_situacao = motor._possuem('SITUACAO')
+    if not com_situacao:
+        return {}
+    contagem = registros.groupby([registros['colaborador'], 'SITUACAO'], observed=True).size()
+    distribuicoes = _por_colaborador(contagem, ordenar=True)
+    return {nome: distribuicoes.get(nome, {}) for nome in com_situacao}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['distribuicao_status', 'totais'])
+def percentuais(distribuicao_status, totais):
+    return {nome: {s: n / totais[nome] * 100 for s, n in distribuicao.items()}
+            for nome, distribuicao in distribuicao_status.items()}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor', 'registros'], colunas=['DATA', 'RESOLUCAO'])
+def tempos_resolucao(motor, registros):
+    """Tempos de resolução válidos, com o colaborador de cada um (None sem as colunas)"""
+    if not motor._possuem('DATA', 'RESOLUCAO'):
+        return None
+    tempos = registros['RESOLUCAO'] - registros['DATA']
+    validos = tempos.notna()
+    return pd.DataFrame({'colaborador': registros['colaborador'][validos], 'tempo': tempos[validos]})
+
+
+@GRAFO_EXCEL.metrica(dependencias=['tempos_resolucao'])
+def tempo_medio_resolucao(tempos_resolucao):
+    if tempos_resolucao is None:
+        return {}
+    medias = tempos_resolucao.groupby('colaborador', observed=True)['tempo'].mean()
+    return {nome: media.days for nome, media in medias.items()}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['tempos_resolucao'])
+def tempo_mediano_resolucao(tempos_resolucao):
+    if tempos_resolucao is None:
+        return {}
+    medianas = tempos_resolucao.groupby('colaborador', observed=True)['tempo'].median()
+    return {nome: mediana.days for nome, mediana in medianas.items()}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['tempos_resolucao'])
+def outliers(tempos_resolucao):
+    """Tempos de resolução fora de [Q1 - 1,5*IQR, Q3 + 1,5*IQR]"""
+    if tempos_resolucao is None:
+        return {}
+    tempos = tempos_resolucao['tempo']
+    por_colaborador = tempos.groupby(tempos_resolucao['colaborador'], observed=True)
+    q1 = por_colaborador.transform('quantile', 0.25)
+    q3 = por_colaborador.transform('quantile', 0.75)
+    iqr = q3 - q1
+    fora = (tempos < q1 - 1.5 * iqr) | (tempos > q3 + 1.5 * iqr)
+    n_outliers = fora.groupby(tempos_resolucao['colaborador'], observed=True).sum()
+    return {nome: {'tempo_resolucao': int(n)} for nome, n in n_outliers.items()}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor', 'registros', 'totais'], colunas=['SITUACAO'])
+def taxa_eficiencia(motor, registros, totais):
+    com_situacao = motor._possuem('SITUACAO')
+    if not com_situacao:
+        return {}
+    positivos = registros['SITUACAO'].isin(STATUS_POSITIVOS).groupby(registros['colaborador'], observed=True).sum()
+    return {nome: positivos.get(nome, 0) / totais[nome] if totais[nome] > 0 else 0 for nome in com_situacao}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor', 'registros'], colunas=['DATA'])
+def dia(motor, registros):
+    """Data de cada registro sem o horário (None se nenhuma aba possui DATA)"""
+    if not motor._possuem('DATA'):
+        return None
+    return registros['DATA'].dt.normalize()
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor', 'registros', 'dia'], colunas=['DATA', 'SITUACAO'])
+def contagem_diaria(motor, registros, dia):
+    """Registros por (colaborador, dia) e situação (None sem as colunas)"""
+    if dia is None or not motor._possuem('DATA', 'SITUACAO'):
+        return None
+    return registros.groupby([registros['colaborador'], dia, 'SITUACAO'], observed=True).size().unstack(fill_value=0)
+
+
+def _resumo_diario(contagem_diaria, distribuicao_status, funcao):
+    """Aplica `funcao` às contagens diárias de cada colaborador, restrita às situações observadas"""
+    if contagem_diaria is None:
+        return {}
+    resumo = contagem_diaria.groupby(level=0, observed=True).agg(funcao)
+    return {nome: {s: v for s, v in valores.items() if s in distribuicao_status.get(nome, {})}
+            for nome, valores in resumo.to_dict('index').items()}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['contagem_diaria', 'distribuicao_status'])
+def media_diaria(contagem_diaria, distribuicao_status):
+    return _resumo_diario(contagem_diaria, distribuicao_status, 'mean')
+
+
+@GRAFO_EXCEL.metrica(dependencias=['contagem_diaria', 'distribuicao_status'])
+def max_diario(contagem_diaria, distribuicao_status):
+    return _resumo_diario(contagem_diaria, distribuicao_status, 'max')
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor', 'registros', 'dia'], colunas=['DATA', 'SITUACAO'])
+def tendencias(motor, registros, dia):
+    """Reta ajustada às contagens diárias de cada colaborador"""
+    if dia is None or not motor._possuem('DATA', 'SITUACAO'):
+        return {}
+    por_dia = registros.groupby([registros['colaborador'], dia], observed=True)['SITUACAO'].count()
+    return {nome: formato_tendencias(ajuste)
+            for nome, ajuste in ajustar_agrupado(por_dia, R2_CONSTANTE_LINREGRESS).iterrows()}
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor'], colunas=['PRIORIDADE'])
+def prioridades(motor):
+    """Contagem da última coluna com PRIORIDADE no nome"""
+    resultado = {}
+    for nome, df in motor.partes:
+        prioridade_cols = [col for col in df.columns if 'PRIORIDADE' in col]
+        if prioridade_cols:
+            resultado[nome] = df[prioridade_cols[-1]].value_counts().to_dict()
+    return resultado
+
+
+@GRAFO_EXCEL.metrica(dependencias=['motor', 'registros', 'dia'], colunas=['DATA', 'SITUACAO'])
+def padrao_semanal(motor, registros, dia):
+    com_colunas = motor._possuem('DATA', 'SITUACAO')
+    if dia is None or not com_colunas:
+        return {}
+    semanal = registros.groupby([registros['colaborador'], _dias_semana(dia)],
+                                observed=True)['SITUACAO'].count()
+    padroes = _por_colaborador(semanal)
+    return {nome: padroes.get(nome, {}) for nome in com_colunas}
+
+
+class MotorMetricas:
+    """
+    Empilha as abas dos colaboradores e calcula as métricas de todos em conjunto.
+    """
+
+    def __init__(self, colunas_data=('DATA', 'RESOLUCAO'), formato_data=None):
+        """
+        Args:
+            colunas_data (tuple): Colunas lógicas convertidas para datetime ao adicionar uma aba
+            formato_data (str, optional): Formato preferencial passado ao conversor de datas
+        """
+        self.colunas_data = tuple(colunas_data)
+        self.formato_data = formato_data
+        self.partes = []
+        self.colunas = {}
+        self.grupos = {}
+        self._registros = None
+
+    def adicionar(self, colaborador, df, grupo=None, arquivo=None):
+        """
+        Adiciona a aba de um colaborador, já com os nomes lógicos de esquema_colunas.
+
+        Args:
+            colaborador (str): Nome do colaborador (nome da aba)
+            df (pandas.DataFrame): Dados da aba
+            grupo (str, optional): Grupo ao qual o colaborador pertence
+            arquivo (str, optional): Arquivo de origem da aba, usado no cache de formatos de data
+        """
+        df = df.copy()
+        for coluna in self.colunas_data:
+            if coluna in df.columns:
+                df[coluna] = converter_datas(df[coluna], chave=(colaborador, coluna), formato=self.formato_data,
+                                             arquivo=arquivo)
+
+        self.partes.append((colaborador, df))
+        self.colunas[colaborador] = list(df.columns)
+        self.grupos[colaborador] = grupo
+        self._registros = None
+
+    def registros(self):
+        """
+        Retorna todas as abas empilhadas em um único DataFrame.
+
+        Returns:
+            pandas.DataFrame: Registros com as colunas categóricas `colaborador` e `grupo`
+        """
+        if self._registros is None:
+            # As categorias podem ter crescido entre uma aba e outra: a primeira passada registra
+            # todos os valores e a segunda alinha as abas ao tipo final, para que o concat
+            # mantenha as colunas categóricas
+            partes = [aplicar_categorias(df) for _, df in self.partes]
+            partes = [aplicar_categorias(df) for df in partes]
+            if partes:
+                registros = pd.concat(partes, ignore_index=True, sort=False)
+            else:
+                registros = pd.DataFrame()
+
+
+            nomes = [colaborador for colaborador, _ in self.partes]
+            tamanhos = [len(df) for _, df in self.partes]
+            codigos = [dicionario_padrao.codigo('colaborador', nome) for nome in nomes]
+            registros['colaborador'] = dicionario_padrao.de_codigos(
+                'colaborador', np.repeat(np.asarray(codigos, dtype=np.int64), tamanhos))
+            registros['grupo'] = pd.Categorical(np.repeat(
+                np.asarray([self.grupos[nome] for nome in nomes], dtype=object), tamanhos))
+            self._registros = registros
+        return self._registros
+
+    def _possuem(self, *colunas):
+        """Colaboradores cujas abas possuem todas as colunas indicadas"""
+        return [nome for nome, presentes in self.colunas.items() if all(c in presentes for c in colunas)]
+
+    def metricas_excel(self, metricas=None):
+        """
+        Calcula as métricas no formato de AnalisadorExcel.calcular_metricas_colaborador.
+
+        Args:
+            metricas (iterable, optional): Nomes das métricas desejadas (chaves de METRICAS_EXCEL).
+                Apenas essas e suas dependências no grafo são calculadas. Por padrão, todas
+
+        Returns:
+            dict: Colaborador -> métricas, na ordem em que as abas foram adicionadas
+        """
+        metricas = list(METRICAS_EXCEL if metricas is None else metricas)
+        avaliacao = Avaliacao(GRAFO_EXCEL, motor=self)
+        resultado = {nome: {'nome': nome, 'total_registros': total} for nome, total in avaliacao['totais'].items()}
+        for metrica in metricas:
+            if metrica in PADROES_EXCEL:
+                for valores in resultado.values():
+                    valores[metrica] = copy.copy(PADROES_EXCEL[metrica])
+        if self.registros().empty:
+            return resultado
+
+        # As chaves sem nó (taxa_resolucao, eficiencia, ...) ficam com o valor padrão
+        calculadas = [m for m in metricas if m in GRAFO_EXCEL.nos or m not in PADROES_EXCEL]
+        for metrica, valores in avaliacao.obter(*calculadas).items():
+            for nome, valor in valores.items():
+                resultado[nome][metrica] = valor
+        return resultado
+
+    def metricas_avancadas(self):
+        """
+        Calcula as métricas no formato de AnalisadorAvancado.processar_dados_colaborador.
+
+        Returns:
+            dict: Colaborador -> métricas, ou None para abas sem DATA ou sem registros com data válida
+        """
+        metricas = {nome: None for nome in self.colunas}
+        registros = self.registros()
+        if registros.empty or 'DATA' not in registros.columns:
+            return metricas
+
+        registros = registros[registros['DATA'].notna()]
+        registros = registros.assign(Status=status_avancado(registros))
+        colaborador = registros['colaborador']
+        data = registros['DATA']
+
+        totais = colaborador.value_counts()
+        distribuicoes = _por_colaborador(
+            registros.groupby([colaborador, 'Status'], observed=True).size(), ordenar=True)
+        dias_unicos = data.groupby(colaborador, observed=True).nunique()
+
+        diario = registros.groupby([colaborador, data, 'Status'], observed=True).size()
+        analises_diarias = {}
+        for (nome, dia, status), n in diario.items():
+            analises_diarias.setdefault(nome, {}).setdefault(dia.strftime('%Y-%m-%d'), {})[status] = int(n)
+
+        ajustes = ajustar_agrupado(registros.groupby([colaborador, data], observed=True).size(),
+                                   R2_CONSTANTE_SKLEARN)
+
+        semanais = _por_colaborador(
+            registros.groupby([colaborador, _dias_semana(data)], observed=True).size(), ordenar=True)
+
+        for nome in self._possuem('DATA'):
+            total = int(totais.get(nome, 0))
+            if total == 0:
+                continue
+
+            distribuicao = {status: int(n) for status, n in distribuicoes[nome].items()}
+            dias = int(dias_unicos[nome])
+            medias_diarias = {status: round(count / dias, 1) for status, count in distribuicao.items()}
+
+            total_processados = sum(v for k, v in distribuicao.items() if k in STATUS_PROCESSADOS)
+            metricas[nome] = {
+                'total_registros': total,
+                'distribuicao_status': distribuicao,
+                'medias_diarias': medias_diarias,
+                'tendencia': formato_tendencia(ajustes.loc[nome]),
+                'padrao_semanal': {dia: int(n) for dia, n in semanais[nome].items()},
+                'taxa_eficiencia': round((total_processados / total) * 100, 1),
+                'analise_diaria': analises_diarias[nome]
+            }
+
+        return metricas
+
+    def agrupar(self, metricas):
+        """
+        Separa as métricas por grupo.
+
+        Args:
+            metricas (dict): Colaborador -> métricas, como retornado pelos métodos de cálculo
+
+        Returns:
+            dict: Grupo -> {colaborador: métricas}
+        """
+        grupos = {}
+        for nome, valores in metricas.items():
+            grupos.setdefault(self.grupos.get(nome), {})[nome] = valores
+        return grupos
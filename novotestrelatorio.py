@@ -3,6 +3,10 @@ import json
 from datetime import datetime
 import logging
 from typing import Dict, Any, List
+from cache_planilhas import listar_abas
+from esquema_colunas import carregar_aba, resolver_cabecalho, variantes
+from datas import converter_datas, estatisticas_datas
+from categorias import contar
 
 # Configuração do logging
 logging.basicConfig(
@@ -18,27 +22,28 @@ class AnalisadorExcel:
             r"F:\okok\(LEANDRO_ADRIANO) LISTAS INDIVIDUAIS.xlsx"
         ]
         
+        # Colunas usadas no relatório (chave do relatório -> coluna lógica de esquema_colunas)
+        self.COLUNAS_LOGICAS = {
+            'DATA_CRIACAO': 'DATA',
+            'DATA_RESOLUCAO': 'RESOLUCAO',
+            'BANCO': 'BANCO',
+            'NEGOCIACAO': 'NEGOCIACAO',
+            'STATUS': 'SITUACAO'
+        }
+        
         # Mapeamento de colunas (nome lógico -> possíveis nomes no Excel)
         self.COLUNAS = {
-            'DATA_CRIACAO': ['DATA', 'Data', 'DATA CRIACAO', 'Data Criação'],
-            'DATA_RESOLUCAO': ['RESOLUÇÃO', 'RESOLUCAO', 'Data Resolução', 'Data Resolucao'],
-            'BANCO': ['BANCO', 'Banco'],
-            'NEGOCIACAO': ['NEGOCIAÇÃO', 'NEGOCIACAO', 'Negociacao', 'Negociação'],
-            'STATUS': ['SITUAÇÃO', 'SITUACAO', 'Status', 'Situacao']
+            chave: variantes(logica) for chave, logica in self.COLUNAS_LOGICAS.items()
         }
     
     def validate_columns(self, df):
         """Verifica se todas as colunas necessárias estão presentes"""
-        colunas_presentes = set(df.columns)
+        colunas_presentes = resolver_cabecalho(df.columns)
         colunas_mapeadas = {}
         
         # Para cada coluna lógica, procurar uma correspondente no Excel
         for col_logica, possiveis_nomes in self.COLUNAS.items():
-            coluna_encontrada = None
-            for nome in possiveis_nomes:
-                if nome in colunas_presentes:
-                    coluna_encontrada = nome
-                    break
+            coluna_encontrada = colunas_presentes.get(self.COLUNAS_LOGICAS[col_logica])
             
             if coluna_encontrada:
                 colunas_mapeadas[col_logica] = coluna_encontrada
@@ -52,14 +57,14 @@ class AnalisadorExcel:
         """Analisa um arquivo Excel e retorna os dados processados"""
         try:
             logger.info(f"Analisando: {caminho}")
-            excel_file = pd.ExcelFile(caminho)
             resultados = {}
             
-            for nome in excel_file.sheet_names:
+            for nome in listar_abas(caminho):
                 if nome.upper() == 'RELATÓRIO GERAL':
                     continue
                     
-                df = excel_file.parse(nome)
+                df = carregar_aba(caminho, nome, colunas=list(self.COLUNAS_LOGICAS.values()),
+                                  converter_tipos=False)
                 
                 # Validar e obter mapeamento de colunas
                 valido, colunas = self.validate_columns(df)
@@ -68,22 +73,16 @@ class AnalisadorExcel:
                     continue
                 
                 # Processar datas
-                df['data_criacao'] = pd.to_datetime(
-                    df[colunas['DATA_CRIACAO']], 
-                    format='mixed', 
-                    errors='coerce'
-                )
-                df['data_resolucao'] = pd.to_datetime(
-                    df[colunas['DATA_RESOLUCAO']], 
-                    format='mixed', 
-                    errors='coerce'
-                )
+                df['data_criacao'] = converter_datas(df[colunas['DATA_CRIACAO']], chave=(nome, 'DATA_CRIACAO'),
+                                                    arquivo=caminho)
+                df['data_resolucao'] = converter_datas(df[colunas['DATA_RESOLUCAO']], chave=(nome, 'DATA_RESOLUCAO'),
+                                                      arquivo=caminho)
                 
                 # Registrar datas inválidas
-                for col in ['data_criacao', 'data_resolucao']:
-                    invalid_dates = df[col].isna().sum()
+                for col in ['DATA_CRIACAO', 'DATA_RESOLUCAO']:
+                    invalid_dates = estatisticas_datas((nome, col), caminho)['invalidas']
                     if invalid_dates > 0:
-                        logger.warning(f"{invalid_dates} datas inválidas na coluna {col.upper()}")
+                        logger.warning(f"{invalid_dates} datas inválidas na coluna {col}")
                 
                 # Calcular tempo de resolução
                 df['tempo_resolucao'] = None
@@ -104,7 +103,7 @@ class AnalisadorExcel:
                 
                 # Contar bancos
                 banco_col = colunas['BANCO']
-                bancos = df[banco_col].value_counts().head(3).to_dict() if banco_col in df.columns else {}
+                bancos = contar(df[banco_col]).head(3).to_dict() if banco_col in df.columns else {}
                 
                 # Últimas negociações
                 ultimas_negociacoes = []
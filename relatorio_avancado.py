@@ -18,7 +18,7 @@ class RelatorioAvancado:
         # Sidebar para filtros
         st.sidebar.title("Filtros")
         dias_historico = st.sidebar.slider("Dias de Histórico", 7, 90, 30)
-        grupo_selecionado = st.sidebar.selectbox("Grupo", ["Todos", "JULIO", "LEANDRO"])
+        grupo_selecionado = st.sidebar.selectbox("Grupo", ["Todos"] + self.analisador.grupos.nomes)
         
         # Layout principal
         col1, col2 = st.columns([2, 1])
@@ -125,37 +125,22 @@ class RelatorioAvancado:
     
     def mostrar_tendencias(self):
         """Mostra análise de tendências"""
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Grupo JULIO")
-            for colab, dados in self.analisador.metricas_julio.items():
-                if 'tendencias' in dados:
-                    tend = dados['tendencias']
-                    st.write(f"**{colab}**")
-                    st.write(f"R² = {tend.get('r_squared', 0):.3f}")
-                    if tend.get('slope', 0) > 0:
-                        st.write("Tendência: ⬆️ Crescente")
-                    elif tend.get('slope', 0) < 0:
-                        st.write("Tendência: ⬇️ Decrescente")
-                    else:
-                        st.write("Tendência: ➡️ Estável")
-                    st.write("---")
-        
-        with col2:
-            st.subheader("Grupo LEANDRO")
-            for colab, dados in self.analisador.metricas_leandro.items():
-                if 'tendencias' in dados:
-                    tend = dados['tendencias']
-                    st.write(f"**{colab}**")
-                    st.write(f"R² = {tend.get('r_squared', 0):.3f}")
-                    if tend.get('slope', 0) > 0:
-                        st.write("Tendência: ⬆️ Crescente")
-                    elif tend.get('slope', 0) < 0:
-                        st.write("Tendência: ⬇️ Decrescente")
-                    else:
-                        st.write("Tendência: ➡️ Estável")
-                    st.write("---")
+        grupos = self.analisador.metricas_por_grupo
+        for coluna, (grupo, metricas) in zip(st.columns(len(grupos)), grupos.items()):
+            with coluna:
+                st.subheader(f"Grupo {grupo}")
+                for colab, dados in metricas.items():
+                    if 'tendencias' in dados:
+                        tend = dados['tendencias']
+                        st.write(f"**{colab}**")
+                        st.write(f"R² = {tend.get('r_squared', 0):.3f}")
+                        if tend.get('slope', 0) > 0:
+                            st.write("Tendência: ⬆️ Crescente")
+                        elif tend.get('slope', 0) < 0:
+                            st.write("Tendência: ⬇️ Decrescente")
+                        else:
+                            st.write("Tendência: ➡️ Estável")
+                        st.write("---")
 
 if __name__ == "__main__":
     relatorio = RelatorioAvancado()
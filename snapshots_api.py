@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Snapshots da API
+================
+Resultados das seções da API pré-calculados em segundo plano e publicados como
+arquivos JSON versionados.
+
+O AtualizadorSnapshots observa as planilhas de entrada (MonitorPlanilhas) e, a
+cada alteração confirmada, recalcula todas as seções e publica um novo snapshot
+de cada uma. A publicação grava um arquivo temporário e o renomeia sobre o
+anterior, de modo que um leitor (inclusive em outro processo) vê sempre o
+snapshot antigo completo ou o novo completo.
+
+Cada snapshot registra o número de versão da seção, a versão dos dados (hash do
+conteúdo das planilhas usadas) e o instante em que foi gerado, usado para
+informar a idade do snapshot nas respostas.
+
+As atualizações passam por um Coalescedor: com um banco compartilhado, apenas um
+processo recalcula uma dada versão dos dados e os demais aguardam e encontram os
+snapshots já publicados.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from cache_planilhas import impressao_digital
+from coalescencia import Coalescedor, _para_json
+from monitor_planilhas import MonitorPlanilhas, INTERVALO_PADRAO, ESPERA_ESTABILIDADE_PADRAO
+
+logger = logging.getLogger(__name__)
+
+# Limite do fator que espaça as consultas enquanto alguma seção continua falhando
+FATOR_ESPERA_MAXIMO = 32
+
+DIRETORIO_SNAPSHOTS_PADRAO = os.environ.get('SNAPSHOTS_API_DIR', os.path.join('output', 'snapshots'))
+# Banco dos arrendamentos que coordenam os processos que publicam no mesmo diretório
+BANCO_COALESCENCIA_PADRAO = os.path.join(DIRETORIO_SNAPSHOTS_PADRAO, 'coalescencia.db')
+
+
+def versao_dados(arquivos):
+    """
+    Identifica o conteúdo de um conjunto de arquivos.
+
+    Args:
+        arquivos (iterable): Caminhos dos arquivos; os ausentes entram apenas pelo nome
+
+    Returns:
+        str: Hash das impressões digitais dos arquivos
+    """
+    partes = []
+    for arquivo in sorted(arquivos):
+        try:
+            partes.append(impressao_digital(arquivo)['hash'])
+        except OSError:
+            partes.append(f'ausente:{os.path.abspath(arquivo)}')
+    return hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()[:16]
+
+
+class PublicadorSnapshots:
+    """
+    Grava e lê os snapshots JSON das seções da API.
+    """
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or DIRETORIO_SNAPSHOTS_PADRAO
+        # Último snapshot lido de cada seção, com a assinatura (tamanho, mtime) do arquivo
+        self._lidos = {}
+
+    def _caminho(self, secao):
+        return os.path.join(self.diretorio, f'{secao}.json')
+
+    def publicar(self, secao, dados, versao_dados=None):
+        """
+        Publica um novo snapshot de uma seção, substituindo o anterior de forma atômica.
+
+        Args:
+            secao (str): Nome da seção
+            dados: Resultado da seção (escalares numpy viram números; outros tipos desconhecidos, texto)
+            versao_dados (str, optional): Versão dos dados de entrada
+
+        Returns:
+            dict: Snapshot publicado
+        """
+        anterior = self.ler(secao)
+        snapshot = {
+            'secao': secao,
+            'versao': (anterior['versao'] + 1) if anterior else 1,
+            'versao_dados': versao_dados,
+            'gerado_em': time.time(),
+            'dados': dados
+        }
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = f'{self._caminho(secao)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, default=_para_json)
+            os.replace(temporario, self._caminho(secao))
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        return snapshot
+
+    def ler(self, secao):
+        """
+        Retorna o snapshot mais recente de uma seção.
+
+        O arquivo só é lido novamente quando tamanho ou mtime mudam.
+
+        Returns:
+            dict: Snapshot, ou None se a seção ainda não foi publicada
+        """
+        try:
+            info = os.stat(self._caminho(secao))
+        except OSError:
+            return None
+
+        assinatura = (info.st_size, info.st_mtime_ns)
+        lido = self._lidos.get(secao)
+        if lido is None or lido[0] != assinatura:
+            try:
+                with open(self._caminho(secao), 'r', encoding='utf-8') as f:
+                    lido = (assinatura, json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Snapshot de {secao} ilegível: {str(e)}")
+                return lido[1] if lido else None
+            self._lidos[secao] = lido
+        return lido[1]
+
+    @staticmethod
+    def idade(snapshot):
+        """Segundos desde a geração do snapshot"""
+        return max(0.0, time.time() - snapshot['gerado_em'])
+
+
+class AtualizadorSnapshots:
+    """
+    Recalcula e publica os snapshots das seções quando as planilhas mudam.
+    """
+
+    def __init__(self, arquivos, secoes, publicador=None, preparar=None, ao_alterar=None,
+                 intervalo=INTERVALO_PADRAO, espera_estabilidade=ESPERA_ESTABILIDADE_PADRAO,
+                 coalescedor=None):
+        """
+        Args:
+            arquivos (dict): Nome do grupo -> caminho da planilha
+            secoes (dict): Nome da seção -> função sem argumentos que calcula seus dados
+            publicador (PublicadorSnapshots, optional): Destino dos snapshots
+            preparar (callable, optional): Executado antes de calcular as seções (ex.: auditoria)
+            ao_alterar (callable, optional): Recebe grupo -> caminho dos arquivos alterados
+            intervalo (float): Segundos entre consultas às planilhas
+            espera_estabilidade (float): Segundos sem mudança antes de considerar um arquivo salvo
+            coalescedor (Coalescedor, optional): Coordena atualizações concorrentes. Por padrão,
+                apenas entre as threads deste processo
+        """
+        self.arquivos = dict(arquivos)
+        self.secoes = dict(secoes)
+        self.publicador = publicador or PublicadorSnapshots()
+        self.preparar = preparar
+        self.ao_alterar = ao_alterar
+        self.monitor = MonitorPlanilhas(self.arquivos, self._alterados, intervalo=intervalo,
+                                        espera_estabilidade=espera_estabilidade)
+        self.coalescedor = coalescedor or Coalescedor()
+        self._falhas_seguidas = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def atualizar(self, forcar=False):
+        """
+        Recalcula e publica as seções cuja versão publicada difere da versão atual dos dados.
+
+        Uma única atualização roda por vez; chamadas concorrentes (inclusive de outros processos,
+        se o coalescedor usar um banco compartilhado) aguardam a que está em curso.
+
+        Args:
+            forcar (bool): Publica mesmo que os dados não tenham mudado
+
+        Returns:
+            list: Seções publicadas
+        """
+        # Quem aguardou outro processo executa a verificação de novo e encontra as seções em dia
+        return self.coalescedor.executar(('atualizar_snapshots', self.publicador.diretorio, forcar),
+                                         lambda: self._atualizar(forcar), compartilhar_resultado=False)
+
+    def _atualizar(self, forcar):
+        versao = versao_dados(self.arquivos.values())
+        pendentes = [secao for secao in self.secoes
+                     if forcar or (self.publicador.ler(secao) or {}).get('versao_dados') != versao]
+        if not pendentes:
+            return []
+
+        if self.preparar:
+            try:
+                self.preparar()
+            except Exception as e:
+                logger.error(f"Falha ao preparar os snapshots: {str(e)}")
+
+        publicadas = []
+        for secao in pendentes:
+            try:
+                self.publicador.publicar(secao, self.secoes[secao](), versao)
+                publicadas.append(secao)
+            except Exception as e:
+                # O snapshot anterior continua valendo
+                logger.error(f"Falha ao gerar o snapshot de {secao}: {str(e)}")
+        logger.info(f"Snapshots publicados ({versao}): {', '.join(publicadas)}")
+        return publicadas
+
+    def _alterados(self, alterados):
+        """Atualiza os snapshots; True se todas as seções estão na versão atual dos dados"""
+        if self.ao_alterar:
+            self.ao_alterar(alterados)
+        self.atualizar()
+        versao = versao_dados(self.arquivos.values())
+        sucesso = all((self.publicador.ler(secao) or {}).get('versao_dados') == versao for secao in self.secoes)
+        self._falhas_seguidas = 0 if sucesso else self._falhas_seguidas + 1
+        return sucesso
+
+    def _executar(self):
+        while not self._parar.is_set():
+            # Se alguma seção falhar, o monitor entrega os arquivos de novo na próxima consulta
+            self.monitor.ciclo()
+            # Enquanto uma seção falha de forma persistente, as novas tentativas são espaçadas
+            fator = min(2 ** self._falhas_seguidas, FATOR_ESPERA_MAXIMO)
+            self._parar.wait(self.monitor.intervalo * fator)
+
+    def iniciar(self):
+        """Inicia a atualização em uma thread de segundo plano"""
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='atualizador-snapshots', daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        """Interrompe a thread de atualização"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
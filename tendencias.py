@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tendências
+==========
+Ajuste de retas y = a + b*x por mínimos quadrados, em lote, para as séries de
+todos os colaboradores de uma vez.
+
+As séries, de tamanhos diferentes, são dispostas em uma matriz completada com
+NaN (uma linha por série) e os somatórios centrados são calculados ao longo das
+linhas. Inclinação, intercepto, R² e erro padrão saem das fórmulas fechadas, sem
+instanciar um modelo por colaborador.
+
+Há duas convenções para o R² de séries sem variação: scipy.stats.linregress
+devolve 0 e sklearn.metrics.r2_score devolve 1 (ajuste perfeito). Os formatos
+`tendencias` (AnalisadorExcel) e `tendencia` (AnalisadorAvancado) seguem,
+respectivamente, cada uma delas.
+"""
+
+import numpy as np
+import pandas as pd
+
+# R² de séries sem variação em cada convenção
+R2_CONSTANTE_LINREGRESS = 0.0
+R2_CONSTANTE_SKLEARN = 1.0
+
+
+def _matriz(valores):
+    """Dispõe uma lista de séries de tamanhos diferentes em uma matriz completada com NaN"""
+    tamanhos = np.array([len(v) for v in valores], dtype=np.int64)
+    matriz = np.full((len(valores), tamanhos.max() if len(valores) else 0), np.nan)
+    if len(valores):
+        colunas = np.arange(matriz.shape[1])
+        matriz[colunas < tamanhos[:, None]] = np.concatenate([np.asarray(v, dtype=float) for v in valores])
+    return matriz
+
+
+def ajustar_matriz(y, x=None, r2_constante=R2_CONSTANTE_LINREGRESS):
+    """
+    Ajusta uma reta para cada linha de uma matriz completada com NaN.
+
+    Args:
+        y (numpy.ndarray): Valores, uma série por linha; NaN marca posições vazias
+        x (numpy.ndarray, optional): Abscissas com o mesmo formato de y. Por padrão, 0..n-1
+        r2_constante (float): R² atribuído às séries sem variação
+
+    Returns:
+        dict: Arrays com n, inclinacao, intercepto, r2 e erro_padrao (da inclinação), um valor por linha
+    """
+    y = np.asarray(y, dtype=float)
+    presentes = ~np.isnan(y)
+    if x is None:
+        x = np.cumsum(presentes, axis=1) - 1.0
+    x = np.where(presentes, np.asarray(x, dtype=float), np.nan)
+
+    n = presentes.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_x = np.nansum(x, axis=1) / n
+        media_y = np.nansum(y, axis=1) / n
+        x_c = x - media_x[:, None]
+        y_c = y - media_y[:, None]
+        sxx = np.nansum(x_c * x_c, axis=1)
+        sxy = np.nansum(x_c * y_c, axis=1)
+        syy = np.nansum(y_c * y_c, axis=1)
+
+        inclinacao = sxy / sxx
+        intercepto = media_y - inclinacao * media_x
+        r2 = np.where(syy > 0, sxy * sxy / (sxx * syy), r2_constante)
+        residuo = np.maximum(syy - inclinacao * sxy, 0.0)
+        erro_padrao = np.where(n > 2, np.sqrt(residuo / (n - 2) / sxx), np.nan)
+
+    return {
+        'n': n,
+        'inclinacao': inclinacao,
+        'intercepto': intercepto,
+        'r2': np.where(n > 1, r2, np.nan),
+        'erro_padrao': erro_padrao
+    }
+
+
+def ajustar(series, abscissas=None, r2_constante=R2_CONSTANTE_LINREGRESS):
+    """
+    Ajusta uma reta para cada série de um dicionário.
+
+    Args:
+        series (dict): Chave (ex.: colaborador) -> valores em ordem temporal
+        abscissas (dict, optional): Chave -> valores de x. Por padrão, 0..n-1
+        r2_constante (float): R² atribuído às séries sem variação
+
+    Returns:
+        pandas.DataFrame: n, inclinacao, intercepto, r2 e erro_padrao por chave
+    """
+    chaves = list(series)
+    y = _matriz([series[c] for c in chaves])
+    x = _matriz([abscissas[c] for c in chaves]) if abscissas is not None else None
+    return pd.DataFrame(ajustar_matriz(y, x, r2_constante), index=pd.Index(chaves, dtype=object))
+
+
+def ajustar_agrupado(valores, r2_constante=R2_CONSTANTE_LINREGRESS):
+    """
+    Ajusta uma reta por grupo a partir de uma série longa, sem separá-la em séries menores.
+
+    Args:
+        valores (pandas.Series): Valores indexados por (grupo, ...), em ordem temporal dentro do grupo
+        r2_constante (float): R² atribuído às séries sem variação
+
+    Returns:
+        pandas.DataFrame: n, inclinacao, intercepto, r2 e erro_padrao por grupo
+    """
+    codigos, grupos = pd.factorize(valores.index.get_level_values(0), sort=True)
+    posicoes = valores.groupby(codigos).cumcount().to_numpy()
+    y = np.full((len(grupos), posicoes.max() + 1 if len(posicoes) else 0), np.nan)
+    y[codigos, posicoes] = valores.to_numpy(dtype=float)
+    return pd.DataFrame(ajustar_matriz(y, r2_constante=r2_constante), index=grupos)
+
+
+def formato_tendencias(ajuste):
+    """
+    Converte o ajuste de uma série para o formato `tendencias` de AnalisadorExcel.
+
+    Args:
+        ajuste (pandas.Series): Linha do resultado de ajustar/ajustar_agrupado
+
+    Returns:
+        dict: {'slope', 'r_squared'}, ou vazio com menos de dois pontos
+    """
+    if ajuste['n'] < 2:
+        return {}
+    return {'slope': float(ajuste['inclinacao']), 'r_squared': float(ajuste['r2'])}
+
+
+def formato_tendencia(ajuste):
+    """
+    Converte o ajuste de uma série para o formato `tendencia` de AnalisadorAvancado.
+
+    Args:
+        ajuste (pandas.Series): Linha do resultado de ajustar/ajustar_agrupado
+
+    Returns:
+        dict: {'direcao', 'r2'}; 'estável' com menos de dois pontos
+    """
+    if ajuste['n'] < 2:
+        return {'direcao': 'estável', 'r2': 0}
+    return {
+        'direcao': 'crescente' if ajuste['inclinacao'] > 0 else 'decrescente',
+        'r2': round(float(ajuste['r2']), 3)
+    }
@@ -1,6 +1,9 @@
 import pandas as pd
 from datetime import datetime
 import os
+from cache_planilhas import listar_abas, ler_aba
+from esquema_colunas import normalizar_coluna
+from datas import converter_datas
 
 STATUS_COLUMNS = [
     'VERIFICADO', 'ANÁLISE', 'PENDENTE', 'PRIORIDADE', 
@@ -11,7 +14,7 @@ STATUS_COLUMNS = [
 class ProcessadorRelatorios:
     def __init__(self, file_path):
         self.file_path = file_path
-        self.xls = pd.ExcelFile(file_path)
+        self.sheet_names = listar_abas(file_path)
         self.dados_colaboradores = {}
         self.relatorio_geral = None
         self.data_atual = datetime.now().date()
@@ -20,18 +23,8 @@ class ProcessadorRelatorios:
         ]
         
     def normalizar_coluna(self, coluna):
-        """Normaliza o nome da coluna para um formato consistente"""
-        mapeamento = {
-            'SITUAÇÂO': 'SITUACAO',
-            'SITUAÇÃO': 'SITUACAO',
-            'RESOLUCAO': 'RESOLUCAO',
-            'RESOLUÇÃO': 'RESOLUCAO',
-            'ANÁLISE': 'ANALISE',
-            'DATA VENCIMENTO': 'DATA',
-            'DT VENCIMENTO': 'DATA'
-        }
-        coluna = str(coluna).strip().upper()
-        return mapeamento.get(coluna, coluna)
+        """Normaliza o nome da coluna para o nome lógico definido em esquema_colunas"""
+        return normalizar_coluna(coluna)
     
     def encontrar_coluna(self, df, possiveis_nomes):
         """Encontra uma coluna baseada em possíveis nomes"""
@@ -45,18 +38,18 @@ class ProcessadorRelatorios:
         print("Carregando dados do arquivo...")
         
         # Primeiro, vamos coletar todos os nomes dos colaboradores das abas
-        for sheet_name in self.xls.sheet_names:
+        for sheet_name in self.sheet_names:
             if sheet_name != "RELATÓRIO GERAL" and sheet_name not in ["", "TESTE"]:
                 if sheet_name not in self.ordem_colaboradores:
                     self.ordem_colaboradores.append(sheet_name)
         
         # Agora carregamos os dados de cada aba
-        for sheet_name in self.xls.sheet_names:
+        for sheet_name in self.sheet_names:
             if sheet_name == "RELATÓRIO GERAL":
-                self.relatorio_geral = pd.read_excel(self.xls, sheet_name=sheet_name)
+                self.relatorio_geral = ler_aba(self.file_path, sheet_name)
             elif sheet_name != "":
                 try:
-                    df = pd.read_excel(self.xls, sheet_name=sheet_name)
+                    df = ler_aba(self.file_path, sheet_name)
                     
                     # Normalizar nomes das colunas
                     df.columns = [self.normalizar_coluna(col) for col in df.columns]
@@ -68,9 +61,9 @@ class ProcessadorRelatorios:
                     
                     # Converter datas
                     if data_col:
-                        df[data_col] = pd.to_datetime(df[data_col], errors='coerce')
+                        df[data_col] = converter_datas(df[data_col], chave=(sheet_name, data_col), arquivo=self.file_path)
                     if resolucao_col:
-                        df[resolucao_col] = pd.to_datetime(df[resolucao_col], errors='coerce')
+                        df[resolucao_col] = converter_datas(df[resolucao_col], chave=(sheet_name, resolucao_col), arquivo=self.file_path)
                     
                     # Converter situação
                     if situacao_col:
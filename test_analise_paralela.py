@@ -0,0 +1,21 @@
+import pandas as pd
+from datetime import datetime
+import cache_planilhas
+from cache_planilhas import CachePlanilhas
+from analise_paralela import AgendadorAnalise
+
+
+def test_arquivo_ilegivel_nao_impede_os_demais(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_planilhas, 'cache_padrao', CachePlanilhas(str(tmp_path / 'cache')))
+    valido = str(tmp_path / "(TESTE) LISTAS INDIVIDUAIS.xlsx")
+    with pd.ExcelWriter(valido) as writer:
+        pd.DataFrame({'DATA': [datetime(2025, 2, 3)], 'SITUAÇÃO': ['PENDENTE']}).to_excel(
+            writer, sheet_name='ANA LIDIA', index=False)
+        pd.DataFrame({'SITUAÇÃO': ['QUITADO']}).to_excel(writer, sheet_name='TESTE', index=False)
+    ausente = str(tmp_path / "ausente.xlsx")
+
+    erros = {}
+    tarefas = AgendadorAnalise(max_workers=1).planejar([ausente, valido], erros)
+
+    assert [(arquivo, aba) for arquivo, aba, _ in tarefas] == [(valido, 'ANA LIDIA')]
+    assert list(erros) == [ausente]
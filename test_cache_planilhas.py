@@ -0,0 +1,106 @@
+import os
+import pytest
+import pandas as pd
+from datetime import datetime
+from cache_planilhas import CachePlanilhas, impressao_digital
+
+
+@pytest.fixture
+def planilha(tmp_path):
+    """Gera um arquivo Excel com duas abas de colaboradores"""
+    caminho = tmp_path / "(TESTE) LISTAS INDIVIDUAIS.xlsx"
+    with pd.ExcelWriter(caminho) as writer:
+        pd.DataFrame({
+            'DATA': [datetime(2025, 2, 3), datetime(2025, 2, 4)],
+            'SITUAÇÃO': ['PENDENTE', 'QUITADO']
+        }).to_excel(writer, sheet_name='ANA LIDIA', index=False)
+        pd.DataFrame({
+            'DATA': [datetime(2025, 2, 5)],
+            'SITUAÇÃO': ['VERIFICADO']
+        }).to_excel(writer, sheet_name='FELIPE', index=False)
+    return str(caminho)
+
+
+def test_leitura_usa_cache_apos_primeira_execucao(planilha, tmp_path, monkeypatch):
+    cache = CachePlanilhas(str(tmp_path / 'cache'))
+    original = cache.ler_aba(planilha, 'ANA LIDIA')
+
+    # Um novo cache no mesmo diretório não deve voltar a abrir o Excel
+    novo_cache = CachePlanilhas(str(tmp_path / 'cache'))
+    monkeypatch.setattr(pd, 'ExcelFile', None)
+    assert novo_cache.listar_abas(planilha) == ['ANA LIDIA', 'FELIPE']
+    pd.testing.assert_frame_equal(novo_cache.ler_aba(planilha, 'ANA LIDIA'), original)
+    assert list(novo_cache.ler_aba(planilha, 'ANA LIDIA', colunas=['SITUAÇÃO']).columns) == ['SITUAÇÃO']
+
+
+def test_alteracao_do_conteudo_invalida_cache(planilha, tmp_path):
+    cache = CachePlanilhas(str(tmp_path / 'cache'))
+    assert len(cache.ler_todas_abas(planilha)['FELIPE']) == 1
+
+    with pd.ExcelWriter(planilha) as writer:
+        pd.DataFrame({'DATA': [datetime(2025, 2, 5)] * 3, 'SITUAÇÃO': ['PENDENTE'] * 3}).to_excel(
+            writer, sheet_name='FELIPE', index=False)
+    os.utime(planilha, ns=(0, os.stat(planilha).st_mtime_ns + 10**9))
+
+    assert cache.listar_abas(planilha) == ['FELIPE']
+    assert len(cache.ler_aba(planilha, 'FELIPE')) == 3
+
+
+def test_mtime_alterado_sem_mudanca_de_conteudo_mantem_cache(planilha, tmp_path):
+    cache = CachePlanilhas(str(tmp_path / 'cache'))
+    cache.ler_todas_abas(planilha)
+    hash_original = impressao_digital(planilha)['hash']
+
+    os.utime(planilha, ns=(0, os.stat(planilha).st_mtime_ns + 10**9))
+    manifesto = cache._manifesto_valido(planilha)
+
+    assert manifesto['impressao']['hash'] == hash_original
+    assert set(manifesto['entradas']) == {'ANA LIDIA', 'FELIPE'}
+
+
+def test_dimensoes_vem_dos_metadados_e_do_manifesto(planilha, tmp_path):
+    cache = CachePlanilhas(str(tmp_path / 'cache'))
+    assert cache.dimensoes_abas(planilha) == {'ANA LIDIA': (2, 2), 'FELIPE': (1, 2)}
+
+    cache.ler_aba(planilha, 'FELIPE')
+    assert cache.dimensoes_abas(planilha, ['FELIPE']) == {'FELIPE': (1, 2)}
+
+
+def test_ler_todas_abas_refaz_entrada_corrompida(planilha, tmp_path):
+    cache = CachePlanilhas(str(tmp_path / 'cache'))
+    originais = cache.ler_todas_abas(planilha)
+
+    diretorio = cache._diretorio_arquivo(planilha)
+    entrada = cache._ler_manifesto(planilha)['entradas']['FELIPE']
+    with open(os.path.join(diretorio, entrada['arquivo']), 'r+b') as f:
+        f.truncate(10)
+
+    relidas = CachePlanilhas(str(tmp_path / 'cache')).ler_todas_abas(planilha)
+    for aba, df in originais.items():
+        pd.testing.assert_frame_equal(relidas[aba], df)
+    # Nenhum temporário fica para trás
+    assert not [nome for nome in os.listdir(diretorio) if nome.endswith('.tmp')]
+
+
+def test_coluna_projetada_ausente_nao_refaz_a_leitura(planilha, tmp_path, monkeypatch):
+    cache = CachePlanilhas(str(tmp_path / 'cache'))
+    cache.ler_aba(planilha, 'FELIPE')
+
+    monkeypatch.setattr(pd, 'ExcelFile', None)
+    df = CachePlanilhas(str(tmp_path / 'cache')).ler_aba(planilha, 'FELIPE', colunas=['SITUAÇÃO', 'RESOLUÇÃO'])
+    assert list(df.columns) == ['SITUAÇÃO']
+
+
+def test_gravacoes_concorrentes_preservam_as_entradas_de_cada_processo(planilha, tmp_path):
+    # Dois processos leem o manifesto antes de qualquer um gravar sua aba
+    primeiro = CachePlanilhas(str(tmp_path / 'cache'))
+    segundo = CachePlanilhas(str(tmp_path / 'cache'))
+    manifesto_primeiro = primeiro._manifesto_valido(planilha)
+    manifesto_segundo = segundo._manifesto_valido(planilha)
+
+    primeiro._gravar_aba(planilha, manifesto_primeiro, 'ANA LIDIA', pd.DataFrame({'SITUAÇÃO': ['PENDENTE']}))
+    primeiro._gravar_manifesto(planilha, manifesto_primeiro)
+    segundo._gravar_aba(planilha, manifesto_segundo, 'FELIPE', pd.DataFrame({'SITUAÇÃO': ['QUITADO']}))
+    segundo._gravar_manifesto(planilha, manifesto_segundo)
+
+    assert set(CachePlanilhas(str(tmp_path / 'cache'))._ler_manifesto(planilha)['entradas']) == {'ANA LIDIA', 'FELIPE'}
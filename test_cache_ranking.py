@@ -0,0 +1,56 @@
+import os
+import pandas as pd
+from datetime import datetime, timedelta
+from cache_ranking import CacheRanking
+from analise_360 import Analise360
+
+
+def test_ranking_persiste_e_e_descartado_quando_o_arquivo_muda(tmp_path):
+    arquivo = tmp_path / "julio.xlsx"
+    arquivo.write_bytes(b"versao 1")
+    ranking = pd.DataFrame({'Colaborador': ['FELIPE', 'IGOR'], 'Score': [50.5, 42.0]}, index=[1, 0])
+
+    cache = CacheRanking(str(tmp_path / "ranking"))
+    impressoes = cache.impressoes([str(arquivo)])
+    chave = cache.chave(impressoes, {'pesos': {'eficiencia': 40}})
+    assert cache.obter(chave) is None
+    cache.guardar(chave, ranking, impressoes)
+
+    # Outro processo encontra a entrada em disco; outra configuração gera outra chave
+    reiniciado = CacheRanking(str(tmp_path / "ranking"))
+    pd.testing.assert_frame_equal(reiniciado.obter(chave), ranking)
+    assert reiniciado.chave(impressoes, {'pesos': {'eficiencia': 50}}) != chave
+
+    arquivo.write_bytes(b"versao 2 alterada")
+    novas = reiniciado.impressoes([str(arquivo)])
+    nova_chave = reiniciado.chave(novas, {'pesos': {'eficiencia': 40}})
+    assert nova_chave != chave
+    reiniciado.guardar(nova_chave, ranking, novas)
+    assert reiniciado.obter(chave) is None
+    assert os.listdir(tmp_path / "ranking") == [f"{nova_chave}.json"]
+
+    reiniciado.invalidar(str(arquivo))
+    assert reiniciado.obter(nova_chave) is None
+
+
+def test_gerar_ranking_reaproveita_o_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base = datetime(2025, 1, 6)
+    with pd.ExcelWriter("julio.xlsx") as writer:
+        for nome, n in [('FELIPE', 12), ('IGOR', 8)]:
+            pd.DataFrame({
+                'DATA': [base + timedelta(days=i % 4) for i in range(n)],
+                'SITUACAO': [['PENDENTE', 'QUITADO', 'VERIFICADO'][i % 3] for i in range(n)],
+                'RESOLUCAO': [base + timedelta(days=i % 6) for i in range(n)],
+            }).to_excel(writer, sheet_name=nome, index=False)
+
+    analise = Analise360(cache=CacheRanking(str(tmp_path / "ranking")))
+    analise.configurar_arquivos({'JULIO': "julio.xlsx"})
+    primeiro = analise.gerar_ranking()
+
+    def falhar(*args, **kwargs):
+        raise AssertionError("a planilha não deveria ser analisada novamente")
+
+    monkeypatch.setattr(analise.analisador_julio, 'analisar_arquivo', falhar)
+    pd.testing.assert_frame_equal(analise.gerar_ranking(), primeiro)
+    assert set(primeiro['Colaborador']) == {'FELIPE', 'IGOR'}
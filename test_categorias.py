@@ -0,0 +1,19 @@
+import pandas as pd
+from categorias import DicionarioCategorias, contar
+
+
+def test_valores_novos_entram_no_final_sem_mudar_codigos():
+    dicionario = DicionarioCategorias({'status': ['PENDENTE', 'VERIFICADO']})
+
+    serie = dicionario.categorizar(pd.Series(['VERIFICADO', 'RENEGOCIADO', None, 'PENDENTE']), 'status')
+
+    assert list(serie.cat.categories) == ['PENDENTE', 'VERIFICADO', 'RENEGOCIADO']
+    assert serie.cat.codes.tolist() == [1, 2, -1, 0]
+    assert dicionario.codigo('status', 'VERIFICADO') == 1
+
+
+def test_contar_ignora_categorias_ausentes():
+    dicionario = DicionarioCategorias()
+    serie = dicionario.categorizar(pd.Series(['QUITADO', 'PENDENTE', 'QUITADO']), 'status')
+
+    assert contar(serie).to_dict() == {'QUITADO': 2, 'PENDENTE': 1}
@@ -0,0 +1,67 @@
+import threading
+import pytest
+from coalescencia import Coalescedor
+
+
+def test_threads_compartilham_um_unico_calculo():
+    coalescedor = Coalescedor()
+    liberar = threading.Event()
+    chamadas = []
+
+    def calcular():
+        chamadas.append(1)
+        liberar.wait(5)
+        return {'total': 42}
+
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(
+        coalescedor.executar(('geral', {'filtro': 1}, 'v1'), calcular))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while not chamadas:
+        pass
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert chamadas == [1]
+    assert resultados == [{'total': 42}] * 8
+
+    def falhar():
+        raise RuntimeError("planilha ilegível")
+
+    with pytest.raises(RuntimeError):
+        coalescedor.executar('erro', falhar)
+    # Nada fica preso após o término: a próxima chamada calcula de novo
+    assert coalescedor.executar(('geral', {'filtro': 1}, 'v1'), lambda: 'novo') == 'novo'
+
+
+def test_processos_aguardam_o_arrendamento_e_leem_o_resultado(tmp_path):
+    banco = str(tmp_path / "coalescencia.db")
+    # Instâncias distintas fazem o papel de workers distintos
+    worker_a = Coalescedor(banco, intervalo_espera=0.01)
+    worker_b = Coalescedor(banco, intervalo_espera=0.01)
+    iniciou, liberar = threading.Event(), threading.Event()
+
+    def calcular_a():
+        iniciou.set()
+        liberar.wait(5)
+        return {'ranking': [1, 2]}
+
+    resultado_a = []
+    thread = threading.Thread(target=lambda: resultado_a.append(worker_a.executar('acordo', calcular_a)))
+    thread.start()
+    iniciou.wait(5)
+
+    resultado_b = []
+    espera = threading.Thread(target=lambda: resultado_b.append(
+        worker_b.executar('acordo', lambda: pytest.fail("o worker B não deveria calcular"))))
+    espera.start()
+    liberar.set()
+    thread.join(5)
+    espera.join(5)
+
+    assert resultado_a == resultado_b == [{'ranking': [1, 2]}]
+
+    # Sem compartilhar o resultado, quem aguardou executa depois (e encontra o trabalho feito)
+    assert worker_b.executar('atualizar', lambda: [], compartilhar_resultado=False) == []
@@ -0,0 +1,268 @@
+import os
+import threading
+import sqlite3
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+import cache_planilhas
+from cache_planilhas import CachePlanilhas
+import database_manager
+from database_manager import DatabaseManager, SCHEMA_VERSION, EFFICIENCY_TREND_QUERY
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    """Banco e cache isolados e uma planilha com duas abas de colaboradores"""
+    monkeypatch.setattr(cache_planilhas, 'cache_padrao', CachePlanilhas(str(tmp_path / "cache")))
+    caminho = tmp_path / "(JULIO) LISTAS INDIVIDUAIS.xlsx"
+    with pd.ExcelWriter(caminho) as writer:
+        pd.DataFrame({
+            'DATA': [datetime(2025, 1, 2), datetime(2025, 1, 3), None],
+            'SITUAÇÃO': ['PENDENTE', 'QUITADO', 'VERIFICADO'],
+            'BANCO': ['BB', None, 'CAIXA']
+        }).to_excel(writer, sheet_name='ANA LIDIA', index=False)
+        pd.DataFrame({
+            'DATA': ['04/01/2025'],
+            'SITUACAO': ['PENDENTE']
+        }).to_excel(writer, sheet_name='FELIPE', index=False)
+    return DatabaseManager(str(tmp_path / "analise.db")), str(caminho)
+
+
+def test_carga_de_registros_e_consulta_por_colaborador(ambiente):
+    db, caminho = ambiente
+
+    resultado = db.load_raw_records(caminho)
+
+    assert resultado == {
+        'ANA LIDIA': {'status': 'loaded', 'rows': 3},
+        'FELIPE': {'status': 'loaded', 'rows': 1}
+    }
+    registros = db.get_raw_records(colaborador='ANA LIDIA', start_date=datetime(2025, 1, 3))
+    assert [(r['linha'], r['data'], r['situacao'], r['banco'], r['grupo']) for r in registros] == [
+        (3, '2025-01-03', 'QUITADO', None, 'JULIO')
+    ]
+    assert db.get_raw_records(situacao='PENDENTE', limit=10)[1]['data'] == '2025-01-04'
+
+
+def test_recarga_ignora_abas_sem_alteracao(ambiente):
+    db, caminho = ambiente
+    db.load_raw_records(caminho)
+
+    assert all(r['status'] == 'unchanged' for r in db.load_raw_records(caminho).values())
+    assert len(db.get_raw_records()) == 4
+
+
+def test_falha_na_carga_nao_grava_nada_e_abas_removidas_sao_apagadas(ambiente, monkeypatch):
+    db, caminho = ambiente
+    carregar_aba = database_manager.carregar_aba
+
+    def falhar_em_felipe(arquivo, aba, **kwargs):
+        if aba == 'FELIPE':
+            raise ValueError("planilha bloqueada")
+        return carregar_aba(arquivo, aba, **kwargs)
+
+    monkeypatch.setattr(database_manager, 'carregar_aba', falhar_em_felipe)
+    with pytest.raises(ValueError):
+        db.load_raw_records(caminho)
+    assert db.get_raw_records() == []
+
+    monkeypatch.setattr(database_manager, 'carregar_aba', carregar_aba)
+    db.load_raw_records(caminho)
+    with pd.ExcelWriter(caminho) as writer:
+        pd.DataFrame({'DATA': [datetime(2025, 1, 2)], 'SITUAÇÃO': ['PENDENTE']}).to_excel(
+            writer, sheet_name='ANA LIDIA', index=False)
+    os.utime(caminho, ns=(0, os.stat(caminho).st_mtime_ns + 10**9))
+
+    resultado = db.load_raw_records(caminho)
+    assert resultado['FELIPE'] == {'status': 'removed', 'rows': 1}
+    assert {r['colaborador'] for r in db.get_raw_records()} == {'ANA LIDIA'}
+
+
+def test_conexoes_por_thread_em_modo_wal(tmp_path):
+    db = DatabaseManager(str(tmp_path / "analise.db"))
+    conn = db.pool.connection()
+    assert conn is db.pool.connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert db.store_metrics('FELIPE', 'JULIO', datetime(2025, 1, 6), 10, 80.0, 'alta')
+
+    # Uma escrita sendo confirmada (trava EXCLUSIVE) em outra conexão não bloqueia a leitura do histórico
+    escritor = DatabaseManager(db.db_path)
+    conn_escritor = escritor.pool.connection()
+    conn_escritor.execute("BEGIN EXCLUSIVE")
+    conn_escritor.execute("INSERT INTO metricas (colaborador, grupo, data, total_registros, taxa_eficiencia, tendencia) "
+                          "VALUES ('IGOR', 'JULIO', '2025-01-07', 5, 60.0, 'queda')")
+    resultado = []
+    leitor = threading.Thread(target=lambda: resultado.append(db.get_metrics_history()))
+    leitor.start()
+    leitor.join(5)
+    assert not leitor.is_alive()
+    conn_escritor.commit()
+
+    # No modo rollback-journal a mesma trava bloqueia os leitores
+    sem_wal = str(tmp_path / "sem_wal.db")
+    conn_sem_wal = sqlite3.connect(sem_wal)
+    conn_sem_wal.execute("PRAGMA journal_mode=DELETE")
+    conn_sem_wal.execute("CREATE TABLE t (x INTEGER)")
+    conn_sem_wal.commit()
+    conn_sem_wal.execute("BEGIN EXCLUSIVE")
+    conn_sem_wal.execute("INSERT INTO t VALUES (1)")
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        sqlite3.connect(sem_wal, timeout=0.1).execute("SELECT * FROM t").fetchall()
+    conn_sem_wal.rollback()
+    conn_sem_wal.close()
+
+    assert [r['colaborador'] for r in resultado[0]] == ['FELIPE']
+    assert db.pool.connection() is conn
+    db.close()
+    escritor.close()
+
+
+def test_lote_de_metricas_em_uma_execucao(tmp_path):
+    db = DatabaseManager(str(tmp_path / "analise.db"))
+    metricas = [
+        {'colaborador': f'COLAB{i}', 'grupo': 'Julio', 'total_registros': i,
+         'taxa_eficiencia': 50.0 + i, 'tendencia': 'alta'}
+        for i in range(200)
+    ]
+    metricas.append({'colaborador': 'FELIPE', 'grupo': 'Leandro', 'data': datetime(2024, 12, 1)})
+
+    run_id = db.store_metrics_batch(metricas, data=datetime(2025, 1, 6, 9, 30))
+
+    linhas = db.pool.connection().execute(
+        "SELECT data, COUNT(*), COUNT(DISTINCT execucao_id), MAX(execucao_id) FROM metricas GROUP BY data ORDER BY data"
+    ).fetchall()
+    assert linhas == [('2024-12-01T00:00:00', 1, 1, run_id), ('2025-01-06T09:30:00', 200, 1, run_id)]
+    assert db.store_metrics('IGOR', 'Julio', datetime(2025, 1, 7), 3, 40.0, 'queda')
+    assert db.get_metrics_history(colaborador='IGOR')[0]['execucao_id'] == run_id + 1
+
+
+def test_migracoes_e_planos_de_consulta_usam_os_indices(tmp_path):
+    caminho = str(tmp_path / "analise.db")
+    db = DatabaseManager(caminho)
+    assert db.schema_version() == SCHEMA_VERSION
+    # Reabrir não reaplica migrações
+    assert DatabaseManager(caminho).schema_version() == SCHEMA_VERSION
+
+    base = datetime(2025, 1, 1)
+    db.store_metrics_batch([
+        {'colaborador': f'COLAB{i % 50}', 'grupo': ['Julio', 'Leandro'][i % 2],
+         'data': base + timedelta(hours=i), 'total_registros': i, 'taxa_eficiencia': i % 100}
+        for i in range(5000)
+    ])
+
+    consultas = [
+        (db._metrics_history_query(colaborador='COLAB1'), 'idx_metricas_colaborador_data'),
+        (db._metrics_history_query(grupo='Julio', start_date=base), 'idx_metricas_grupo_data'),
+        (db._metrics_history_query(), 'idx_metricas_data'),
+        ((EFFICIENCY_TREND_QUERY, ('COLAB1', '-30 days')), 'COVERING INDEX idx_metricas_colaborador_data'),
+        (("SELECT grupo, AVG(taxa_eficiencia), SUM(total_registros) FROM metricas GROUP BY grupo", ()),
+         'COVERING INDEX idx_metricas_grupo_totais'),
+    ]
+    for (consulta, parametros), indice in consultas:
+        plano = ' | '.join(db.query_plan(consulta, parametros))
+        assert indice in plano and 'TEMP B-TREE' not in plano, plano
+
+
+def test_resumo_de_grupos_acompanha_o_historico(tmp_path):
+    db = DatabaseManager(str(tmp_path / "analise.db"))
+    dia = datetime(2025, 1, 6, 9)
+    primeira = db.store_metrics_batch([
+        {'colaborador': 'FELIPE', 'grupo': 'Julio', 'total_registros': 10, 'taxa_eficiencia': 80.0},
+        {'colaborador': 'IGOR', 'grupo': 'Julio', 'total_registros': 4, 'taxa_eficiencia': 50.0},
+        {'colaborador': 'VITORIA', 'grupo': 'Leandro', 'total_registros': 7, 'taxa_eficiencia': 70.0},
+    ], data=dia)
+    segunda = db.store_metrics_batch([
+        {'colaborador': 'FELIPE', 'grupo': 'Julio', 'total_registros': 12, 'taxa_eficiencia': 90.0},
+    ], data=dia + timedelta(days=1))
+    conn = db.pool.connection()
+    with conn:
+        conn.execute("UPDATE metricas SET grupo = 'Leandro' WHERE colaborador = 'IGOR'")
+        conn.execute("DELETE FROM metricas WHERE colaborador = 'VITORIA'")
+
+    direto = conn.execute(
+        "SELECT grupo, AVG(taxa_eficiencia), SUM(total_registros) FROM metricas GROUP BY grupo"
+    ).fetchall()
+    comparacao = db.get_group_comparison()
+    assert comparacao == {
+        'efficiency': {grupo: media for grupo, media, _ in direto},
+        'total_records': {grupo: total for grupo, _, total in direto}
+    }
+
+    por_dia = db.get_group_summary('dia', start=dia)
+    assert [(r['chave'], r['grupo'], r['registros'], r['total_registros']) for r in por_dia] == [
+        ('2025-01-06', 'Julio', 1, 10), ('2025-01-06', 'Leandro', 1, 4), ('2025-01-07', 'Julio', 1, 12)
+    ]
+    assert [r['chave'] for r in db.get_group_summary('execucao', start=segunda)] == [segunda]
+    assert {r['grupo'] for r in db.get_group_summary('execucao', end=primeira)} == {'Julio', 'Leandro'}
+
+
+def test_historico_de_analises_em_tabelas_filhas(tmp_path):
+    db = DatabaseManager(str(tmp_path / "analise.db"))
+    metricas = {
+        'FELIPE': {
+            'total_registros': 5,
+            'taxa_eficiencia': 60.0,
+            'distribuicao_status': {'PENDENTE': 2, 'QUITADO': 3},
+            'analise_diaria': {'2025-01-06': {'PENDENTE': 2, 'QUITADO': 1}, '2025-01-07': {'QUITADO': 2}},
+            'tendencia': {'direcao': 'crescente', 'r2': 0.8}
+        },
+        'IGOR': None
+    }
+    run_id = db.store_metrics_batch([{'colaborador': 'FELIPE', 'grupo': 'Julio'}])
+    antiga = db.store_analysis_history(datetime(2025, 1, 6), 'Julio', metricas, run_id=run_id)
+    metricas['FELIPE']['analise_diaria']['2025-01-08'] = {'VERIFICADO': 1}
+    db.store_analysis_history(datetime(2025, 1, 8), 'Julio', metricas, store_blob=False)
+
+    assert db.get_analysis_daily_counts('FELIPE', start_date=datetime(2025, 1, 7)) == {
+        '2025-01-07': {'QUITADO': 2}, '2025-01-08': {'VERIFICADO': 1}
+    }
+    assert db.get_analysis_status_counts('FELIPE') == {'PENDENTE': 2, 'QUITADO': 3}
+    tendencias = db.get_analysis_trends(colaborador='FELIPE')
+    assert [(t['data'][:10], t['direcao'], t['r2']) for t in tendencias] == [
+        ('2025-01-08', 'crescente', 0.8), ('2025-01-06', 'crescente', 0.8)
+    ]
+
+    conn = db.pool.connection()
+    assert conn.execute("SELECT metricas IS NULL, execucao_id FROM analise_historica ORDER BY id").fetchall() == [
+        (0, run_id), (1, None)
+    ]
+    with conn:
+        conn.execute("DELETE FROM analise_historica WHERE id = ?", (antiga,))
+    assert conn.execute("SELECT COUNT(*) FROM analise_diaria WHERE analise_id = ?", (antiga,)).fetchone() == (0,)
+
+
+def test_threads_curtas_reaproveitam_conexoes_e_fork_nao_fecha_as_do_pai(tmp_path):
+    db = DatabaseManager(str(tmp_path / "analise.db"))
+    conectar = db.pool._connect
+    abertas = []
+    db.pool._connect = lambda: abertas.append(conectar()) or abertas[-1]
+
+    def requisicao():
+        db.get_group_comparison()
+
+    # Servidor com uma thread por requisição: em série, todas usam a mesma conexão ociosa
+    for _ in range(200):
+        thread = threading.Thread(target=requisicao)
+        thread.start()
+        thread.join()
+    assert len(abertas) == 1
+
+    # Em paralelo, as conexões que sobram além de max_idle são fechadas
+    barreira = threading.Barrier(20)
+    threads = [threading.Thread(target=lambda: (requisicao(), barreira.wait())) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(db.pool._idle) == db.pool.max_idle
+
+    conn = db.pool.connection()
+    if hasattr(os, 'fork'):
+        pid = os.fork()
+        if pid == 0:
+            # Filho: recebe uma conexão nova e não fecha as herdadas
+            ok = db.pool.connection() is not conn and db.get_group_comparison() is not None
+            os._exit(0 if ok else 1)
+        assert os.waitpid(pid, 0)[1] == 0
+    assert conn.execute("SELECT COUNT(*) FROM metricas").fetchone() == (0,)
+    db.close()
@@ -0,0 +1,52 @@
+import pandas as pd
+from datetime import datetime
+from datas import MotorDatas
+
+
+def test_converte_seriais_textos_e_datas_nativas():
+    motor = MotorDatas()
+    serie = pd.Series([datetime(2025, 1, 2), 45658, '45659', '03/01/2025', ' 2025-01-04 ', '', None, 'sem data'])
+
+    datas = motor.converter(serie, chave=('ANA LIDIA', 'DATA'))
+
+    assert datas.tolist()[:5] == [pd.Timestamp(2025, 1, 2), pd.Timestamp(2025, 1, 1), pd.Timestamp(2025, 1, 2),
+                                  pd.Timestamp(2025, 1, 3), pd.Timestamp(2025, 1, 4)]
+    assert datas.iloc[5:].isna().all()
+    assert motor.estatisticas[('ANA LIDIA', 'DATA')] == {
+        'total': 8, 'vazios': 2, 'nativas': 1, 'seriais': 2, 'textos': 3,
+        'formato': '%d/%m/%Y', 'convertidas': 5, 'invalidas': 1
+    }
+
+
+def test_formato_detectado_fica_em_cache_por_aba_e_coluna():
+    motor = MotorDatas()
+    motor.converter(pd.Series(['2025-02-01', '2025-02-13', '01/02/2025']), chave=('FELIPE', 'DATA'))
+    assert motor.formatos_detectados[('FELIPE', 'DATA')] == '%Y-%m-%d'
+
+    # Bloco seguinte: o formato guardado é aplicado sem nova detecção
+    datas = motor.converter(pd.Series(['2025-03-01', '12/03/2025']), chave=('FELIPE', 'DATA'))
+    assert datas.tolist() == [pd.Timestamp(2025, 3, 1), pd.Timestamp(2025, 3, 12)]
+    assert motor.estatisticas[('FELIPE', 'DATA')]['formato'] == '%Y-%m-%d'
+
+
+def test_formato_detectado_por_arquivo_e_descartado_quando_o_arquivo_muda(tmp_path):
+    julio, leandro = tmp_path / "julio.xlsx", tmp_path / "leandro.xlsx"
+    julio.write_bytes(b"v1")
+    leandro.write_bytes(b"v1")
+    motor = MotorDatas(max_arquivos=2)
+
+    motor.converter(pd.Series(['2025-02-01', '2025-02-13']), chave=('FELIPE', 'DATA'), arquivo=str(julio))
+    # Mesma aba e coluna em outro arquivo: o formato é detectado de novo
+    datas = motor.converter(pd.Series(['01/02/2025', '13/02/2025']), chave=('FELIPE', 'DATA'), arquivo=str(leandro))
+    assert datas.tolist() == [pd.Timestamp(2025, 2, 1), pd.Timestamp(2025, 2, 13)]
+    assert motor.formatos_detectados[(str(julio), 'FELIPE', 'DATA')] == '%Y-%m-%d'
+
+    julio.write_bytes(b"v2 com outro tamanho")
+    datas = motor.converter(pd.Series(['03/02/2025']), chave=('FELIPE', 'DATA'), arquivo=str(julio))
+    assert datas.tolist() == [pd.Timestamp(2025, 2, 3)]
+    assert motor.formatos_detectados[(str(julio), 'FELIPE', 'DATA')] == '%d/%m/%Y'
+
+    outro = tmp_path / "outro.xlsx"
+    outro.write_bytes(b"v1")
+    motor.converter(pd.Series(['2025-02-01']), chave=('ANA', 'DATA'), arquivo=str(outro))
+    assert {chave[0] for chave in motor.formatos_detectados} == {str(julio), str(outro)}
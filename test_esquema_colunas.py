@@ -0,0 +1,38 @@
+import pytest
+import pandas as pd
+from datetime import datetime
+import cache_planilhas
+from cache_planilhas import CachePlanilhas
+from esquema_colunas import normalizar_coluna, resolver_cabecalho, carregar_aba
+
+
+@pytest.fixture
+def planilha(tmp_path, monkeypatch):
+    """Gera um arquivo Excel com variações de cabeçalho e um cache isolado"""
+    monkeypatch.setattr(cache_planilhas, 'cache_padrao', CachePlanilhas(str(tmp_path / "cache")))
+    caminho = tmp_path / "(TESTE) LISTAS INDIVIDUAIS.xlsx"
+    df = pd.DataFrame({
+        ' Dt Vencimento ': ['01/02/2025', '02/02/2025', 'inválida'],
+        'SITUAÇÂO': ['PENDENTE', 'QUITADO', 'PENDENTE'],
+        'Resolução': [datetime(2025, 2, 3), None, None],
+        'BANCO': ['BB', 'CAIXA', 'ITAU'],
+        'PRIORIDADE ALTA': ['SIM', 'NAO', 'SIM']
+    })
+    df.to_excel(caminho, sheet_name='ANA LIDIA', index=False)
+    return str(caminho)
+
+
+def test_variacoes_de_cabecalho_resolvem_para_o_nome_logico():
+    assert normalizar_coluna(' situação ') == 'SITUACAO'
+    assert normalizar_coluna('DATA VENCIMENTO') == 'DATA'
+    assert normalizar_coluna('Observação') == 'OBSERVAÇÃO'
+    assert resolver_cabecalho(['STATUS', 'SITUAÇÃO', 'Banco']) == {'SITUACAO': 'STATUS', 'BANCO': 'Banco'}
+
+
+def test_carregar_aba_projeta_renomeia_e_aplica_tipos(planilha):
+    df = carregar_aba(planilha, 'ANA LIDIA', colunas=['DATA', 'SITUACAO', 'RESOLUCAO'], contendo=['PRIORIDADE'])
+
+    assert list(df.columns) == ['DATA', 'SITUACAO', 'RESOLUCAO', 'PRIORIDADE ALTA']
+    assert df['DATA'].tolist()[:2] == [pd.Timestamp(2025, 2, 1), pd.Timestamp(2025, 2, 2)]
+    assert pd.isna(df['DATA'].iloc[2])
+    assert pd.api.types.is_datetime64_any_dtype(df['RESOLUCAO'])
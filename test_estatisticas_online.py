@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+from estatisticas_online import MediaVariancia, Maximo, HistogramaQuantis, SketchKLL, quantis_de_dict
+from leitura_streaming import AgregadorIncremental
+
+
+def test_acumuladores_mesclados_equivalem_ao_calculo_direto():
+    valores = np.random.default_rng(0).integers(0, 40, size=1000)
+    partes = np.array_split(valores, [10, 11, 400])
+
+    acumuladores = [(MediaVariancia().atualizar(p), Maximo().atualizar(p), HistogramaQuantis().atualizar(p))
+                    for p in partes]
+    media, maximo, quantis = acumuladores[0]
+    for outra_media, outro_maximo, outros_quantis in acumuladores[1:]:
+        media.mesclar(outra_media)
+        maximo.mesclar(outro_maximo)
+        quantis.mesclar(outros_quantis)
+
+    serie = pd.Series(valores)
+    assert media.media == pytest.approx(serie.mean())
+    assert media.variancia == pytest.approx(serie.var())
+    assert maximo.valor == serie.max()
+    for q in [0.25, 0.5, 0.75]:
+        assert quantis.quantil(q) == serie.quantile(q)
+    q1, q3 = serie.quantile(0.25), serie.quantile(0.75)
+    assert quantis.contar_outliers_iqr() == ((serie < q1 - 1.5 * (q3 - q1)) | (serie > q3 + 1.5 * (q3 - q1))).sum()
+
+
+def test_agregadores_parciais_mesclados_e_estado_persistido():
+    base = datetime(2025, 1, 6)
+    bloco = pd.DataFrame({
+        'DATA': [base + timedelta(days=i % 5) for i in range(40)],
+        'SITUACAO': [['PENDENTE', 'QUITADO', 'VERIFICADO'][i % 3] for i in range(40)],
+        'RESOLUCAO': [base + timedelta(days=i % 5 + i % 7) for i in range(40)],
+    })
+    completo = AgregadorIncremental().consumir([bloco])
+    parcial = AgregadorIncremental().consumir([bloco.iloc[:13]])
+    parcial.mesclar(AgregadorIncremental().consumir([bloco.iloc[13:]]))
+
+    esperado = completo.metricas_excel('ANA LIDIA')
+    assert parcial.metricas_excel('ANA LIDIA') == esperado
+
+    restaurado = AgregadorIncremental().carregar_estado(parcial.para_dict())
+    assert restaurado.metricas_excel('ANA LIDIA') == esperado
+
+
+def test_sketch_kll_mesclado_respeita_o_erro_de_posto():
+    valores = np.random.default_rng(1).lognormal(3, 1, size=200_000)
+    sketches = [SketchKLL(k=200, semente=i).atualizar(parte) for i, parte in enumerate(np.array_split(valores, 7))]
+    sketch = quantis_de_dict(sketches[0].para_dict())
+    for outro in sketches[1:]:
+        sketch.mesclar(outro)
+
+    assert sketch.n == len(valores)
+    assert sum(len(nivel) for nivel in sketch.niveis) < 1000
+    for q in [0.25, 0.5, 0.75]:
+        assert abs((valores < sketch.quantil(q)).mean() - q) < 1.65 / 200
+
+    # Sem compactação, o sketch é exato
+    assert SketchKLL().atualizar([1, 5, 3, 8]).quantil(0.5) == pd.Series([1, 5, 3, 8]).median()
@@ -0,0 +1,61 @@
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+from grafo_metricas import GrafoMetricas, Avaliacao
+from motor_metricas import MotorMetricas, GRAFO_EXCEL
+from debug_excel import AnalisadorExcel
+
+
+def test_avaliacao_calcula_apenas_o_fecho_pedido_e_memoriza():
+    grafo = GrafoMetricas()
+    chamadas = []
+
+    @grafo.metrica(dependencias=['valores'], colunas=['A'])
+    def soma(valores):
+        chamadas.append('soma')
+        return sum(valores)
+
+    @grafo.metrica(dependencias=['valores', 'soma'])
+    def media(valores, soma):
+        chamadas.append('media')
+        return soma / len(valores)
+
+    @grafo.metrica(dependencias=['valores'], colunas=['B'])
+    def maximo(valores):
+        chamadas.append('maximo')
+        return max(valores)
+
+    avaliacao = Avaliacao(grafo, valores=[1, 2, 6])
+    assert avaliacao.obter('media') == {'media': 3}
+    assert avaliacao['soma'] == 9
+    assert chamadas == ['soma', 'media']
+    assert grafo.colunas(['media'], entradas=['valores']) == {'A'}
+
+    grafo.metrica('ciclo', dependencias=['ciclo'])(lambda ciclo: ciclo)
+    with pytest.raises(ValueError):
+        avaliacao.obter('ciclo')
+    with pytest.raises(KeyError):
+        avaliacao.obter('inexistente')
+
+
+def test_subconjunto_de_metricas_do_motor():
+    base = datetime(2025, 1, 6)
+    df = pd.DataFrame({
+        'DATA': [base + timedelta(days=i % 5) for i in range(20)],
+        'SITUACAO': [['PENDENTE', 'QUITADO', 'VERIFICADO'][i % 3] for i in range(20)],
+        'RESOLUCAO': [base + timedelta(days=i % 7) for i in range(20)],
+    })
+    motor = MotorMetricas()
+    motor.adicionar('FELIPE', df)
+
+    avaliacao = Avaliacao(GRAFO_EXCEL, motor=motor)
+    avaliacao.obter('taxa_eficiencia', 'distribuicao_status')
+    assert set(avaliacao.calculados) == {'totais', 'registros', 'taxa_eficiencia', 'distribuicao_status'}
+
+    completas = motor.metricas_excel()['FELIPE']
+    parciais = motor.metricas_excel(['taxa_eficiencia', 'tendencias'])['FELIPE']
+    assert set(parciais) == {'nome', 'total_registros', 'taxa_eficiencia', 'tendencias'}
+    assert parciais == {chave: completas[chave] for chave in parciais}
+
+    colunas, contendo = AnalisadorExcel('').colunas_necessarias(['taxa_eficiencia', 'tempo_medio_resolucao'])
+    assert colunas == ['DATA', 'SITUACAO', 'RESOLUCAO'] and contendo == []
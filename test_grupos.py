@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+from scipy import stats
+from grupos import RegistroGrupos, tabela_colaboradores, correlacoes_por_grupo, resumo_grupos
+from analise_avancada import AnalisadorAvancado
+
+
+def _metricas(total, eficiencia):
+    return {'total_registros': total, 'taxa_eficiencia': eficiencia,
+            'distribuicao_status': {'PENDENTE': total}}
+
+
+def test_registro_localiza_grupo_e_transfere_colaborador():
+    registro = RegistroGrupos()
+    assert registro.grupo_de('FELIPE') == 'JULIO'
+    assert registro.grupo_de('DESCONHECIDO') == 'LEANDRO'
+
+    registro.registrar('MARCOS', ['LUARA', 'FELIPE'], rotulo='Marcos')
+    assert registro.nomes == ['JULIO', 'LEANDRO', 'MARCOS']
+    assert registro.grupo_de('FELIPE') == 'MARCOS'
+    assert 'FELIPE' not in registro.membros['JULIO']
+    assert registro.possui('LUARA')
+
+
+def test_resumo_de_todos_os_grupos_equivale_ao_calculo_por_grupo():
+    metricas = {
+        'A': {'X1': _metricas(10, 50.0), 'X2': _metricas(30, 20.0), 'X3': _metricas(25, 41.5)},
+        'B': {'Y1': _metricas(7, 90.0), 'Y2': None, 'Y3': _metricas(12, 70.0)},
+        'C': {'Z1': _metricas(5, 10.0)}
+    }
+    tabela = tabela_colaboradores(metricas)
+    resumo = resumo_grupos(tabela)
+    correlacoes = correlacoes_por_grupo(tabela, 'volume', 'taxa_eficiencia')
+
+    for grupo, colaboradores in metricas.items():
+        totais = [m['total_registros'] for m in colaboradores.values() if m]
+        eficiencias = [m['taxa_eficiencia'] for m in colaboradores.values() if m]
+        assert resumo.loc[grupo, 'media_registros'] == pytest.approx(np.mean(totais))
+        assert resumo.loc[grupo, 'cv'] == pytest.approx(np.std(totais) / np.mean(totais))
+        if len(totais) > 1:
+            r, p = stats.pearsonr(totais, eficiencias)
+            assert correlacoes.loc[grupo, 'coeficiente'] == pytest.approx(r)
+            assert correlacoes.loc[grupo, 'p_valor'] == pytest.approx(p)
+
+
+def test_gargalos_para_grupos_registrados():
+    registro = RegistroGrupos()
+    registro.registrar('MARCOS', ['LUARA', 'BRUNO', 'EDIANE'], rotulo='Marcos')
+    analisador = AnalisadorAvancado(registro)
+    for nome, total, eficiencia in [('LUARA', 10, 80.0), ('BRUNO', 12, 20.0), ('EDIANE', 40, 75.0),
+                                    ('FELIPE', 10, 50.0), ('IGOR', 11, 52.0)]:
+        analisador.registrar_metricas(nome, _metricas(total, eficiencia))
+
+    gargalos = analisador.detectar_gargalos()
+    assert [(g.get('colaborador'), g['tipo']) for g in gargalos['Marcos']] == [
+        ('BRUNO', 'eficiência'), ('EDIANE', 'volume'), (None, 'distribuição')]
+    assert gargalos['Julio'] == [] and gargalos['Leandro'] == []
+    assert set(analisador.metricas_julio) == {'FELIPE', 'IGOR'}
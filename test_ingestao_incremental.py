@@ -0,0 +1,72 @@
+import os
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+from openpyxl import load_workbook
+import cache_planilhas
+from cache_planilhas import CachePlanilhas
+from analise_avancada import AnalisadorAvancado
+from ingestao_incremental import IngestaoIncremental
+
+
+def _linhas(inicio, quantidade):
+    base = datetime(2025, 1, 6)
+    return [
+        [base + timedelta(days=i % 9), base + timedelta(days=i % 9 + 1) if i % 2 else None, None]
+        for i in range(inicio, inicio + quantidade)
+    ]
+
+
+def _acrescentar(caminho, linhas):
+    wb = load_workbook(caminho)
+    for linha in linhas:
+        wb['FELIPE'].append(linha)
+    wb.save(caminho)
+    os.utime(caminho, ns=(0, os.stat(caminho).st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def planilha(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_planilhas, 'cache_padrao', CachePlanilhas(str(tmp_path / "cache")))
+    caminho = str(tmp_path / "(JULIO) LISTAS INDIVIDUAIS.xlsx")
+    pd.DataFrame(_linhas(0, 30), columns=['DATA', 'RESOLUÇÃO', 'ÚLTIMO PAGAMENTO']).to_excel(
+        caminho, sheet_name='FELIPE', index=False)
+    return caminho
+
+
+def _processar(caminho, ingestao):
+    analisador = AnalisadorAvancado()
+    modos = analisador.analisar_arquivo_incremental(caminho, ingestao)
+    return modos['FELIPE'], analisador.metricas_julio['FELIPE']
+
+
+def test_linhas_novas_sao_somadas_ao_estado(planilha, tmp_path):
+    ingestao = IngestaoIncremental(str(tmp_path / 'estado.json'), linhas_hash=5, tamanho_bloco=7)
+    assert _processar(planilha, ingestao)[0] == 'completo'
+    ingestao.salvar()
+
+    _acrescentar(planilha, _linhas(30, 12))
+    ingestao = IngestaoIncremental(str(tmp_path / 'estado.json'), linhas_hash=5, tamanho_bloco=7)
+    modo, metricas = _processar(planilha, ingestao)
+
+    assert modo == 'incremental'
+    assert ingestao.marca_dagua(planilha, 'FELIPE', 'avancado')['linhas'] == 42
+    completo = AnalisadorAvancado().processar_dados_colaborador('FELIPE', pd.read_excel(planilha, sheet_name='FELIPE'))
+    for chave in ['total_registros', 'distribuicao_status', 'medias_diarias', 'taxa_eficiencia']:
+        assert metricas[chave] == completo[chave]
+    assert _processar(planilha, ingestao)[0] == 'inalterado'
+
+
+def test_prefixo_alterado_recalcula_do_inicio(planilha, tmp_path):
+    ingestao = IngestaoIncremental(str(tmp_path / 'estado.json'), linhas_hash=5)
+    _processar(planilha, ingestao)
+
+    wb = load_workbook(planilha)
+    wb['FELIPE'].cell(row=29, column=3, value=datetime(2025, 2, 1))
+    wb.save(planilha)
+    _acrescentar(planilha, _linhas(30, 3))
+
+    modo, metricas = _processar(planilha, ingestao)
+    assert modo == 'completo'
+    assert metricas['total_registros'] == 33
+    assert metricas['distribuicao_status']['QUITADO'] == 1
@@ -0,0 +1,78 @@
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+from leitura_streaming import iterar_blocos, AgregadorIncremental, status_avancado
+from esquema_colunas import normalizar_coluna
+from debug_excel import AnalisadorExcel
+
+
+@pytest.fixture
+def planilha(tmp_path):
+    """Gera uma aba com datas, situações e resoluções, incluindo uma linha vazia no meio"""
+    caminho = tmp_path / "(TESTE) LISTAS INDIVIDUAIS.xlsx"
+    base = datetime(2025, 1, 6)
+    linhas = []
+    for i in range(23):
+        linhas.append({
+            'DATA': base + timedelta(days=i % 7),
+            'SITUAÇÃO': ['PENDENTE', 'QUITADO', 'VERIFICADO', 'ANÁLISE'][i % 4],
+            'RESOLUÇÃO': base + timedelta(days=i % 7 + i % 5) if i % 3 else None
+        })
+    linhas.insert(10, {'DATA': None, 'SITUAÇÃO': None, 'RESOLUÇÃO': None})
+    pd.DataFrame(linhas).to_excel(caminho, sheet_name='ANA LIDIA', index=False)
+    return str(caminho)
+
+
+def test_blocos_preservam_todas_as_linhas(planilha):
+    blocos = list(iterar_blocos(planilha, 'ANA LIDIA', tamanho_bloco=5))
+    assert [len(b) for b in blocos] == [5, 5, 5, 5, 4]
+    completo = pd.read_excel(planilha, sheet_name='ANA LIDIA')
+    assert len(pd.concat(blocos)) == len(completo)
+
+
+def test_metricas_streaming_equivalem_ao_calculo_completo(planilha):
+    analisador = AnalisadorExcel(planilha)
+    df = pd.read_excel(planilha, sheet_name='ANA LIDIA')
+    df.columns = [analisador.normalizar_coluna(col) for col in df.columns]
+    esperado = analisador.calcular_metricas_colaborador(df, 'ANA LIDIA')
+
+    analisador.tamanho_bloco = 4
+    obtido = analisador.calcular_metricas_streaming('ANA LIDIA')
+
+    for chave in ['total_registros', 'distribuicao_status', 'tempo_medio_resolucao',
+                  'tempo_mediano_resolucao', 'outliers', 'padrao_semanal', 'max_diario']:
+        assert obtido[chave] == esperado[chave], chave
+    assert obtido['taxa_eficiencia'] == pytest.approx(esperado['taxa_eficiencia'])
+    assert obtido['media_diaria'] == pytest.approx(esperado['media_diaria'])
+    assert obtido['tendencias']['slope'] == pytest.approx(esperado['tendencias']['slope'])
+
+
+def test_status_avancado_descarta_registros_sem_data(planilha):
+    agregador = AgregadorIncremental(classificar=status_avancado, descartar_sem_data=True)
+    agregador.consumir(iterar_blocos(planilha, 'ANA LIDIA', tamanho_bloco=3, normalizar=normalizar_coluna))
+    metricas = agregador.metricas_avancadas()
+
+    assert metricas['total_registros'] == 23
+    assert metricas['distribuicao_status'] == {'VERIFICADO': 15, 'PENDENTE': 8}
+    assert sum(sum(d.values()) for d in metricas['analise_diaria'].values()) == 23
+
+
+def test_tempos_de_resolucao_com_horario_nao_aumentam_o_estado():
+    base = datetime(2025, 1, 6)
+    agregador = AgregadorIncremental()
+    for inicio in range(0, 2000, 500):
+        datas = [base + timedelta(days=i % 5) for i in range(inicio, inicio + 500)]
+        agregador.atualizar(pd.DataFrame({
+            'DATA': datas,
+            'RESOLUCAO': [d + timedelta(days=i % 3, minutes=i % 1440) for i, d in enumerate(datas, inicio)]
+        }))
+
+    estado = agregador.para_dict()
+    assert len(estado['tempos_resolucao']['contagens']) == 3
+    assert agregador.metricas_excel('ANA')['tempo_mediano_resolucao'] == 1
+
+    # Estados gravados em segundos são convertidos para dias ao serem carregados
+    estado['tempos_resolucao'] = {'contagens': [[90000, 2], [200000, 1]]}
+    del estado['unidade_tempos_resolucao']
+    carregado = AgregadorIncremental().carregar_estado(estado)
+    assert dict(carregado.tempos_resolucao.contagens) == {1: 2, 2: 1}
@@ -0,0 +1,67 @@
+import os
+from monitor_planilhas import MonitorPlanilhas
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 100.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_primeira_consulta_entrega_todos_os_arquivos(tmp_path):
+    julio = tmp_path / "julio.xlsx"
+    leandro = tmp_path / "leandro.xlsx"
+    julio.write_bytes(b"a")
+    leandro.write_bytes(b"b")
+    monitor = MonitorPlanilhas({'julio': str(julio), 'leandro': str(leandro)}, None, relogio=Relogio())
+
+    assert monitor.verificar() == {'julio': str(julio), 'leandro': str(leandro)}
+    assert monitor.verificar() == {}
+
+
+def test_alteracao_aguarda_estabilidade_e_ignora_mtime_sem_mudanca(tmp_path):
+    arquivo = tmp_path / "julio.xlsx"
+    arquivo.write_bytes(b"conteudo")
+    relogio = Relogio()
+    monitor = MonitorPlanilhas({'julio': str(arquivo)}, None, espera_estabilidade=3.0, relogio=relogio)
+    monitor.verificar()
+
+    # Apenas o mtime mudou: o hash confirma que não há o que reprocessar
+    os.utime(arquivo, ns=(1, 2_000_000_000))
+    relogio.agora += 5
+    monitor.verificar()
+    relogio.agora += 5
+    assert monitor.verificar() == {}
+
+    # Conteúdo novo: só é entregue depois da janela de estabilidade
+    arquivo.write_bytes(b"conteudo novo")
+    relogio.agora += 1
+    assert monitor.verificar() == {}
+    relogio.agora += 1
+    assert monitor.verificar() == {}
+    relogio.agora += 3
+    assert monitor.verificar() == {'julio': str(arquivo)}
+
+
+def test_reprocessamento_com_falha_e_repetido(tmp_path):
+    arquivo = tmp_path / "julio.xlsx"
+    arquivo.write_bytes(b"conteudo")
+    respostas = [False, RuntimeError("planilha bloqueada"), True]
+    entregues = []
+
+    def ao_alterar(alterados):
+        entregues.append(alterados)
+        resposta = respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    monitor = MonitorPlanilhas({'julio': str(arquivo)}, ao_alterar, relogio=Relogio())
+    for _ in range(4):
+        monitor.ciclo()
+
+    # Retorno False e exceção mantêm o arquivo pendente; só o sucesso o confirma
+    assert entregues == [{'julio': str(arquivo)}] * 3
+    assert monitor.verificar() == {}
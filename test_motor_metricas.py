@@ -0,0 +1,69 @@
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+import cache_planilhas
+from cache_planilhas import CachePlanilhas
+from motor_metricas import MotorMetricas
+from debug_excel import AnalisadorExcel
+from analise_avancada import AnalisadorAvancado
+
+
+def _aba(deslocamento, n):
+    base = datetime(2025, 1, 6)
+    return pd.DataFrame({
+        'DATA': [base + timedelta(days=(i * deslocamento) % 9) for i in range(n)],
+        'SITUACAO': [['PENDENTE', 'QUITADO', 'VERIFICADO', None][(i + deslocamento) % 4] for i in range(n)],
+        'RESOLUCAO': [base + timedelta(days=i % 11) if i % 3 else None for i in range(n)],
+        'ÚLTIMO PAGAMENTO': [base if i % 5 == 0 else None for i in range(n)],
+    })
+
+
+def test_metricas_de_todas_as_abas_equivalem_ao_calculo_por_aba():
+    abas = {'ANA LIDIA': _aba(1, 30), 'FELIPE': _aba(2, 17)}
+    colunas = ['DATA', 'SITUACAO', 'RESOLUCAO']
+
+    motor = MotorMetricas()
+    for nome, df in abas.items():
+        motor.adicionar(nome, df[colunas])
+    obtido = motor.metricas_excel()
+    for nome, df in abas.items():
+        esperado = AnalisadorExcel('').calcular_metricas_colaborador(df[colunas].copy(), nome)
+        assert obtido[nome].pop('tendencias') == pytest.approx(esperado.pop('tendencias'))
+        assert obtido[nome] == esperado
+
+    colunas = ['DATA', 'RESOLUCAO', 'ÚLTIMO PAGAMENTO']
+    motor = MotorMetricas(colunas_data=('DATA',), formato_data='%d/%m/%Y')
+    for nome, df in abas.items():
+        motor.adicionar(nome, df[colunas], grupo='JULIO')
+    analisador = AnalisadorAvancado()
+    assert motor.metricas_avancadas() == {nome: analisador.processar_dados_colaborador(nome, df[colunas].copy())
+                                          for nome, df in abas.items()}
+
+
+def test_abas_com_colunas_diferentes():
+    motor = MotorMetricas()
+    motor.adicionar('ANA LIDIA', _aba(1, 12), grupo='JULIO')
+    motor.adicionar('LEANDRO', _aba(3, 8)[['DATA', 'RESOLUCAO']], grupo='LEANDRO')
+
+    metricas = motor.metricas_excel()
+    assert sum(metricas['ANA LIDIA']['distribuicao_status'].values()) == 9
+    assert metricas['LEANDRO']['distribuicao_status'] == {}
+    assert 'taxa_eficiencia' not in metricas['LEANDRO']
+    assert metricas['LEANDRO']['tempo_medio_resolucao'] is not None
+    assert set(motor.agrupar(metricas)) == {'JULIO', 'LEANDRO'}
+
+
+def test_abas_sem_coluna_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_planilhas, 'cache_padrao', CachePlanilhas(str(tmp_path / "cache")))
+    caminho = str(tmp_path / "sem_data.xlsx")
+    with pd.ExcelWriter(caminho) as writer:
+        pd.DataFrame({'SITUACAO': ['PENDENTE', 'QUITADO']}).to_excel(writer, sheet_name='ANA', index=False)
+        pd.DataFrame({'SITUACAO': ['QUITADO']}).to_excel(writer, sheet_name='IGOR', index=False)
+
+    analisador = AnalisadorExcel(caminho)
+    assert analisador.analisar_arquivo() == ['ANA', 'IGOR']
+
+    metricas = analisador.colaboradores
+    assert metricas['ANA']['total_registros'] == 2
+    assert not metricas['ANA']['tendencias'] and not metricas['ANA'].get('padrao_semanal')
+    assert metricas['IGOR']['distribuicao_status'] == {'QUITADO': 1}
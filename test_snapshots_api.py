@@ -0,0 +1,65 @@
+import os
+import threading
+import numpy as np
+from snapshots_api import PublicadorSnapshots, AtualizadorSnapshots
+
+
+def test_publicacao_versionada_e_leitura(tmp_path):
+    publicador = PublicadorSnapshots(str(tmp_path))
+    assert publicador.ler('acordo') is None
+
+    publicador.publicar('acordo', {'total': np.int64(3)}, versao_dados='a')
+    snapshot = publicador.publicar('acordo', {'total': np.int64(4)}, versao_dados='b')
+    assert snapshot['versao'] == 2
+
+    lido = PublicadorSnapshots(str(tmp_path)).ler('acordo')
+    assert lido['dados'] == {'total': 4} and lido['versao_dados'] == 'b'
+    assert 0 <= PublicadorSnapshots.idade(lido) < 60
+    assert os.listdir(tmp_path) == ['acordo.json']
+
+
+def test_atualizador_so_recalcula_quando_as_planilhas_mudam(tmp_path):
+    planilha = tmp_path / "julio.xlsx"
+    planilha.write_bytes(b"versao 1")
+    chamadas = []
+
+    def acordo():
+        chamadas.append('acordo')
+        return {'conteudo': planilha.read_bytes().decode()}
+
+    def geral():
+        raise RuntimeError("falha no cálculo")
+
+    publicador = PublicadorSnapshots(str(tmp_path / "snapshots"))
+    atualizador = AtualizadorSnapshots({'JULIO': str(planilha)}, {'acordo': acordo, 'geral': geral},
+                                       publicador=publicador)
+    assert atualizador.atualizar() == ['acordo']
+    assert atualizador.atualizar() == []
+    assert publicador.ler('geral') is None
+
+    planilha.write_bytes(b"versao 2 alterada")
+    assert atualizador.atualizar() == ['acordo']
+    assert chamadas == ['acordo', 'acordo']
+    assert publicador.ler('acordo')['dados'] == {'conteudo': 'versao 2 alterada'}
+    assert publicador.ler('acordo')['versao'] == 2
+
+
+def test_secao_com_erro_nao_e_publicada_e_e_recalculada(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import app
+    # Importar o módulo não cria a instância global nem inicia o atualizador
+    assert app._saas is None
+    assert 'atualizador-snapshots' not in [thread.name for thread in threading.enumerate()]
+
+    saas = app.DataAnalyticsSAAS(atualizar_em_segundo_plano=False)
+    respostas = [{'error': "planilha bloqueada"}, {'ranking': [1, 2]}]
+    monkeypatch.setattr(saas, 'get_general_report', lambda filters: respostas.pop(0))
+    saas.atualizador.secoes = {'geral': saas.atualizador.secoes['geral']}
+    saas.atualizador.preparar = None
+
+    # A falha não vira snapshot; a mesma versão dos dados é recalculada na tentativa seguinte
+    assert saas.atualizador._alterados({}) is False
+    assert saas.snapshots.ler('geral') is None
+    assert saas.atualizador._alterados({}) is True
+    dados, snapshot = saas.get_section_data('geral')
+    assert dados['ranking'] == [1, 2] and snapshot['versao'] == 1
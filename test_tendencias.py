@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from tendencias import ajustar, ajustar_agrupado, formato_tendencia, formato_tendencias, R2_CONSTANTE_SKLEARN
+
+
+def test_ajuste_em_lote_equivale_ao_linregress_por_serie():
+    rng = np.random.default_rng(0)
+    series = {f'C{i}': rng.poisson(20, size=n) + np.arange(n) * i for i, n in enumerate([2, 5, 17, 40])}
+
+    ajustes = ajustar(series)
+
+    for chave, y in series.items():
+        esperado = stats.linregress(np.arange(len(y)), y)
+        ajuste = ajustes.loc[chave]
+        assert ajuste['n'] == len(y)
+        assert ajuste['inclinacao'] == pytest.approx(esperado.slope)
+        assert ajuste['intercepto'] == pytest.approx(esperado.intercept)
+        assert ajuste['r2'] == pytest.approx(esperado.rvalue ** 2)
+        if len(y) > 2:
+            assert ajuste['erro_padrao'] == pytest.approx(esperado.stderr)
+
+
+def test_formatos_e_series_curtas_ou_constantes():
+    contagens = pd.Series([3, 3, 3, 1, 2, 4, 7],
+                          index=pd.MultiIndex.from_tuples([('ANA', 1), ('ANA', 2), ('ANA', 3), ('BRUNO', 1),
+                                                           ('BRUNO', 2), ('BRUNO', 3), ('IGOR', 1)]))
+
+    ajustes = ajustar_agrupado(contagens, r2_constante=R2_CONSTANTE_SKLEARN)
+
+    assert formato_tendencia(ajustes.loc['ANA']) == {'direcao': 'decrescente', 'r2': 1.0}
+    assert formato_tendencia(ajustes.loc['BRUNO']) == {'direcao': 'crescente', 'r2': 0.964}
+    assert formato_tendencia(ajustes.loc['IGOR']) == {'direcao': 'estável', 'r2': 0}
+    assert formato_tendencias(ajustes.loc['IGOR']) == {}
+    assert formato_tendencias(ajustar({'ANA': [3, 3]}).loc['ANA']) == {'slope': 0.0, 'r_squared': 0.0}
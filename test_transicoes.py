@@ -0,0 +1,31 @@
+import pandas as pd
+from transicoes import analisar_transicoes
+
+
+def test_conta_transicoes_e_tempos_na_ordem_das_datas():
+    df = pd.DataFrame({
+        'DATA': pd.to_datetime(['2025-01-05', '2025-01-01', '2025-01-03', None, '2025-01-09']),
+        'SITUACAO': ['QUITADO', 'PENDENTE', 'VERIFICADO', 'PENDENTE', 'PENDENTE'],
+    })
+
+    resultado = analisar_transicoes(df, 'DATA')
+
+    # Ordem: PENDENTE(01) -> VERIFICADO(03) -> QUITADO(05) -> PENDENTE(09) -> PENDENTE(sem data)
+    assert resultado['contagem'] == {('PENDENTE', 'VERIFICADO'): 1, ('VERIFICADO', 'QUITADO'): 1,
+                                     ('QUITADO', 'PENDENTE'): 1}
+    assert resultado['tempos_medios'] == {'PENDENTE': 4.0, 'VERIFICADO': 2.0, 'QUITADO': 2.0}
+    assert resultado['matriz'].loc['QUITADO', 'PENDENTE'] == 1
+
+
+def test_grupos_nao_compartilham_transicoes():
+    df = pd.DataFrame({
+        'COLABORADOR': ['ANA', 'ANA', 'BRUNO', 'BRUNO'],
+        'DATA': pd.to_datetime(['2025-01-01', '2025-01-02', '2025-01-03', '2025-01-10']),
+        'SITUACAO': ['PENDENTE', 'QUITADO', 'PENDENTE', 'PENDENTE'],
+    })
+
+    resultado = analisar_transicoes(df, 'DATA', coluna_grupo='COLABORADOR')
+
+    assert resultado['ANA']['contagem'] == {('PENDENTE', 'QUITADO'): 1}
+    assert resultado['BRUNO']['contagem'] == {}
+    assert resultado['BRUNO']['tempos_medios'] == {'PENDENTE': 7.0}
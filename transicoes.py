@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Transições de Situação
+======================
+Calcula, sobre os registros ordenados por data, as mudanças de SITUACAO entre
+registros consecutivos e o tempo médio (em dias) desde o registro anterior em cada
+situação.
+
+Tudo é feito com deslocamentos e comparações sobre os códigos inteiros das
+categorias, em uma única passada. Com uma coluna de grupo (ex.: colaborador), os
+registros de todos os grupos são processados juntos e os deslocamentos nunca
+atravessam a fronteira entre grupos.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _codificar(serie):
+    """Retorna os códigos inteiros (-1 para vazio) e as categorias de uma coluna"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    codigos, categorias = pd.factorize(serie, sort=False)
+    return codigos, categorias
+
+
+def analisar_transicoes(df, coluna_data, coluna_situacao='SITUACAO', coluna_grupo=None):
+    """
+    Calcula transições, matriz de transição e tempos médios por situação.
+
+    Uma transição é contada entre registros consecutivos (na ordem das datas) quando
+    as duas situações estão preenchidas e são diferentes. Registros com a mesma data
+    mantêm a ordem da planilha; registros sem data vão para o final.
+
+    Args:
+        df (pandas.DataFrame): Registros com as colunas de data e situação
+        coluna_data (str): Coluna usada na ordenação e no cálculo dos tempos
+        coluna_situacao (str): Coluna com a situação de cada registro
+        coluna_grupo (str, optional): Coluna que separa os registros (ex.: colaborador)
+
+    Returns:
+        dict: Sem grupo, o resultado do próprio DataFrame; com grupo, um resultado por
+            valor do grupo. Cada resultado contém:
+            - 'contagem': {(de, para): ocorrências}, da transição mais frequente para a menos
+            - 'matriz': pandas.DataFrame de -> para com todas as situações observadas
+            - 'tempos_medios': {situação: média de dias desde o registro anterior}
+    """
+    chaves = [coluna_data] if coluna_grupo is None else [coluna_grupo, coluna_data]
+    ordenado = df.sort_values(by=chaves, kind='stable', na_position='last')
+
+    situacoes, categorias = _codificar(ordenado[coluna_situacao])
+    k = len(categorias)
+    if coluna_grupo is None:
+        grupos, nomes_grupos = np.zeros(len(ordenado), dtype=np.int64), [None]
+    else:
+        grupos, nomes_grupos = _codificar(ordenado[coluna_grupo])
+    n_grupos = len(nomes_grupos)
+
+    # Par (anterior, atual) válido: mesmo grupo e as duas situações preenchidas e diferentes
+    anteriores = np.roll(situacoes, 1)
+    mesmo_grupo = np.roll(grupos, 1) == grupos
+    if len(mesmo_grupo):
+        mesmo_grupo[0] = False
+    validos = mesmo_grupo & (grupos >= 0) & (anteriores >= 0) & (situacoes >= 0) & (anteriores != situacoes)
+
+    indices = (grupos[validos].astype(np.int64) * k + anteriores[validos]) * k + situacoes[validos]
+    contagens = np.bincount(indices, minlength=n_grupos * k * k).reshape(n_grupos, k, k)
+
+    # Tempo desde o registro anterior do mesmo grupo, atribuído à situação do registro atual
+    datas = ordenado[coluna_data].to_numpy(dtype='datetime64[ns]')
+    dias = pd.Series(datas - np.roll(datas, 1)).dt.days.to_numpy(dtype=float, copy=True)
+    dias[~mesmo_grupo] = np.nan
+    tempos = pd.DataFrame({'grupo': grupos, 'situacao': situacoes, 'dias': dias})
+    tempos = tempos[(tempos['grupo'] >= 0) & (tempos['situacao'] >= 0)]
+    medias = tempos.groupby(['grupo', 'situacao'])['dias'].mean()
+
+    presentes = np.zeros((n_grupos, k), dtype=bool)
+    usados = tempos[['grupo', 'situacao']].drop_duplicates().to_numpy()
+    presentes[usados[:, 0], usados[:, 1]] = True
+
+    resultados = {}
+    for g, nome in enumerate(nomes_grupos):
+        observadas = np.flatnonzero(presentes[g])
+        rotulos = [categorias[c] for c in observadas]
+        matriz = pd.DataFrame(contagens[g][np.ix_(observadas, observadas)], index=rotulos, columns=rotulos)
+
+        de, para = np.nonzero(contagens[g])
+        ordem = np.argsort(-contagens[g][de, para], kind='stable')
+        contagem = {(categorias[de[i]], categorias[para[i]]): int(contagens[g][de[i], para[i]]) for i in ordem}
+
+        tempos_medios = {}
+        if g in medias.index.get_level_values(0):
+            for c, media in medias.loc[g].items():
+                tempos_medios[categorias[c]] = media
+
+        resultados[nome] = {'contagem': contagem, 'matriz': matriz, 'tempos_medios': tempos_medios}
+
+    return resultados[None] if coluna_grupo is None else resultados
@@ -14,12 +14,17 @@ from datetime import datetime
 import os
 import matplotlib.pyplot as plt
 import seaborn as sns
-from collections import defaultdict, Counter
+from collections import defaultdict
 
 # Importações locais
 from debug_excel import AnalisadorExcel
 from analise_360 import Analise360
 from data_analysis_pipeline import DataAnalysisPipeline
+from cache_planilhas import listar_abas
+from esquema_colunas import carregar_aba
+from datas import converter_datas
+from categorias import contar
+from transicoes import analisar_transicoes
 
 def carregar_dados_colaborador(nome_arquivo, nome_aba):
     """
@@ -34,30 +39,21 @@ def carregar_dados_colaborador(nome_arquivo, nome_aba):
     """
     try:
         # Carregar dados do colaborador
-        df = pd.read_excel(nome_arquivo, sheet_name=nome_aba)
-        
-        # Normalizar nomes das colunas
-        colunas_normalizadas = []
-        for col in df.columns:
-            col_norm = str(col).strip().upper()
-            if col_norm in ['SITUAÇÂO', 'SITUAÇÃO']:
-                col_norm = 'SITUACAO'
-            colunas_normalizadas.append(col_norm)
-        
-        df.columns = colunas_normalizadas
+        df = carregar_aba(nome_arquivo, nome_aba, converter_tipos=False)
         
         return df
     except Exception as e:
         print(f"Erro ao carregar dados do colaborador {nome_aba}: {str(e)}")
         return None
 
-def analisar_colaborador(df, nome_aba):
+def analisar_colaborador(df, nome_aba, nome_arquivo=None):
     """
     Analisa os dados de um colaborador e exibe estatísticas.
     
     Args:
         df (pandas.DataFrame): DataFrame com os dados do colaborador
         nome_aba (str): Nome do colaborador
+        nome_arquivo (str, optional): Arquivo de origem da aba
     """
     if df is None or len(df) == 0:
         print(f"Não há dados para o colaborador {nome_aba}")
@@ -73,7 +69,7 @@ def analisar_colaborador(df, nome_aba):
     
     # Análise da coluna SITUACAO
     if 'SITUACAO' in df.columns:
-        situacao_counts = df['SITUACAO'].value_counts()
+        situacao_counts = contar(df['SITUACAO'])
         print("\nDistribuição de SITUACAO:")
         for situacao, count in situacao_counts.items():
             print(f"  {situacao}: {count} ({count/total_registros*100:.1f}%)")
@@ -97,7 +93,7 @@ def analisar_colaborador(df, nome_aba):
         print("\nAnálise Temporal:")
         for col_data in colunas_data:
             try:
-                df[col_data] = pd.to_datetime(df[col_data], errors='coerce')
+                df[col_data] = converter_datas(df[col_data], chave=(nome_aba, col_data), arquivo=nome_arquivo)
                 datas_validas = df[col_data].dropna()
                 
                 if len(datas_validas) > 0:
@@ -107,34 +103,18 @@ def analisar_colaborador(df, nome_aba):
                     
                     # Análise de transições se houver SITUACAO
                     if 'SITUACAO' in df.columns:
-                        df_ordenado = df.sort_values(by=col_data)
-                        
-                        # Verificar transições de estado
-                        transicoes = []
-                        situacao_anterior = None
-                        
-                        for idx, row in df_ordenado.iterrows():
-                            situacao_atual = row['SITUACAO']
-                            if pd.notna(situacao_anterior) and pd.notna(situacao_atual) and situacao_anterior != situacao_atual:
-                                transicoes.append((situacao_anterior, situacao_atual))
-                            situacao_anterior = situacao_atual
-                        
-                        # Contar transições
-                        contagem_transicoes = Counter(transicoes)
+                        transicoes = analisar_transicoes(df, col_data)
+                        contagem_transicoes = transicoes['contagem']
                         
                         if contagem_transicoes:
                             print("\n  Transições de Estado mais comuns:")
-                            for (de, para), contagem in sorted(contagem_transicoes.items(), key=lambda x: x[1], reverse=True)[:5]:
+                            for (de, para), contagem in list(contagem_transicoes.items())[:5]:
                                 print(f"    {de} -> {para}: {contagem} ocorrências")
                         
                         # Tempo médio em cada situação
-                        df_ordenado['data_anterior'] = df_ordenado[col_data].shift(1)
-                        df_ordenado['tempo_no_estado'] = (df_ordenado[col_data] - df_ordenado['data_anterior']).dt.days
-                        
-                        # Calcular tempo médio por situação
-                        tempos_por_situacao = df_ordenado.groupby('SITUACAO')['tempo_no_estado'].mean()
+                        tempos_por_situacao = transicoes['tempos_medios']
                         
-                        if not tempos_por_situacao.empty:
+                        if tempos_por_situacao:
                             print("\n  Tempo Médio em cada Situação (dias):")
                             for situacao, tempo in sorted(tempos_por_situacao.items(), key=lambda x: x[1], reverse=True):
                                 print(f"    {situacao}: {tempo:.1f} dias")
@@ -145,7 +125,7 @@ def analisar_colaborador(df, nome_aba):
     try:
         if 'SITUACAO' in df.columns:
             plt.figure(figsize=(10, 6))
-            situacao_counts = df['SITUACAO'].value_counts()
+            situacao_counts = contar(df['SITUACAO'])
             sns.barplot(x=situacao_counts.index, y=situacao_counts.values)
             plt.title(f'Distribuição de Situações - {nome_aba}')
             plt.xlabel('Situação')
@@ -184,8 +164,7 @@ def listar_colaboradores(nome_arquivo):
         list: Lista com os nomes das abas/colaboradores
     """
     try:
-        xls = pd.ExcelFile(nome_arquivo)
-        abas_validas = [aba for aba in xls.sheet_names if aba not in ["", "TESTE", "RELATÓRIO GERAL"]]
+        abas_validas = [aba for aba in listar_abas(nome_arquivo) if aba not in ["", "TESTE", "RELATÓRIO GERAL"]]
         return abas_validas
     except Exception as e:
         print(f"Erro ao listar colaboradores do arquivo {nome_arquivo}: {str(e)}")
@@ -240,7 +219,7 @@ def main():
                 if 0 <= indice < len(colaboradores):
                     nome_aba = colaboradores[indice]
                     df = carregar_dados_colaborador(arquivo_selecionado, nome_aba)
-                    analisar_colaborador(df, nome_aba)
+                    analisar_colaborador(df, nome_aba, arquivo_selecionado)
                 else:
                     print("Índice inválido!")
             except ValueError:
@@ -263,7 +242,7 @@ def main():
                 print(f"\nAnalisando arquivo: {arquivo_selecionado}")
                 for nome_aba in colaboradores:
                     df = carregar_dados_colaborador(arquivo_selecionado, nome_aba)
-                    analisar_colaborador(df, nome_aba)
+                    analisar_colaborador(df, nome_aba, arquivo_selecionado)
         
         elif opcao == "3":
             print("Saindo...")